@@ -20,6 +20,9 @@ from pants.util.process_handler import subprocess
 
 
 class RagelGen(SimpleCodegenTask):
+  # Each target is generated by its own ragel processes, into its own workdir.
+  supports_concurrent_codegen = True
+
   @classmethod
   def subsystem_dependencies(cls):
     return super(RagelGen, cls).subsystem_dependencies() + (Ragel.scoped(cls),)
@@ -29,6 +29,9 @@ class ApacheThriftGenBase(SimpleCodegenTask):
   # Subclasses may set their own default generator options.
   default_gen_options_map = None
 
+  # Each target is generated by its own thrift processes, into its own workdir.
+  supports_concurrent_codegen = True
+
   @classmethod
   def register_options(cls, register):
     super(ApacheThriftGenBase, cls).register_options(register)
@@ -6,7 +6,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import json
-from collections import defaultdict
+from collections import defaultdict, deque
 
 from pants.base.specs import DescendantAddresses
 from pants.task.console_task import ConsoleTask
@@ -63,16 +63,24 @@ class ReverseDepmap(ConsoleTask):
         yield dependent.address.spec
 
   def get_dependents(self, dependees_by_target, roots):
-    check = set(roots)
-    known_dependents = set()
-    while True:
-      dependents = set(known_dependents)
-      for target in check:
-        dependents.update(dependees_by_target[target])
-      check = dependents - known_dependents
-      if not check or not self._transitive:
-        return dependents - set(roots)
-      known_dependents = dependents
+    roots = set(roots)
+    if not self._transitive:
+      dependents = set()
+      for root in roots:
+        dependents.update(dependees_by_target.get(root, ()))
+      return dependents - roots
+
+    # A breadth-first walk visits each dependee, and each of its edges, once.
+    visited = set(roots)
+    dependents = set()
+    to_visit = deque(roots)
+    while to_visit:
+      for dependent in dependees_by_target.get(to_visit.popleft(), ()):
+        if dependent not in visited:
+          visited.add(dependent)
+          dependents.add(dependent)
+          to_visit.append(dependent)
+    return dependents
 
   def get_concrete_target(self, target):
     return target.concrete_derived_from
@@ -432,12 +432,14 @@ class IvyResolveResult(object):
 
     jar_library_targets = [t for t in targets if isinstance(t, JarLibrary)]
     ivy_jar_memo = {}
+    symlinked_jar_memo = {}
     for target in jar_library_targets:
       # Add the artifacts from each dependency module.
       resolved_jars = self._resolved_jars_with_symlinks(conf, ivy_info, ivy_jar_memo,
                                                         self._jar_dependencies_for_target(conf,
                                                                                           target),
-                                                        target)
+                                                        target,
+                                                        symlinked_jar_memo=symlinked_jar_memo)
       yield target, resolved_jars
 
   def _jar_dependencies_for_target(self, conf, target):
@@ -470,11 +472,20 @@ class IvyResolveResult(object):
                        pants_path=pants_path,
                        cache_path=resolved_jar_without_symlink.cache_path)
 
-  def _resolved_jars_with_symlinks(self, conf, ivy_info, ivy_jar_memo, coordinates, target):
+  def _resolved_jars_with_symlinks(self, conf, ivy_info, ivy_jar_memo, coordinates, target,
+                                   symlinked_jar_memo=None):
     raw_resolved_jars = ivy_info.get_resolved_jars_for_coordinates(coordinates,
                                                                    memo=ivy_jar_memo)
-    resolved_jars = [self._new_resolved_jar_with_symlink_path(conf, target, raw_resolved_jar)
-                     for raw_resolved_jar in raw_resolved_jars]
+    if symlinked_jar_memo is None:
+      symlinked_jar_memo = {}
+    resolved_jars = []
+    for raw_resolved_jar in raw_resolved_jars:
+      # Targets share most of their jars, so each jar's symlink is only looked up once.
+      resolved_jar = symlinked_jar_memo.get(raw_resolved_jar)
+      if resolved_jar is None:
+        resolved_jar = self._new_resolved_jar_with_symlink_path(conf, target, raw_resolved_jar)
+        symlinked_jar_memo[raw_resolved_jar] = resolved_jar
+      resolved_jars.append(resolved_jar)
     return resolved_jars
 
 
@@ -583,6 +594,10 @@ class IvyInfo(object):
     self._deps_by_caller = defaultdict(OrderedSet)
     # Map from _unversioned_ ref to OrderedSet of IvyArtifact instances.
     self._artifacts_by_ref = defaultdict(OrderedSet)
+    # Caches of values derived from the above, which are cleared whenever a module is added.
+    self._sorted_deps_by_caller = {}
+    self._transitive_resolved_jars_by_ref = {}
+    self._resolved_jars = {}
 
   def add_module(self, module):
     if not module.artifact:
@@ -603,27 +618,69 @@ class IvyInfo(object):
       self._deps_by_caller[caller.caller_key].add(module.ref)
     self._artifacts_by_ref[ref_unversioned].add(module.artifact)
 
+    self._sorted_deps_by_caller.clear()
+    self._transitive_resolved_jars_by_ref.clear()
+    self._resolved_jars.clear()
+
+  def _sorted_deps(self, ref):
+    caller_key = ref.caller_key
+    deps = self._sorted_deps_by_caller.get(caller_key)
+    if deps is None:
+      # NB(zundel): ivy does not return deps in a consistent order for the same module for
+      # different resolves.  Sort them to get consistency and prevent cache invalidation.
+      # See https://github.com/pantsbuild/pants/issues/2607
+      deps = tuple(sorted(self._deps_by_caller.get(caller_key, ())))
+      self._sorted_deps_by_caller[caller_key] = deps
+    return deps
+
   def _do_traverse_dependency_graph(self, ref, collector, memo, visited):
     memoized_value = memo.get(ref)
     if memoized_value:
       return memoized_value
 
-    if ref in visited:
-      # Ivy allows for circular dependencies
-      # If we're here, that means we're resolving something that
-      # transitively depends on itself
-      return set()
-
-    visited.add(ref)
-    acc = collector(ref)
-    # NB(zundel): ivy does not return deps in a consistent order for the same module for
-    # different resolves.  Sort them to get consistency and prevent cache invalidation.
-    # See https://github.com/pantsbuild/pants/issues/2607
-    deps = sorted(self._deps_by_caller.get(ref.caller_key, ()))
-    for dep in deps:
-      acc.update(self._do_traverse_dependency_graph(dep, collector, memo, visited))
-    memo[ref] = acc
-    return acc
+    # The graph is traversed depth first with an explicit stack, since third party graphs can be
+    # deeper than the recursion limit. Each frame is [ref, acc, deps iterator, depth, low], where
+    # low is the shallowest depth of a ref still on the stack that the frame's subgraph depends
+    # on. Ivy allows for circular dependencies, and a ref that depends on a ref still on the stack
+    # has an incomplete value: it is reused within this traversal, but only complete values are
+    # memoized for other traversals.
+    stack = []
+    finished = {}
+    depth_by_ref = {}
+
+    def enter(r):
+      visited.add(r)
+      depth = len(stack)
+      depth_by_ref[r] = depth
+      stack.append([r, collector(r), iter(self._sorted_deps(r)), depth, depth])
+
+    enter(ref)
+    while True:
+      frame = stack[-1]
+      acc = frame[1]
+      for dep in frame[2]:
+        value = memo.get(dep) or finished.get(dep)
+        if value:
+          acc.update(value)
+        elif dep in visited:
+          # If we're here, that means we're resolving something that transitively depends on itself,
+          # or a dep that collected nothing.
+          if dep in depth_by_ref:
+            frame[4] = min(frame[4], depth_by_ref[dep])
+        else:
+          enter(dep)
+          break
+      else:
+        r, _, _, depth, low = stack.pop()
+        del depth_by_ref[r]
+        finished[r] = acc
+        if low >= depth:
+          memo[r] = acc
+        if not stack:
+          return acc
+        parent = stack[-1]
+        parent[1].update(acc)
+        parent[4] = min(parent[4], low)
 
   def traverse_dependency_graph(self, ref, collector, memo=None):
     """Traverses module graph, starting with ref, collecting values for each ref into the sets
@@ -645,6 +702,37 @@ class IvyInfo(object):
     visited = set()
     return self._do_traverse_dependency_graph(ref, collector, memo, visited)
 
+  def _resolved_jar(self, jar_ref, jar_path):
+    # Resolved jars are interned, so that the many targets sharing a jar share its instance.
+    key = (jar_ref, jar_path)
+    resolved_jar = self._resolved_jars.get(key)
+    if resolved_jar is None:
+      resolved_jar = ResolvedJar(coordinate=M2Coordinate(org=jar_ref.org,
+                                                         name=jar_ref.name,
+                                                         rev=jar_ref.rev,
+                                                         classifier=jar_ref.classifier,
+                                                         ext=jar_ref.ext),
+                                 cache_path=jar_path)
+      self._resolved_jars[key] = resolved_jar
+    return resolved_jar
+
+  def _transitive_resolved_jars(self, ref, memo):
+    """Returns a tuple of the resolved jars of ref and its transitive dependencies.
+
+    The tuple for each ref is computed once, and shared by all of the targets depending on it.
+    """
+    resolved_jars = self._transitive_resolved_jars_by_ref.get(ref)
+    if resolved_jars is None:
+      def create_collection(dep):
+        return OrderedSet([dep])
+      resolved_jars = tuple(self._resolved_jar(module_ref, artifact_path)
+                            for module_ref in self.traverse_dependency_graph(ref,
+                                                                             create_collection,
+                                                                             memo)
+                            for artifact_path in self._artifacts_by_ref[module_ref.unversioned])
+      self._transitive_resolved_jars_by_ref[ref] = resolved_jars
+    return resolved_jars
+
   def get_resolved_jars_for_coordinates(self, coordinates, memo=None):
     """Collects jars for the passed coordinates.
 
@@ -660,22 +748,11 @@ class IvyInfo(object):
               including transitive dependencies.
     :rtype: list of :class:`pants.java.jar.ResolvedJar`
     """
-    def to_resolved_jar(jar_ref, jar_path):
-      return ResolvedJar(coordinate=M2Coordinate(org=jar_ref.org,
-                                                 name=jar_ref.name,
-                                                 rev=jar_ref.rev,
-                                                 classifier=jar_ref.classifier,
-                                                 ext=jar_ref.ext),
-                         cache_path=jar_path)
     resolved_jars = OrderedSet()
-    def create_collection(dep):
-      return OrderedSet([dep])
     for jar in coordinates:
       classifier = jar.classifier if self._conf == 'default' else self._conf
       jar_module_ref = IvyModuleRef(jar.org, jar.name, jar.rev, classifier, jar.ext)
-      for module_ref in self.traverse_dependency_graph(jar_module_ref, create_collection, memo):
-        for artifact_path in self._artifacts_by_ref[module_ref.unversioned]:
-          resolved_jars.add(to_resolved_jar(module_ref, artifact_path))
+      resolved_jars.update(self._transitive_resolved_jars(jar_module_ref, memo))
     return resolved_jars
 
   def __repr__(self):
@@ -7,6 +7,8 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import os
 import re
+import threading
+from collections import OrderedDict
 
 from twitter.common.collections import OrderedSet
 
@@ -28,6 +30,8 @@ class ClasspathEntry(object):
 
   def __init__(self, path):
     self._path = path
+    # Entries are immutable and hashed very often, so their hash is computed once.
+    self._hash = hash(path)
 
   @property
   def path(self):
@@ -51,7 +55,7 @@ class ClasspathEntry(object):
     return False
 
   def __hash__(self):
-    return hash(self.path)
+    return self._hash
 
   def __eq__(self, other):
     return isinstance(other, ClasspathEntry) and self.path == other.path
@@ -87,6 +91,7 @@ class ArtifactClasspathEntry(ClasspathEntry):
     super(ArtifactClasspathEntry, self).__init__(path)
     self._coordinate = coordinate
     self._cache_path = cache_path
+    self._hash = hash((path, coordinate, cache_path))
 
   @property
   def coordinate(self):
@@ -116,7 +121,7 @@ class ArtifactClasspathEntry(ClasspathEntry):
     return any(_matches_exclude(self.coordinate, exclude) for exclude in excludes)
 
   def __hash__(self):
-    return hash((self.path, self.coordinate, self.cache_path))
+    return self._hash
 
   def __eq__(self, other):
     return (isinstance(other, ArtifactClasspathEntry) and
@@ -144,10 +149,16 @@ def _matches_exclude(coordinate, exclude):
 
 
 def _not_excluded_filter(excludes):
-  def not_excluded(product_to_target):
-    path_tuple = product_to_target[0]
+  # Most classpath entries are shared by many targets, so each is only checked once.
+  excluded_by_entry = {}
+
+  def not_excluded(path_tuple):
     conf, classpath_entry = path_tuple
-    return not classpath_entry.is_excluded_by(excludes)
+    excluded = excluded_by_entry.get(classpath_entry)
+    if excluded is None:
+      excluded = classpath_entry.is_excluded_by(excludes)
+      excluded_by_entry[classpath_entry] = excluded
+    return not excluded
   return not_excluded
 
 
@@ -160,10 +171,20 @@ class ClasspathProducts(object):
   :API: public
   """
 
+  # The number of recently computed classpaths to keep. Callers commonly look up the classpath of
+  # the same targets several times in a row, e.g. in full and then just the artifact entries.
+  _MAX_CACHED_CLASSPATHS = 16
+
   def __init__(self, pants_workdir, classpaths=None, excludes=None):
     self._classpaths = classpaths or UnionProducts()
     self._excludes = excludes or UnionProducts()
     self._pants_workdir = pants_workdir
+    # Canonical instances of the (conf, classpath entry) tuples added to any target, so that
+    # targets sharing entries share their tuples. Shared with copies.
+    self._interned_elements = {}
+    self._cached_classpaths = OrderedDict()
+    self._cached_classpaths_generation = 0
+    self._cached_classpaths_lock = threading.Lock()
 
   @staticmethod
   def init_func(pants_workdir):
@@ -290,9 +311,11 @@ class ClasspathProducts(object):
 
     :rtype: :class:`ClasspathProducts`
     """
-    return ClasspathProducts(pants_workdir=self._pants_workdir,
-                             classpaths=self._classpaths.copy(),
-                             excludes=self._excludes.copy())
+    copied = ClasspathProducts(pants_workdir=self._pants_workdir,
+                               classpaths=self._classpaths.copy(),
+                               excludes=self._excludes.copy())
+    copied._interned_elements = self._interned_elements
+    return copied
 
   def add_for_targets(self, targets, classpath_elements):
     """Adds classpath path elements to the products of all the provided targets."""
@@ -332,6 +355,7 @@ class ClasspathProducts(object):
   def remove_for_target(self, target, classpath_elements):
     """Removes the given entries for the target."""
     self._classpaths.remove_for_target(target, self._wrap_path_elements(classpath_elements))
+    self._invalidate_cached_classpaths()
 
   def get_for_target(self, target):
     """Gets the classpath products for the given target.
@@ -369,9 +393,33 @@ class ClasspathProducts(object):
     :rtype: list of (string, :class:`ClasspathEntry`)
     """
 
-    # remove the duplicate, preserve the ordering.
-    return list(OrderedSet([cp for cp, target in self.get_product_target_mappings_for_targets(
-                            targets, respect_excludes)]))
+    targets = tuple(targets)
+    classpath = self._deduplicated_classpath(targets)
+    if respect_excludes:
+      not_excluded = self._excludes_filter(targets)
+      if not_excluded:
+        # Whether an entry is excluded doesn't depend on the target it came from, so filtering the
+        # deduplicated classpath is equivalent to deduplicating the filtered one.
+        return [path_tuple for path_tuple in classpath if not_excluded(path_tuple)]
+    return list(classpath)
+
+  def _deduplicated_classpath(self, targets):
+    # Only the unfiltered classpath is cached: excludes are collected from the transitive closure
+    # of the targets, which can change with the build graph without any edit to these products.
+    with self._cached_classpaths_lock:
+      classpath = self._cached_classpaths.pop(targets, None)
+      generation = self._cached_classpaths_generation
+    if classpath is None:
+      # remove the duplicate, preserve the ordering.
+      classpath = tuple(OrderedSet(cp for cp, target in
+                                   self._classpaths.get_product_target_mappings_for_targets(targets)))
+    with self._cached_classpaths_lock:
+      # Don't cache a classpath that was computed concurrently with an edit.
+      if generation == self._cached_classpaths_generation:
+        self._cached_classpaths[targets] = classpath
+        while len(self._cached_classpaths) > self._MAX_CACHED_CLASSPATHS:
+          self._cached_classpaths.popitem(last=False)
+    return classpath
 
   def get_product_target_mappings_for_targets(self, targets, respect_excludes=True):
     """Gets the classpath products-target associations for the given targets.
@@ -428,13 +476,21 @@ class ClasspathProducts(object):
       self._classpaths.add_for_target(target, products)
     for target, products in other._excludes._products_by_target.items():
       self._excludes.add_for_target(target, products)
+    self._invalidate_cached_classpaths()
 
   def _filter_by_excludes(self, classpath_target_tuples, root_targets):
+    not_excluded = self._excludes_filter(root_targets)
+    if not not_excluded:
+      return classpath_target_tuples
+    return [product_to_target for product_to_target in classpath_target_tuples
+            if not_excluded(product_to_target[0])]
+
+  def _excludes_filter(self, root_targets):
     # Excludes are always applied transitively, so regardless of whether a transitive
     # set of targets was included here, their closure must be included.
     closure = BuildGraph.closure(root_targets, bfs=True)
     excludes = self._excludes.get_for_targets(closure)
-    return filter(_not_excluded_filter(excludes), classpath_target_tuples)
+    return _not_excluded_filter(excludes) if excludes else None
 
   def _add_excludes_for_target(self, target):
     if isinstance(target, ExportableJvmLibrary) and target.provides:
@@ -443,12 +499,25 @@ class ClasspathProducts(object):
     if isinstance(target, JvmTarget) and target.excludes:
       self._excludes.add_for_target(target, target.excludes)
 
+  def _invalidate_cached_classpaths(self):
+    with self._cached_classpaths_lock:
+      self._cached_classpaths.clear()
+      self._cached_classpaths_generation += 1
+
   def _wrap_path_elements(self, classpath_elements):
     return [(element[0], ClasspathEntry(element[1])) for element in classpath_elements]
 
   def _add_elements_for_target(self, target, elements):
-    self._validate_classpath_tuples(elements, target)
-    self._classpaths.add_for_target(target, elements)
+    interned_elements = []
+    for element in elements:
+      interned_element = self._interned_elements.get(element)
+      if interned_element is None:
+        # Elements only need to be validated the first time they are added to any target.
+        self._validate_classpath_tuples([element], target)
+        interned_element = self._interned_elements.setdefault(element, element)
+      interned_elements.append(interned_element)
+    self._classpaths.add_for_target(target, interned_elements)
+    self._invalidate_cached_classpaths()
 
   def _validate_classpath_tuples(self, classpath, target):
     """Validates that all files are located within the working directory, to simplify relativization.
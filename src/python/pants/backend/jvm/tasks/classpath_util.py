@@ -7,6 +7,8 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import itertools
 import os
+import threading
+import time
 from collections import OrderedDict
 
 from twitter.common.collections import OrderedSet
@@ -18,6 +20,16 @@ from pants.util.strutil import ensure_text
 
 class ClasspathUtil(object):
 
+  # The number of jars whose contents are cached, most recently used first.
+  _MAX_CACHED_JAR_CONTENTS = 1024
+
+  # The minimum age of a jar's mtime for its contents to be cached: a further modification within
+  # the granularity of the filesystem's mtimes would not change the jar's stat.
+  _RACY_SECONDS = 3
+
+  _jar_contents_by_path = OrderedDict()
+  _jar_contents_lock = threading.Lock()
+
   @classmethod
   def compute_classpath(cls, targets, classpath_products, extra_classpath_tuples, confs):
     """Return the list of classpath entries for a classpath covering the passed targets.
@@ -147,9 +159,8 @@ class ClasspathUtil(object):
     for entry in classpath_entries:
       if cls.is_jar(entry):
         # Walk the jar namelist.
-        with open_zip(entry, mode='r') as jar:
-          for name in jar.namelist():
-            yield ensure_text(name)
+        for name in cls._jar_contents(entry):
+          yield name
       elif os.path.isdir(entry):
         # Walk the directory, including subdirs.
         def rel_walk_name(abs_sub_dir, name):
@@ -163,6 +174,30 @@ class ClasspathUtil(object):
         # non-jar and non-directory classpath entries should be ignored
         pass
 
+  @classmethod
+  def _jar_contents(cls, path):
+    """Returns the names in the given jar.
+
+    The names are cached, and reused while the jar's mtime, size and inode are unchanged: most jars
+    on a classpath are resolved 3rdparty jars, which are listed by several tasks per run.
+    """
+    stat = os.stat(path)
+    key = (stat.st_mtime, stat.st_size, stat.st_ino)
+    with cls._jar_contents_lock:
+      entry = cls._jar_contents_by_path.pop(path, None)
+      if entry and entry[0] == key:
+        cls._jar_contents_by_path[path] = entry
+        return entry[1]
+
+    with open_zip(path, mode='r') as jar:
+      names = tuple(ensure_text(name) for name in jar.namelist())
+    if time.time() - stat.st_mtime >= cls._RACY_SECONDS:
+      with cls._jar_contents_lock:
+        cls._jar_contents_by_path[path] = (key, names)
+        while len(cls._jar_contents_by_path) > cls._MAX_CACHED_JAR_CONTENTS:
+          cls._jar_contents_by_path.popitem(last=False)
+    return names
+
   @classmethod
   def classname_for_rel_classfile(cls, class_file_name):
     """Return the class name for the given relative-to-a-classpath-entry file, or None."""
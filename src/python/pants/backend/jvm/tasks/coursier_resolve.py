@@ -9,6 +9,7 @@ import hashlib
 import itertools
 import json
 import os
+import re
 import urllib
 from collections import defaultdict
 
@@ -23,11 +24,14 @@ from pants.backend.jvm.tasks.coursier.coursier_subsystem import CoursierSubsyste
 from pants.backend.jvm.tasks.nailgun_task import NailgunTask
 from pants.base.exceptions import TaskError
 from pants.base.fingerprint_strategy import FingerprintStrategy
+from pants.base.hash_utils import stable_json_hash
+from pants.base.worker_pool import Work, WorkerPool
 from pants.base.workunit import WorkUnit, WorkUnitLabel
 from pants.invalidation.cache_manager import VersionedTargetSet
 from pants.java.jar.jar_dependency_utils import M2Coordinate, ResolvedJar
 from pants.util.contextutil import temporary_file
-from pants.util.dirutil import safe_mkdir
+from pants.util.dirutil import (safe_concurrent_creation, safe_mkdir, safe_mkdir_for,
+                                safe_rm_oldest_items_in_dir)
 
 
 class CoursierResultNotFound(Exception):
@@ -44,9 +48,17 @@ class CoursierMixin(NailgunTask):
 
   RESULT_FILENAME = 'result'
 
+  # The number of most recently used coursier results to keep in the resolution cache.
+  MAX_CACHED_RESOLUTIONS = 64
+
+  # Revisions whose resolution changes over time: snapshots, dynamic revisions (e.g.
+  # `latest.integration` or `1.0+`) and version ranges (e.g. `[1.0,)`). Coursier re-checks these
+  # against its own TTL, so results involving them are never cached.
+  _CHANGING_REV_RE = re.compile(r'SNAPSHOT$|^latest\.|\+$|^[\[\](]')
+
   @classmethod
   def implementation_version(cls):
-    return super(CoursierMixin, cls).implementation_version() + [('CoursierMixin', 2)]
+    return super(CoursierMixin, cls).implementation_version() + [('CoursierMixin', 3)]
 
   @classmethod
   def subsystem_dependencies(cls):
@@ -59,6 +71,12 @@ class CoursierMixin(NailgunTask):
              help='Whether global excludes are allowed.')
     register('--report', type=bool, advanced=False, default=False,
              help='Show the resolve output. This would also force a resolve even if the resolve task is validated.')
+    register('--resolution-cache', type=bool, advanced=True, default=True,
+             help='Reuse the result of an earlier coursier run with the same jars, excludes, pinned '
+                  'coordinates and coursier options instead of running coursier again, as long as '
+                  'all of the files it resolved still exist. Results involving SNAPSHOT or dynamic '
+                  'revisions are never reused. The most recently used results are kept in the '
+                  'pants workdir.')
 
   @staticmethod
   def _compute_jars_to_resolve_and_pin(raw_jars, artifact_set, manager):
@@ -263,15 +281,30 @@ class CoursierMixin(NailgunTask):
     coursier_work_temp_dir = os.path.join(pants_workdir, 'tmp')
     safe_mkdir(coursier_work_temp_dir)
 
-    results_by_conf = self._get_default_conf_results(common_args, coursier_jar, global_excludes, jars_to_resolve,
-                                                     coursier_work_temp_dir,
-                                                     pinned_coords)
+    resolves = [lambda: self._get_default_conf_results(common_args, coursier_jar, global_excludes,
+                                                       jars_to_resolve, coursier_work_temp_dir,
+                                                       pinned_coords)]
     if sources or javadoc:
-      non_default_conf_results = self._get_non_default_conf_results(common_args, coursier_jar, global_excludes,
-                                                                    jars_to_resolve, coursier_work_temp_dir,
-                                                                    pinned_coords, sources, javadoc)
-      results_by_conf.update(non_default_conf_results)
+      resolves.append(lambda: self._get_non_default_conf_results(common_args, coursier_jar,
+                                                                 global_excludes, jars_to_resolve,
+                                                                 coursier_work_temp_dir,
+                                                                 pinned_coords, sources, javadoc))
 
+    if len(resolves) == 1:
+      conf_results = [resolves[0]()]
+    else:
+      # The confs are resolved independently, so resolve them concurrently.
+      with self.context.new_workunit(name='coursier-confs') as workunit:
+        pool = WorkerPool(workunit, self.context.run_tracker, len(resolves))
+        try:
+          conf_results = pool.submit_work_and_wait(Work(lambda resolve: resolve(),
+                                                        [(resolve,) for resolve in resolves]))
+        finally:
+          pool.shutdown()
+
+    results_by_conf = defaultdict(list)
+    for results in conf_results:
+      results_by_conf.update(results)
     return results_by_conf
 
   def _get_default_conf_results(self, common_args, coursier_jar, global_excludes, jars_to_resolve,
@@ -280,17 +313,14 @@ class CoursierMixin(NailgunTask):
 
     # Variable to store coursier result each run.
     results = defaultdict(list)
-    with temporary_file(coursier_work_temp_dir, cleanup=False) as f:
-      output_fn = f.name
-
-    cmd_args = self._construct_cmd_args(jars_to_resolve,
-                                        common_args,
-                                        global_excludes if self.get_options().allow_global_excludes else [],
-                                        pinned_coords,
-                                        coursier_work_temp_dir,
-                                        output_fn)
-
-    results['default'].append(self._call_coursier(cmd_args, coursier_jar, output_fn))
+    results['default'].append(
+      self._resolve_conf('default',
+                         jars_to_resolve,
+                         common_args,
+                         global_excludes if self.get_options().allow_global_excludes else [],
+                         pinned_coords,
+                         coursier_work_temp_dir,
+                         coursier_jar))
 
     return results
 
@@ -301,9 +331,6 @@ class CoursierMixin(NailgunTask):
     if not sources and not javadoc:
       raise TaskError("sources or javadoc has to be True.")
 
-    with temporary_file(coursier_work_temp_dir, cleanup=False) as f:
-      output_fn = f.name
-
     results = defaultdict(list)
 
     new_pinned_coords = []
@@ -323,19 +350,113 @@ class CoursierMixin(NailgunTask):
       new_pinned_coords.extend(c.copy(classifier='javadoc') for c in pinned_coords)
       new_jars_to_resolve.extend(c.copy(classifier='javadoc') for c in jars_to_resolve)
 
-    cmd_args = self._construct_cmd_args(new_jars_to_resolve,
+    # sources and/or javadoc share the same conf
+    results['src_doc'] = [
+      self._resolve_conf('src_doc',
+                         new_jars_to_resolve,
+                         common_args,
+                         global_excludes if self.get_options().allow_global_excludes else [],
+                         new_pinned_coords,
+                         coursier_work_temp_dir,
+                         coursier_jar,
+                         special_args)]
+    return results
+
+  def _resolve_conf(self, conf, jars, common_args, global_excludes, pinned_coords,
+                    coursier_work_temp_dir, coursier_jar, special_args=()):
+    """Runs coursier for a single conf, unless the resolution cache has its result.
+
+    :return: The result dict converted from the json produced by coursier.
+    """
+    use_cache = (self.get_options().resolution_cache and
+                 not self.get_options().report and
+                 not any(self._is_changing_rev(c.rev)
+                         for c in itertools.chain(jars, pinned_coords)))
+    if use_cache:
+      cache_path = self._resolution_cache_path(jars, common_args, global_excludes, pinned_coords,
+                                               coursier_jar, special_args)
+      result = self._load_cached_resolution(cache_path)
+      if result is not None:
+        self.context.log.debug('Using the cached coursier resolution {} for conf {}.'
+                               .format(cache_path, conf))
+        return result
+
+    with temporary_file(coursier_work_temp_dir, cleanup=False) as f:
+      output_fn = f.name
+
+    cmd_args = self._construct_cmd_args(jars,
                                         common_args,
-                                        global_excludes if self.get_options().allow_global_excludes else [],
-                                        new_pinned_coords,
+                                        global_excludes,
+                                        pinned_coords,
                                         coursier_work_temp_dir,
                                         output_fn)
     cmd_args.extend(special_args)
 
-    # sources and/or javadoc share the same conf
-    results['src_doc'] = [self._call_coursier(cmd_args, coursier_jar, output_fn)]
-    return results
+    result = self._call_coursier(cmd_args, coursier_jar, output_fn, pool_key=conf)
+    # Fixed revisions may still resolve to snapshots transitively.
+    if use_cache and not any(self._is_changing_rev(dep.get('coord', '').rsplit(':', 1)[-1])
+                             for dep in result.get('dependencies', ())):
+      self._cache_resolution(cache_path, result)
+    return result
+
+  @classmethod
+  def _is_changing_rev(cls, rev):
+    return bool(rev and cls._CHANGING_REV_RE.search(rev))
+
+  def _cache_resolution(self, cache_path, result):
+    try:
+      safe_mkdir_for(cache_path)
+      with safe_concurrent_creation(cache_path) as tmp_path:
+        with open(tmp_path, 'w') as f:
+          json.dump(result, f)
+      safe_rm_oldest_items_in_dir(os.path.dirname(cache_path), self.MAX_CACHED_RESOLUTIONS)
+    except (IOError, OSError) as e:
+      # The cache is only an optimization, and concurrent runs may evict each other's entries.
+      self.context.log.debug('Failed to cache the coursier resolution at {}: {}'
+                             .format(cache_path, e))
+
+  def _resolution_cache_path(self, jars, common_args, global_excludes, pinned_coords,
+                             coursier_jar, special_args):
+    """Returns the path to cache the result of resolving the given inputs at.
+
+    The inputs are normalized, so that their order doesn't matter.
+    """
+    def excludes_key(excludes):
+      return sorted('{}:{}'.format(ex.org, ex.name or '*') for ex in excludes)
+
+    key = stable_json_hash({
+      'jars': sorted([str(j.coordinate), j.get_url() or '', j.intransitive, j.force,
+                      excludes_key(j.excludes)]
+                     for j in jars),
+      'global_excludes': excludes_key(global_excludes),
+      'pinned_coords': sorted(str(c) for c in pinned_coords),
+      'args': list(common_args) + list(special_args),
+      'coursier': coursier_jar,
+    })
+    return os.path.join(self.get_options().pants_workdir, 'coursier', 'resolutions',
+                        '{}.json'.format(key))
+
+  @staticmethod
+  def _load_cached_resolution(cache_path):
+    """Returns the cached coursier result at the given path, or None if it's missing or stale."""
+    try:
+      with open(cache_path, 'r') as f:
+        result = json.load(f)
+    except (IOError, ValueError):
+      return None
+    # The result is only valid while all the files that coursier resolved are still in its cache.
+    for dep in result.get('dependencies', ()):
+      jar_path = dep.get('file')
+      if jar_path and not os.path.exists(jar_path):
+        return None
+    try:
+      # Mark the entry as recently used, so that it outlives stale entries.
+      os.utime(cache_path, None)
+    except OSError:
+      pass
+    return result
 
-  def _call_coursier(self, cmd_args, coursier_jar, output_fn):
+  def _call_coursier(self, cmd_args, coursier_jar, output_fn, pool_key=None):
 
     labels = [WorkUnitLabel.COMPILER] if self.get_options().report else [WorkUnitLabel.TOOL, WorkUnitLabel.SUPPRESS_LABEL]
 
@@ -345,7 +466,8 @@ class CoursierMixin(NailgunTask):
         main='coursier.cli.Coursier',
         args=cmd_args,
         jvm_options=self.get_options().jvm_options,
-        workunit_labels=labels
+        workunit_labels=labels,
+        pool_key=pool_key
       )
 
       workunit.set_outcome(WorkUnit.FAILURE if return_code else WorkUnit.SUCCESS)
@@ -441,22 +563,28 @@ class CoursierMixin(NailgunTask):
     for coord in coord_to_resolved_jars.keys():
       org_name_to_org_name_rev['{}:{}'.format(coord.org, coord.name)] = coord
 
-    for vt in invalidation_check.all_vts:
-      t = vt.target
-      if isinstance(t, JarLibrary):
-        def get_transitive_resolved_jars(my_coord, resolved_jars):
-          transitive_jar_path_for_coord = []
-          coord_str = str(my_coord)
-          if coord_str in flattened_resolution and my_coord in resolved_jars:
-            transitive_jar_path_for_coord.append(resolved_jars[my_coord])
+    # Many targets share coordinates, so each coordinate's transitive jars are computed only once.
+    transitive_resolved_jars_by_coord = {}
+
+    def get_transitive_resolved_jars(my_coord, resolved_jars):
+      transitive_jar_path_for_coord = transitive_resolved_jars_by_coord.get(my_coord)
+      if transitive_jar_path_for_coord is None:
+        transitive_jar_path_for_coord = []
+        coord_str = str(my_coord)
+        if coord_str in flattened_resolution and my_coord in resolved_jars:
+          transitive_jar_path_for_coord.append(resolved_jars[my_coord])
 
-            for c in flattened_resolution[coord_str]:
-              j = resolved_jars.get(self.to_m2_coord(c))
-              if j:
-                transitive_jar_path_for_coord.append(j)
+          for c in flattened_resolution[coord_str]:
+            j = resolved_jars.get(self.to_m2_coord(c))
+            if j:
+              transitive_jar_path_for_coord.append(j)
+        transitive_resolved_jars_by_coord[my_coord] = transitive_jar_path_for_coord
 
-          return transitive_jar_path_for_coord
+      return transitive_jar_path_for_coord
 
+    for vt in invalidation_check.all_vts:
+      t = vt.target
+      if isinstance(t, JarLibrary):
         for jar in t.jar_dependencies:
           # if there are override classifiers, then force use of those.
           coord_candidates = []
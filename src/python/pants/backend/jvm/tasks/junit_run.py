@@ -40,7 +40,7 @@ from pants.process.lock import OwnerPrintingInterProcessFileLock
 from pants.task.testrunner_task_mixin import PartitionedTestRunnerTaskMixin, TestResult
 from pants.util import desktop
 from pants.util.argutil import ensure_arg, remove_arg
-from pants.util.contextutil import environment_as, temporary_dir
+from pants.util.contextutil import temporary_dir
 from pants.util.dirutil import safe_delete, safe_mkdir, safe_mkdir_for, safe_rmtree, safe_walk
 from pants.util.memo import memoized_method
 from pants.util.meta import AbstractClass
@@ -270,7 +270,7 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
       if not options.use_experimental_runner:
         self.context.log.warn('--default-concurrency=PARALLEL_METHODS is experimental, use '
                               '--use-experimental-runner.')
-      if options.test_shard:
+      if options.test_shard and not self._shard_by_durations:
         # NB(zundel): The experimental junit runner doesn't support test sharding natively.  The
         # legacy junit runner allows both methods and classes to run in parallel with this option.
         self.context.log.warn('--default-concurrency=PARALLEL_METHODS with test sharding will '
@@ -287,7 +287,8 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
     args.append('-parallel-threads')
     args.append(str(options.parallel_threads))
 
-    if options.test_shard:
+    if options.test_shard and not self._shard_by_durations:
+      # NB: With --shard-by-durations, whole targets are sharded before the runner is invoked.
       args.append('-test-shard')
       args.append(options.test_shard)
 
@@ -308,18 +309,27 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
                                                   if isinstance(target, JvmTarget)],
                                                   self._strict_jvm_version)
 
-  def _spawn(self, distribution, executor=None, *args, **kwargs):
+  def _spawn(self, distribution, executor=None, env_vars=None, *args, **kwargs):
     """Returns a processhandler to a process executing java.
 
     :param Executor executor: the java subprocess executor to use. If not specified, construct
       using the distribution.
     :param Distribution distribution: The JDK or JRE installed.
+    :param env_vars: Environment variables to set for the process, as a dict or as pairs.
     :rtype: ProcessHandler
     """
 
     actual_executor = executor or SubprocessExecutor(distribution)
+    # NB: Partitions may be spawned concurrently, so the environment of this process is left as is.
+    env = dict(os.environ)
+    for name, value in dict(env_vars or ()).items():
+      if value is None:
+        env.pop(name, None)
+      else:
+        env[name] = value
     return distribution.execute_java_async(*args,
                                            executor=actual_executor,
+                                           env=env,
                                            **kwargs)
 
   def execute_java_for_coverage(self, targets, *args, **kwargs):
@@ -455,24 +465,24 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
         with self._chroot(relevant_targets, workdir) as chroot:
           self.context.log.debug('CWD = {}'.format(chroot))
           self.context.log.debug('platform = {}'.format(platform))
-          with environment_as(**dict(target_env_vars)):
-            subprocess_result = self._spawn_and_wait(
-              executor=SubprocessExecutor(distribution),
-              distribution=distribution,
-              classpath=complete_classpath,
-              main=JUnit.RUNNER_MAIN,
-              jvm_options=self.jvm_options + extra_jvm_options + list(target_jvm_options),
-              args=args + batch_tests,
-              workunit_factory=self.context.new_workunit,
-              workunit_name='run',
-              workunit_labels=[WorkUnitLabel.TEST],
-              cwd=chroot,
-              synthetic_jar_dir=batch_output_dir,
-              create_synthetic_jar=self.synthetic_classpath,
-            )
-            self.context.log.debug('JUnit subprocess exited with result ({})'
-                                   .format(subprocess_result))
-            result += abs(subprocess_result)
+          subprocess_result = self._spawn_and_wait(
+            executor=SubprocessExecutor(distribution),
+            distribution=distribution,
+            env_vars=target_env_vars,
+            classpath=complete_classpath,
+            main=JUnit.RUNNER_MAIN,
+            jvm_options=self.jvm_options + extra_jvm_options + list(target_jvm_options),
+            args=args + batch_tests,
+            workunit_factory=self.context.new_workunit,
+            workunit_name='run',
+            workunit_labels=[WorkUnitLabel.TEST],
+            cwd=chroot,
+            synthetic_jar_dir=batch_output_dir,
+            create_synthetic_jar=self.synthetic_classpath,
+          )
+          self.context.log.debug('JUnit subprocess exited with result ({})'
+                                 .format(subprocess_result))
+          result += abs(subprocess_result)
 
         tests_info = self.parse_test_info(batch_output_dir, parse_error_handler, ['classname'])
         for test_name, test_info in tests_info.items():
@@ -547,6 +557,18 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
         if classname:
           yield Test(classname=classname), target
 
+  def _expected_duration(self, target):
+    duration = super(JUnitRun, self)._expected_duration(target)
+    if duration is None:
+      # Estimate targets without a recorded duration (e.g. new targets, or targets whose classes
+      # have moved between targets) from the recorded durations of their test classes.
+      class_durations = [self._recorded_durations.class_duration(test.classname)
+                         for test, _ in self._calculate_tests_from_targets([target])]
+      known = [d for d in class_durations if d is not None]
+      if known:
+        duration = sum(known)
+    return duration
+
   def _test_target_filter(self):
     def target_filter(target):
       return isinstance(target, JUnitTests)
@@ -559,6 +581,13 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
       msg = 'JUnitTests target must include a non-empty set of sources.'
       raise TargetDefinitionException(target, msg)
 
+  @property
+  def supports_concurrent_partitions(self):
+    # Coverage engines instrument and report on the classes of all partitions at once.
+    options = self.get_options()
+    return not (options.coverage or options.coverage_processor or
+                options.is_flagged('coverage_open'))
+
   def collect_files(self, output_dir, coverage):
     def files_iter():
       for dir_path, _, file_names in os.walk(output_dir):
@@ -5,10 +5,21 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
-import os
-import shutil
+import logging
+import multiprocessing
 
-from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_concurrent_creation
+
+
+logger = logging.getLogger(__name__)
+
+
+def _rebase_analysis(args):
+  """Rebases a single analysis file: a module-level function, so that it can run in a pool."""
+  parser, src_analysis, dst_analysis, rebase_mappings, java_home = args
+  # Work on a tmpfile next to the destination, for safety, and so that moving it is a rename.
+  with safe_concurrent_creation(dst_analysis) as tmp_analysis_file:
+    parser.rebase_from_path(src_analysis, tmp_analysis_file, rebase_mappings, java_home)
 
 
 class AnalysisTools(object):
@@ -16,37 +27,60 @@ class AnalysisTools(object):
   _PANTS_BUILDROOT_PLACEHOLDER = b'/_PANTS_BUILDROOT_PLACEHOLDER'
   _PANTS_WORKDIR_PLACEHOLDER = b'/_PANTS_WORKDIR_PLACEHOLDER'
 
-  def __init__(self, java_home, parser, analysis_cls, pants_buildroot, pants_workdir):
+  # Below this number of analysis files to rebase, a pool of processes costs more than it saves.
+  MIN_ANALYSES_FOR_POOL = 4
+
+  def __init__(self, java_home, parser, analysis_cls, pants_buildroot, pants_workdir, workers=None):
+    """
+    :param int workers: The number of processes to rebase batches of analysis files on; defaults
+                        to the number of cpus.
+    """
     self.parser = parser
     self._java_home = java_home
     self._pants_buildroot = pants_buildroot.encode('utf-8')
     self._pants_workdir = pants_workdir.encode('utf-8')
     self._analysis_cls = analysis_cls
+    self._workers = workers or multiprocessing.cpu_count()
     self.rebase_mappings = {self._pants_workdir: self._PANTS_WORKDIR_PLACEHOLDER,
                             self._pants_buildroot: self._PANTS_BUILDROOT_PLACEHOLDER}
     self.localize_mappings = {v:k for k, v in self.rebase_mappings.items()}
 
-  def relativize(self, src_analysis, relativized_analysis):
-    with temporary_dir() as tmp_analysis_dir:
-      tmp_analysis_file = os.path.join(tmp_analysis_dir, 'analysis.relativized')
+  def _relativize_args(self, src_analysis, relativized_analysis):
+    # NOTE: We can't port references to deps on the Java home. This is because different JVM
+    # implementations on different systems have different structures, and there's not
+    # necessarily a 1-1 mapping between Java jars on different systems. Instead we simply
+    # drop those references from the analysis file.
+    #
+    # In practice the JVM changes rarely, and it should be fine to require a full rebuild
+    # in those rare cases.
+    return (self.parser, src_analysis, relativized_analysis, self.rebase_mappings, self._java_home)
 
-      # NOTE: We can't port references to deps on the Java home. This is because different JVM
-      # implementations on different systems have different structures, and there's not
-      # necessarily a 1-1 mapping between Java jars on different systems. Instead we simply
-      # drop those references from the analysis file.
-      #
-      # In practice the JVM changes rarely, and it should be fine to require a full rebuild
-      # in those rare cases.
-      # Work on a tmpfile, for safety.
-      self.parser.rebase_from_path(src_analysis, tmp_analysis_file, self.rebase_mappings, self._java_home)
+  def _localize_args(self, src_analysis, localized_analysis):
+    return (self.parser, src_analysis, localized_analysis, self.localize_mappings, None)
 
-      shutil.move(tmp_analysis_file, relativized_analysis)
+  def _rebase_all(self, rebase_args):
+    if self._workers > 1 and len(rebase_args) >= self.MIN_ANALYSES_FOR_POOL:
+      logger.debug('Rebasing {} analysis files on {} processes.'
+                   .format(len(rebase_args), self._workers))
+      pool = multiprocessing.Pool(min(self._workers, len(rebase_args)))
+      try:
+        pool.map(_rebase_analysis, rebase_args, chunksize=1)
+      finally:
+        pool.close()
+        pool.join()
+    else:
+      for args in rebase_args:
+        _rebase_analysis(args)
+
+  def relativize(self, src_analysis, relativized_analysis):
+    _rebase_analysis(self._relativize_args(src_analysis, relativized_analysis))
 
   def localize(self, src_analysis, localized_analysis):
-    with temporary_dir() as tmp_analysis_dir:
-      tmp_analysis_file = os.path.join(tmp_analysis_dir, 'analysis')
+    _rebase_analysis(self._localize_args(src_analysis, localized_analysis))
 
-      # Work on a tmpfile, for safety.
-      self.parser.rebase_from_path(src_analysis, tmp_analysis_file, self.localize_mappings)
+  def localize_all(self, analyses):
+    """Localizes many analysis files, in parallel if there are enough of them.
 
-      shutil.move(tmp_analysis_file, localized_analysis)
+    :param analyses: An iterable of (src_analysis, localized_analysis) path pairs.
+    """
+    self._rebase_all([self._localize_args(src, dst) for src, dst in analyses])
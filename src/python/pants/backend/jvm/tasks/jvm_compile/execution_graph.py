@@ -5,6 +5,7 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import json
 import Queue as queue
 import threading
 import traceback
@@ -12,6 +13,7 @@ from collections import defaultdict, deque
 from heapq import heappop, heappush
 
 from pants.base.worker_pool import Work
+from pants.util.dirutil import safe_concurrent_creation, safe_mkdir_for
 
 
 class Job(object):
@@ -21,7 +23,7 @@ class Job(object):
   keys of its dependent jobs.
   """
 
-  def __init__(self, key, fn, dependencies, size=0, on_success=None, on_failure=None):
+  def __init__(self, key, fn, dependencies, size=0, on_success=None, on_failure=None, memory=0):
     """
 
     :param key: Key used to reference and look up jobs
@@ -31,13 +33,16 @@ class Job(object):
     :param on_success: Zero parameter callback to run if job completes successfully. Run on main
                        thread.
     :param on_failure: Zero parameter callback to run if job completes successfully. Run on main
-                       thread."""
+                       thread.
+    :param memory: Estimated memory used by the job while it runs, in the same units as the
+                   ExecutionGraph's memory budget."""
     self.key = key
     self.fn = fn
     self.dependencies = dependencies
     self.size = size
     self.on_success = on_success
     self.on_failure = on_failure
+    self.memory = memory
 
   def __call__(self):
     self.fn()
@@ -138,13 +143,81 @@ class ThreadSafeCounter(object):
     with self.lock:
       return self._counter
 
-  def increment(self):
+  def increment(self, amount=1):
     with self.lock:
-      self._counter += 1
+      self._counter += amount
 
-  def decrement(self):
+  def decrement(self, amount=1):
     with self.lock:
-      self._counter -= 1
+      self._counter -= amount
+
+
+class JobDurationHistory(object):
+  """Durations of jobs in previous runs, used to estimate the sizes of jobs in the next run.
+
+  Durations are persisted as json, keyed by job key, as a moving average of recent runs. Jobs
+  without history are estimated from their static size, scaled by the average duration per unit
+  of static size of the jobs with history, so that both kinds of estimate are comparable.
+  """
+
+  # The weight of the latest duration of a job in its moving average.
+  _WEIGHT = 0.5
+
+  def __init__(self, path):
+    """
+    :param str path: The path of the json file to load and save durations at.
+    """
+    self._path = path
+    self._lock = threading.Lock()
+    self._durations = self._load()
+    # Running totals over all of the durations, for estimating jobs without history.
+    self._total_size = sum(entry['size'] for entry in self._durations.values())
+    self._total_duration = sum(entry['duration'] for entry in self._durations.values())
+
+  def _load(self):
+    try:
+      with open(self._path, 'r') as fp:
+        durations = json.load(fp)
+    except (IOError, ValueError):
+      return {}
+    if not isinstance(durations, dict):
+      return {}
+    return durations
+
+  def save(self):
+    safe_mkdir_for(self._path)
+    with self._lock:
+      with safe_concurrent_creation(self._path) as tmp_path:
+        with open(tmp_path, 'w') as fp:
+          json.dump(self._durations, fp)
+
+  def record(self, key, size, duration):
+    """Record the duration in seconds of a job with the given static size estimate.
+
+    Safe to call from multiple threads.
+    """
+    with self._lock:
+      previous = self._durations.get(key)
+      if previous:
+        duration = self._WEIGHT * duration + (1 - self._WEIGHT) * previous['duration']
+        self._total_size -= previous['size']
+        self._total_duration -= previous['duration']
+      self._durations[key] = {'size': size, 'duration': duration}
+      self._total_size += size
+      self._total_duration += duration
+
+  def estimate(self, key, size):
+    """Returns the estimated duration of a job, or its static size if no durations are known.
+
+    :param key: The key of the job.
+    :param size: The static size estimate of the job.
+    """
+    with self._lock:
+      if key in self._durations:
+        return self._durations[key]['duration']
+      if self._total_size <= 0:
+        return size
+      return size * self._total_duration / self._total_size
 
 
 class ExecutionGraph(object):
@@ -154,11 +227,14 @@ class ExecutionGraph(object):
   global execution graph.
   """
 
-  def __init__(self, job_list):
+  def __init__(self, job_list, memory_budget=None):
     """
 
     :param job_list Job: list of Jobs to schedule and run.
+    :param memory_budget: The maximum total memory of jobs to run concurrently, or None for no
+                          limit. A job that exceeds the budget on its own is run alone.
     """
+    self._memory_budget = memory_budget
     self._dependencies = defaultdict(list)
     self._dependees = defaultdict(list)
     self._jobs = {}
@@ -253,6 +329,12 @@ class ExecutionGraph(object):
 
     heap = []
     jobs_in_flight = ThreadSafeCounter()
+    memory_in_flight = ThreadSafeCounter()
+
+    def fits_memory_budget(job):
+      if self._memory_budget is None or jobs_in_flight.get() == 0:
+        return True
+      return memory_in_flight.get() + job.memory <= self._memory_budget
 
     def put_jobs_into_heap(job_keys):
       for job_key in job_keys:
@@ -266,14 +348,24 @@ class ExecutionGraph(object):
           result = (worker_key, SUCCESSFUL, None)
         except Exception as e:
           result = (worker_key, FAILED, e)
-        finished_queue.put(result)
+        # Release the worker's resources before reporting the result, so that the main thread can
+        # immediately submit more work when it sees the result.
+        memory_in_flight.decrement(work.memory)
         jobs_in_flight.decrement()
+        finished_queue.put(result)
 
       while len(heap) > 0 and jobs_in_flight.get() < pool.num_workers:
-        priority, job_key = heappop(heap)
+        priority, job_key = heap[0]
+        job = self._jobs[job_key]
+        # Jobs are started strictly in priority order: rather than backfilling with smaller
+        # jobs, wait for memory to free up for the most critical job.
+        if not fits_memory_budget(job):
+          break
+        heappop(heap)
+        memory_in_flight.increment(job.memory)
         jobs_in_flight.increment()
         status_table.mark_queued(job_key)
-        pool.submit_async_work(Work(worker, [(job_key, (self._jobs[job_key]))]))
+        pool.submit_async_work(Work(worker, [(job_key, job)]))
 
     def submit_jobs(job_keys):
       put_jobs_into_heap(job_keys)
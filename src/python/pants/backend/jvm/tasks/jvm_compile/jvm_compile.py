@@ -8,6 +8,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import functools
 import hashlib
 import os
+import re
 from collections import defaultdict
 from multiprocessing import cpu_count
 
@@ -25,7 +26,7 @@ from pants.backend.jvm.tasks.jvm_compile.class_not_found_error_patterns import \
   CLASS_NOT_FOUND_ERROR_PATTERNS
 from pants.backend.jvm.tasks.jvm_compile.compile_context import CompileContext, DependencyContext
 from pants.backend.jvm.tasks.jvm_compile.execution_graph import (ExecutionFailure, ExecutionGraph,
-                                                                 Job)
+                                                                 Job, JobDurationHistory)
 from pants.backend.jvm.tasks.jvm_compile.missing_dependency_finder import (CompileErrorExtractor,
                                                                            MissingDependencyFinder)
 from pants.backend.jvm.tasks.jvm_dependency_analyzer import JvmDependencyAnalyzer
@@ -169,6 +170,20 @@ class JvmCompile(NailgunTaskBase):
                   'constraints). Choose \'random\' to choose random sizes for each target, which '
                   'may be useful for distributed builds.')
 
+    register('--learn-job-durations', advanced=True, type=bool, default=True,
+             help='Prioritize targets by their compile durations in previous runs, recorded in '
+                  'the workdir, rather than by the --size-estimator alone. Targets on the critical '
+                  'path of the build are then started first, which avoids idle workers at the '
+                  'end of large compiles.')
+
+    register('--worker-memory-budget-mb', advanced=True, type=int, default=None,
+             help='The total memory in megabytes that concurrently running compiles may use. '
+                  'Each compile is assumed to use the maximum heap size (-Xmx) in --jvm-options '
+                  'when run as a subprocess (i.e. with --no-use-nailgun), and compiles that would '
+                  'exceed the budget wait for running compiles to finish. With nailgun, the '
+                  'servers of the --nailgun-pool-size must fit in the budget instead. Unlimited '
+                  'by default.')
+
     register('--capture-log', advanced=True, type=bool,
              fingerprint=True,
              help='Capture compilation output to per-target logs.')
@@ -375,6 +390,10 @@ class JvmCompile(NailgunTaskBase):
     self._worker_count = worker_count
 
     self._size_estimator = self.size_estimator_by_name(self.get_options().size_estimator)
+    self._job_duration_history = (
+      JobDurationHistory(os.path.join(self.workdir, 'job_durations.json'))
+      if self.get_options().learn_job_durations else None
+    )
 
     self._analysis_tools = self.create_analysis_tools()
 
@@ -550,11 +569,14 @@ class JvmCompile(NailgunTaskBase):
                                      invalid_targets,
                                      invalidation_check.invalid_vts)
 
-    exec_graph = ExecutionGraph(jobs)
+    exec_graph = ExecutionGraph(jobs, memory_budget=self.get_options().worker_memory_budget_mb)
     try:
       exec_graph.execute(worker_pool, self.context.log)
     except ExecutionFailure as e:
       raise TaskError("Compilation failure: {}".format(e))
+    finally:
+      if self._job_duration_history:
+        self._job_duration_history.save()
 
   def _record_compile_classpath(self, classpath, targets, outdir):
     relative_classpaths = [fast_relpath(path, self.get_options().pants_workdir) for path in classpath]
@@ -675,10 +697,12 @@ class JvmCompile(NailgunTaskBase):
   def check_artifact_cache(self, vts):
     """Localizes the fetched analysis for targets we found in the cache."""
     def post_process(cached_vts):
+      analyses = []
       for vt in cached_vts:
         cc = self._compile_context(vt.target, vt.results_dir)
         safe_delete(cc.analysis_file)
-        self._analysis_tools.localize(cc.portable_analysis_file, cc.analysis_file)
+        analyses.append((cc.portable_analysis_file, cc.analysis_file))
+      self._analysis_tools.localize_all(analyses)
     return self.do_check_artifact_cache(vts, post_process_cached_vts=post_process)
 
   def _create_empty_products(self):
@@ -845,6 +869,37 @@ class JvmCompile(NailgunTaskBase):
   def exec_graph_key_for_target(self, compile_target):
     return "compile({})".format(compile_target.address.spec)
 
+  _MAX_HEAP_RE = re.compile(r'^-Xmx(\d+)([kKmMgGtT]?)$')
+  _MAX_HEAP_UNIT_MB = {'': 1.0 / (1024 * 1024), 'k': 1.0 / 1024, 'm': 1, 'g': 1024,
+                       't': 1024 * 1024}
+
+  def _compile_job_memory_mb(self):
+    """Returns the estimated memory used by each compile job, for the worker memory budget.
+
+    With nailgun, compiles run in the long-lived servers of the nailgun pool, which together use up
+    to `--nailgun-pool-size` times the maximum heap size however many compiles run concurrently.
+    The budget must then cover the whole pool, and compiles use no additional memory per job.
+
+    :raises: :class:`pants.base.exceptions.TaskError` if the nailgun pool exceeds the budget.
+    """
+    budget_mb = self.get_options().worker_memory_budget_mb
+    if budget_mb is None:
+      return 0
+    max_heap_mb = 0
+    for jvm_option in self._jvm_options:
+      match = self._MAX_HEAP_RE.match(jvm_option)
+      if match:
+        # As with the JVM, the last -Xmx wins.
+        max_heap_mb = int(match.group(1)) * self._MAX_HEAP_UNIT_MB[match.group(2).lower()]
+    if not self.get_options().use_nailgun:
+      return max_heap_mb
+    pool_size = self.get_options().nailgun_pool_size
+    if pool_size * max_heap_mb > budget_mb:
+      raise TaskError('The {} nailgun server(s) of --nailgun-pool-size may use {}MB, which exceeds '
+                      'the --worker-memory-budget-mb of {}MB. Reduce the pool size or -Xmx, or '
+                      'raise the budget.'.format(pool_size, pool_size * max_heap_mb, budget_mb))
+    return 0
+
   def _create_compile_jobs(self, classpath_products, compile_contexts, extra_compile_time_classpath,
                            invalid_targets, invalid_vts):
     class Counter(object):
@@ -890,7 +945,7 @@ class JvmCompile(NailgunTaskBase):
         return True
       return os.path.exists(ctx.analysis_file)
 
-    def work_for_vts(vts, ctx):
+    def work_for_vts(vts, ctx, size):
       progress_message = ctx.target.address.spec
 
       # Capture a compilation log if requested.
@@ -944,6 +999,9 @@ class JvmCompile(NailgunTaskBase):
                                   len(ctx.sources),
                                   timer.elapsed,
                                   is_incremental)
+        if self._job_duration_history:
+          self._job_duration_history.record(self.exec_graph_key_for_target(tgt), size,
+                                            timer.elapsed)
         self._analysis_tools.relativize(ctx.analysis_file, ctx.portable_analysis_file)
 
         # Write any additional resources for this target to the target workdir.
@@ -961,6 +1019,7 @@ class JvmCompile(NailgunTaskBase):
 
     jobs = []
     invalid_target_set = set(invalid_targets)
+    job_memory = self._compile_job_memory_mb()
     for ivts in invalid_vts:
       # Invalidated targets are a subset of relevant targets: get the context for this one.
       compile_target = ivts.target
@@ -968,14 +1027,21 @@ class JvmCompile(NailgunTaskBase):
       invalid_dependencies = self._collect_invalid_compile_dependencies(compile_target,
                                                                         invalid_target_set)
 
-      jobs.append(Job(self.exec_graph_key_for_target(compile_target),
-                      functools.partial(work_for_vts, ivts, compile_context),
+      key = self.exec_graph_key_for_target(compile_target)
+      size = self._size_estimator(compile_context.sources)
+      if self._job_duration_history:
+        priority_size = self._job_duration_history.estimate(key, size)
+      else:
+        priority_size = size
+      jobs.append(Job(key,
+                      functools.partial(work_for_vts, ivts, compile_context, size),
                       [self.exec_graph_key_for_target(target) for target in invalid_dependencies],
-                      self._size_estimator(compile_context.sources),
+                      priority_size,
                       # If compilation and analysis work succeeds, validate the vts.
                       # Otherwise, fail it.
                       on_success=ivts.update,
-                      on_failure=ivts.force_invalidate))
+                      on_failure=ivts.force_invalidate,
+                      memory=job_memory))
     return jobs
 
   def _record_target_stats(self, target, classpath_len, sources_len, compiletime, is_incremental):
@@ -223,7 +223,8 @@ class BaseZincCompile(JvmCompile):
 
   def create_analysis_tools(self):
     return AnalysisTools(self.dist.real_home, ZincAnalysisParser(), ZincAnalysis,
-                         get_buildroot(), self.get_options().pants_workdir)
+                         get_buildroot(), self.get_options().pants_workdir,
+                         workers=self._worker_count)
 
   def javac_classpath(self):
     # Note that if this classpath is empty then Zinc will automatically use the javac from
@@ -345,7 +346,9 @@ class BaseZincCompile(JvmCompile):
                     jvm_options=jvm_options,
                     args=zinc_args,
                     workunit_name=self.name(),
-                    workunit_labels=[WorkUnitLabel.COMPILER]):
+                    workunit_labels=[WorkUnitLabel.COMPILER],
+                    # Compile each target in the same server, which keeps its analysis in memory.
+                    pool_key=analysis_file):
       raise TaskError('Zinc compile failed.')
 
   def _verify_zinc_classpath(self, classpath):
@@ -364,6 +367,9 @@ class BaseZincCompile(JvmCompile):
                         '(i.e. without ".." and "."). {} is not.'.format(path))
 
   def log_zinc_file(self, analysis_file):
+    # Hashing the analysis reads it in full, so only do so when it will be logged.
+    if self.get_options().level != 'debug':
+      return
     self.context.log.debug('Calling zinc on: {} ({})'
                            .format(analysis_file,
                                    hash_file(analysis_file).upper()
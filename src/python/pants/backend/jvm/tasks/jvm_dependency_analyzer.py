@@ -30,10 +30,17 @@ class JvmDependencyAnalyzer(object):
   determining which targets correspond to the actual source dependencies of any given target.
   """
 
+  # The length of the substrings of class names that `targets_for_class` indexes.
+  _NGRAM_LENGTH = 3
+
   def __init__(self, buildroot, runtime_classpath, product_deps_by_src):
     self.buildroot = buildroot
     self.runtime_classpath = runtime_classpath
     self.product_deps_by_src = product_deps_by_src
+    # An index of the classes provided by the targets searched by `targets_for_class` so far: the
+    # joined class names of each target, and the targets whose class names contain each ngram.
+    self._joined_classes_by_target = {}
+    self._targets_by_ngram = defaultdict(set)
 
   @memoized_method
   def files_for_target(self, target):
@@ -80,15 +87,38 @@ class JvmDependencyAnalyzer(object):
     return targets_by_file
 
   def targets_for_class(self, target, classname):
-    """Search which targets from `target`'s transitive dependencies contain `classname`."""
-    targets_with_class = set()
-    for target in target.closure():
-      for one_class in self._target_classes(target):
-        if classname in one_class:
-          targets_with_class.add(target)
-          break
-
-    return targets_with_class
+    """Search which targets from `target`'s transitive dependencies contain `classname`.
+
+    A target contains `classname` if it provides any class whose name contains it.
+    """
+    closure = set(target.closure())
+    self._index_classes(closure)
+
+    # Only the targets providing every ngram of the classname can contain it, so narrow the closure
+    # down to those, starting from the rarest ngram, before searching their class names.
+    candidates = closure
+    ngram_targets = (self._targets_by_ngram.get(ngram, ()) for ngram in self._ngrams(classname))
+    for targets in sorted(ngram_targets, key=len):
+      candidates = candidates.intersection(targets)
+      if not candidates:
+        break
+
+    return set(t for t in candidates if classname in self._joined_classes_by_target[t])
+
+  @classmethod
+  def _ngrams(cls, string):
+    return set(string[i:i + cls._NGRAM_LENGTH]
+               for i in range(len(string) - cls._NGRAM_LENGTH + 1))
+
+  def _index_classes(self, targets):
+    """Adds the classes of any of the given targets not already indexed to the class index."""
+    for target in targets:
+      if target not in self._joined_classes_by_target:
+        # Class names can't contain newlines, so a match in the joined names is within one class.
+        joined_classes = '\n'.join(self._target_classes(target))
+        self._joined_classes_by_target[target] = joined_classes
+        for ngram in self._ngrams(joined_classes):
+          self._targets_by_ngram[ngram].add(target)
 
   @memoized_method
   def _target_classes(self, target):
@@ -6,6 +6,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+from hashlib import sha1
 
 from pants.backend.jvm.tasks.jvm_tool_task_mixin import JvmToolTaskMixin
 from pants.base.exceptions import TaskError
@@ -29,6 +30,10 @@ class NailgunTaskBase(JvmToolTaskMixin, TaskBase):
              help='Timeout (secs) for nailgun startup.')
     register('--nailgun-connect-attempts', advanced=True, default=5, type=int,
              help='Max attempts for nailgun connects.')
+    register('--nailgun-pool-size', advanced=True, default=1, type=int,
+             help='The number of nailgun servers to run this task in. Invocations with a pool key '
+                  '(e.g. compiles, which are keyed by target) always run in the same server, so '
+                  'that the state each server keeps in memory for a key stays warm.')
     cls.register_jvm_tool(register,
                           'nailgun-server',
                           classpath=[
@@ -53,15 +58,28 @@ class NailgunTaskBase(JvmToolTaskMixin, TaskBase):
     self._executor_workdir = os.path.join(self.context.options.for_global_scope().pants_workdir,
                                           *id_tuple)
 
-  def create_java_executor(self):
+  def _pooled_identity_and_workdir(self, pool_key):
+    pool_size = self.get_options().nailgun_pool_size
+    if pool_size <= 1:
+      return self._identity, self._executor_workdir
+    # NB: The index must be stable across runs, so that each server keeps warm state for its keys.
+    index = int(sha1((pool_key or '').encode('utf-8')).hexdigest(), 16) % pool_size
+    return ('{}_{}'.format(self._identity, index),
+            os.path.join(self._executor_workdir, str(index)))
+
+  def create_java_executor(self, pool_key=None):
     """Create java executor that uses this task's ng daemon, if allowed.
 
     Call only in execute() or later. TODO: Enforce this.
+
+    :param str pool_key: When `--nailgun-pool-size` is more than 1, selects the nailgun server of
+                         the pool to use: the same key always selects the same server.
     """
     if self.get_options().use_nailgun:
       classpath = os.pathsep.join(self.tool_classpath('nailgun-server'))
-      return NailgunExecutor(self._identity,
-                             self._executor_workdir,
+      identity, workdir = self._pooled_identity_and_workdir(pool_key)
+      return NailgunExecutor(identity,
+                             workdir,
                              classpath,
                              self.dist,
                              connect_timeout=self.get_options().nailgun_timeout_seconds,
@@ -70,16 +88,17 @@ class NailgunTaskBase(JvmToolTaskMixin, TaskBase):
       return SubprocessExecutor(self.dist)
 
   def runjava(self, classpath, main, jvm_options=None, args=None, workunit_name=None,
-              workunit_labels=None, workunit_log_config=None):
+              workunit_labels=None, workunit_log_config=None, pool_key=None):
     """Runs the java main using the given classpath and args.
 
     If --no-use-nailgun is specified then the java main is run in a freshly spawned subprocess,
     otherwise a persistent nailgun server dedicated to this Task subclass is used to speed up
-    amortized run times.
+    amortized run times. With a `--nailgun-pool-size` of more than 1, the server of the pool is
+    selected by `pool_key`.
 
     :API: public
     """
-    executor = self.create_java_executor()
+    executor = self.create_java_executor(pool_key=pool_key)
 
     # Creating synthetic jar to work around system arg length limit is not necessary
     # when `NailgunExecutor` is used because args are passed through socket, therefore turning off
@@ -7,7 +7,10 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import os
 import re
+import shutil
+import tempfile
 from collections import defaultdict
+from itertools import islice
 
 import six
 from six.moves import range
@@ -23,6 +26,12 @@ class ZincAnalysisParser(object):
   class ParseError(Exception):
     pass
 
+  # The number of lines to rebase and write at a time.
+  _REBASE_CHUNK_LINES = 10000
+
+  # The number of bytes of a section to hold in memory while rebasing it before spooling it to disk.
+  _REBASE_SPOOL_BYTES = 16 * 1024 * 1024
+
   def parse_from_path(self, infile_path):
     """Parse a ZincAnalysis instance from a text file."""
     with open(infile_path, 'rb') as infile:
@@ -122,8 +131,41 @@ class ZincAnalysisParser(object):
     if header + b':\n' != line:
       raise self.ParseError('Expected: "{}:". Found: "{}"'.format(header, line))
     n = self._parse_num_items(next(lines_iter))
-
-    # Iterate over the lines, applying rebasing/dropping logic as required.
+    lines_per_item = 1 if cls.inline_vals else 2
+
+    if not (filter_java_home_anywhere or filter_java_home_prefix):
+      outfile.write(header + b':\n')
+      outfile.write(b'{} items\n'.format(n))
+      if not rebase_pants_home_prefix and (cls.inline_vals or not rebase_pants_home_anywhere):
+        # No lines are dropped, and any rebasing applies anywhere in a line, so the lines can be
+        # rebased and written in bulk without splitting them into items.
+        for lines in self._iter_line_chunks(lines_iter, n * lines_per_item):
+          chunk = b''.join(lines)
+          if rebase_pants_home_anywhere:
+            for rebased_from, rebased_to in rebase_mappings:
+              chunk = chunk.replace(rebased_from, rebased_to)
+          outfile.write(chunk)
+      else:
+        self._rebase_items(cls, lines_iter, n, outfile, rebase_mappings,
+                           rebase_pants_home_anywhere, rebase_pants_home_prefix)
+      return
+
+    # Lines may be dropped, so the item count that precedes them is only known once they have all
+    # been rebased: spool them, to disk if they are large.
+    with tempfile.SpooledTemporaryFile(max_size=self._REBASE_SPOOL_BYTES) as spool:
+      num_rebased_items = self._rebase_items(cls, lines_iter, n, spool, rebase_mappings,
+                                             rebase_pants_home_anywhere, rebase_pants_home_prefix,
+                                             java_home, filter_java_home_anywhere,
+                                             filter_java_home_prefix)
+      outfile.write(header + b':\n')
+      outfile.write(b'{} items\n'.format(num_rebased_items))
+      spool.seek(0)
+      shutil.copyfileobj(spool, outfile)
+
+  def _rebase_items(self, cls, lines_iter, n, outfile, rebase_mappings,
+                    rebase_pants_home_anywhere, rebase_pants_home_prefix,
+                    java_home=None, filter_java_home_anywhere=False, filter_java_home_prefix=False):
+    """Rebases the n items of a section item by item, and returns the number of items kept."""
     rebased_lines = []
     num_rebased_items = 0
     for _ in range(n):
@@ -147,12 +189,23 @@ class ZincAnalysisParser(object):
       elif not cls.inline_vals:
         next(lines_iter)  # Also drop the non-inline value.
 
-    # Write the rebased lines back out.
-    outfile.write(header + b':\n')
-    outfile.write(b'{} items\n'.format(num_rebased_items))
-    chunk_size = 10000
-    for i in range(0, len(rebased_lines), chunk_size):
-      outfile.write(b''.join(rebased_lines[i:i+chunk_size]))
+      # Write the rebased lines out as we go, rather than holding the whole section in memory.
+      if len(rebased_lines) >= self._REBASE_CHUNK_LINES:
+        outfile.write(b''.join(rebased_lines))
+        del rebased_lines[:]
+    outfile.write(b''.join(rebased_lines))
+    return num_rebased_items
+
+  def _iter_line_chunks(self, lines_iter, num_lines):
+    """Yields lists of up to _REBASE_CHUNK_LINES lines, for a total of num_lines lines."""
+    remaining = num_lines
+    while remaining > 0:
+      lines = list(islice(lines_iter, min(remaining, self._REBASE_CHUNK_LINES)))
+      if not lines:
+        # NB: A StopIteration raised here would silently end this generator instead.
+        raise self.ParseError('Unexpected end-of-file: expected {} more lines.'.format(remaining))
+      remaining -= len(lines)
+      yield lines
 
   def _find_repeated_at_header(self, lines_iter, header):
     header_line = header + b':\n'
@@ -0,0 +1,118 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import json
+import logging
+import os
+import threading
+
+from pants.base.file_digest_cache import FileDigestCache
+from pants.base.hash_utils import hash_file
+from pants.util.dirutil import safe_concurrent_creation, safe_mkdir_for
+
+
+logger = logging.getLogger(__name__)
+
+
+class CoverageSelectionIndex(object):
+  """A persistent index from each passing test to the source files it executed.
+
+  Tests are identified by their pytest node ids, with the path of the test file relative to the
+  buildroot, e.g. `tests/python/foo/test_bar.py::BarTest::test_baz`. Each test is indexed with the
+  digests its covered files had when it last passed, and a fingerprint of the context it ran in
+  that coverage can't measure, e.g. its resolved requirements and resources: a test is unaffected,
+  and need not be run again, while its context and all of those files are unchanged.
+
+  Failing and skipped tests are dropped from the index, so that they are always run until they
+  pass.
+  """
+
+  def __init__(self, path, root_dir):
+    """
+    :param str path: The path of the json file to persist the index in.
+    :param str root_dir: The directory that the paths of covered files are relative to.
+    """
+    self._path = path
+    self._root_dir = root_dir
+    self._lock = threading.Lock()
+    self._tests = None
+    self._dirty = False
+    self._digests = {}
+
+  def _load(self):
+    if self._tests is None:
+      try:
+        with open(self._path, 'r') as fp:
+          self._tests = dict(json.load(fp))
+      except (IOError, ValueError, TypeError) as e:
+        if not isinstance(e, IOError):
+          logger.warn('Ignoring unreadable test coverage index {}: {}'.format(self._path, e))
+        self._tests = {}
+    return self._tests
+
+  def _digest(self, relpath):
+    # Files are digested at most once per run: a run's tests are selected against, and recorded
+    # with, a single snapshot of the sources.
+    digest = self._digests.get(relpath)
+    if digest is None:
+      path = os.path.join(self._root_dir, relpath)
+      if not os.path.isfile(path):
+        digest = ''
+      else:
+        digest_cache = FileDigestCache.global_instance()
+        digest = digest_cache.digest(path) if digest_cache else hash_file(path)
+      self._digests[relpath] = digest
+    return digest
+
+  def _is_unaffected(self, entry, context):
+    # Entries of an unexpected shape, e.g. from an older format of the index, are affected.
+    return (isinstance(entry, dict) and entry.get('context') == context and
+            all(self._digest(relpath) == digest for relpath, digest in entry['files'].items()))
+
+  def unaffected_tests(self, test_files, context):
+    """Returns the indexed tests in the given test files whose context and covered files are
+    unchanged.
+
+    :param test_files: The paths of test files relative to the root dir.
+    :param str context: The fingerprint of the context the tests will run in.
+    :returns: A set of test node ids.
+    """
+    test_files = set(test_files)
+    with self._lock:
+      return {nodeid for nodeid, entry in self._load().items()
+              if nodeid.split('::', 1)[0] in test_files and self._is_unaffected(entry, context)}
+
+  def record(self, nodeid, covered_files, context):
+    """Records that the given test passed in the given context having executed the given files.
+
+    :param str nodeid: The node id of the test.
+    :param covered_files: The paths of the files the test executed relative to the root dir.
+    :param str context: The fingerprint of the context the test ran in.
+    """
+    with self._lock:
+      self._load()[nodeid] = {
+        'context': context,
+        'files': {relpath: self._digest(relpath) for relpath in covered_files},
+      }
+      self._dirty = True
+
+  def forget(self, nodeid):
+    """Drops the given test from the index, so that it is selected by future runs."""
+    with self._lock:
+      if self._load().pop(nodeid, None) is not None:
+        self._dirty = True
+
+  def save(self):
+    """Persists the index, if it was modified."""
+    with self._lock:
+      if not self._dirty:
+        return
+      safe_mkdir_for(self._path)
+      with safe_concurrent_creation(self._path) as tmp_path:
+        with open(tmp_path, 'w') as fp:
+          json.dump(self._tests, fp, sort_keys=True)
+      self._dirty = False
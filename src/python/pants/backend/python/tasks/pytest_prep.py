@@ -12,6 +12,7 @@ from pex.pex_info import PexInfo
 
 from pants.backend.python.subsystems.pytest import PyTest
 from pants.backend.python.tasks.python_execution_task_base import PythonExecutionTaskBase
+from pants.python.forked_worker_pool import ForkedWorkerPool
 
 
 class PytestPrep(PythonExecutionTaskBase):
@@ -21,6 +22,7 @@ class PytestPrep(PythonExecutionTaskBase):
     """A `py.test` PEX binary with an embedded default (empty) `pytest.ini` config file."""
 
     _COVERAGE_PLUGIN_MODULE_NAME = '__{}__'.format(__name__.replace('.', '_'))
+    _ZYGOTE_MODULE_NAME = '__{}_zygote__'.format(__name__.replace('.', '_'))
 
     def __init__(self, pex):
       self._pex = pex
@@ -49,9 +51,17 @@ class PytestPrep(PythonExecutionTaskBase):
       """
       return cls._COVERAGE_PLUGIN_MODULE_NAME
 
+    @classmethod
+    def zygote_module(cls):
+      """Return the name of the forked worker zygote module embedded in this py.test binary.
+
+      :rtype: str
+      """
+      return cls._ZYGOTE_MODULE_NAME
+
   @classmethod
   def implementation_version(cls):
-    return super(PytestPrep, cls).implementation_version() + [('PytestPrep', 2)]
+    return super(PytestPrep, cls).implementation_version() + [('PytestPrep', 3)]
 
   @classmethod
   def product_types(cls):
@@ -68,6 +78,8 @@ class PytestPrep(PythonExecutionTaskBase):
     yield self.ExtraFile.empty('pytest.ini')
     yield self.ExtraFile(path='{}.py'.format(self.PytestBinary.coverage_plugin_module()),
                          content=pkg_resources.resource_string(__name__, 'coverage/plugin.py'))
+    yield self.ExtraFile(path='{}.py'.format(self.PytestBinary.zygote_module()),
+                         content=ForkedWorkerPool.zygote_source())
 
   def execute(self):
     pex_info = PexInfo.default()
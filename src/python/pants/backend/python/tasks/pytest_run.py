@@ -16,25 +16,32 @@ from collections import OrderedDict
 from contextlib import contextmanager
 from textwrap import dedent
 
+from pex.interpreter import PythonInterpreter
+from pex.pex_info import PexInfo
 from six import StringIO
 from six.moves import configparser
 
 from pants.backend.python.targets.python_tests import PythonTests
+from pants.backend.python.tasks.coverage_selection import CoverageSelectionIndex
 from pants.backend.python.tasks.gather_sources import GatherSources
 from pants.backend.python.tasks.pytest_prep import PytestPrep
+from pants.backend.python.tasks.resolve_requirements import ResolveRequirements
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import ErrorWhileTesting, TaskError
 from pants.base.fingerprint_strategy import DefaultFingerprintStrategy
-from pants.base.hash_utils import Sharder
+from pants.base.hash_utils import Sharder, hash_all, stable_json_hash
 from pants.base.workunit import WorkUnitLabel
+from pants.build_graph.files import Files
+from pants.build_graph.resources import Resources
 from pants.build_graph.target import Target
+from pants.python.forked_worker_pool import ForkedWorkerPool
 from pants.task.task import Task
 from pants.task.testrunner_task_mixin import PartitionedTestRunnerTaskMixin, TestResult
-from pants.util.contextutil import environment_as, pushd, temporary_dir, temporary_file
+from pants.util.contextutil import environment_as, temporary_dir, temporary_file
 from pants.util.dirutil import mergetree, safe_mkdir, safe_mkdir_for
 from pants.util.memo import memoized_method, memoized_property
 from pants.util.objects import datatype
-from pants.util.process_handler import SubprocessProcessHandler
+from pants.util.process_handler import SubprocessProcessHandler, subprocess
 from pants.util.xml_parser import XmlParser
 
 
@@ -70,6 +77,12 @@ class _Workdirs(datatype('_Workdirs', ['root_dir', 'partition'])):
     return list(files_iter())
 
 
+class _CoverageSelection(datatype('_CoverageSelection',
+                                   ['unaffected_path', 'covered_path', 'context'])):
+  """The files used to communicate with the pytest plugin that selects tests by coverage, and the
+  fingerprint of the context the tests run in."""
+
+
 class PytestResult(TestResult):
   _SUCCESS_EXIT_CODES = (
     0,
@@ -125,6 +138,26 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
              help='Subset of tests to run, in the form M/N, 0 <= M < N. For example, 1/3 means '
                   'run tests number 2, 5, 8, 11, ...')
 
+    register('--select-by-coverage', type=bool, advanced=True, fingerprint=True,
+             help='Record the source files that each passing test executes, and when re-running a '
+                  'test target only run its new and previously failing tests, and those that '
+                  'executed a file that has since changed. Ignored with --coverage, which measures '
+                  'coverage for the whole run instead.')
+
+    register('--warm-workers', type=bool, advanced=True,
+             help='Run py.test in processes forked from a warm zygote process, which has already '
+                  'started the interpreter and imported py.test, its plugins and any '
+                  '--warm-workers-preload modules, rather than in fresh processes. Zygotes are '
+                  'shared by the partitions and runs that use the same interpreter and '
+                  'requirements, and are owned by pantsd when it is enabled. Ignored with '
+                  '--coverage, --profile or --pdb.')
+    register('--warm-workers-preload', type=list, advanced=True,
+             help='Modules for warm worker zygotes to import before forking, e.g. heavy third '
+                  'party requirements of the tests. These must not be modules of the tested '
+                  'targets themselves, which may change between runs.')
+    register('--warm-workers-idle-timeout', type=int, default=600, advanced=True,
+             help='The number of seconds after its last fork that a warm worker zygote exits.')
+
   @classmethod
   def supports_passthru_args(cls):
     return True
@@ -133,6 +166,8 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
   def prepare(cls, options, round_manager):
     super(PytestRun, cls).prepare(options, round_manager)
     round_manager.require_data(PytestPrep.PytestBinary)
+    if options.select_by_coverage:
+      round_manager.require_data(ResolveRequirements.REQUIREMENTS_PEX)
 
   def _test_target_filter(self):
     def target_filter(target):
@@ -173,6 +208,54 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
   def _debug(self):
     return self.get_options().level == 'debug'
 
+  @property
+  def _select_by_coverage(self):
+    return self.get_options().select_by_coverage and self.get_options().coverage is None
+
+  @memoized_property
+  def _coverage_selection_index(self):
+    return CoverageSelectionIndex(os.path.join(self.workdir, 'coverage_selection.json'),
+                                  get_buildroot())
+
+  def _coverage_selection_context(self, test_targets):
+    """Returns a fingerprint of the inputs of the given test targets that coverage can't measure.
+
+    These are the interpreter, the resolved requirements and the resources of the targets.
+    """
+    interpreter = self.context.products.get_data(PythonInterpreter)
+    requirements_pex = self.context.products.get_data(ResolveRequirements.REQUIREMENTS_PEX)
+    resources = sorted(target.compute_invalidation_hash()
+                       for target in Target.closure_for_targets(test_targets)
+                       if isinstance(target, (Files, Resources)))
+    return stable_json_hash(dict(interpreter=str(interpreter.identity),
+                                 requirements=PexInfo.from_pex(requirements_pex.path()).distributions,
+                                 resources=resources))
+
+  def _update_coverage_selection_index(self, coverage_selection, test_targets):
+    try:
+      with open(coverage_selection.covered_path, 'r') as fp:
+        covered = json.load(fp)
+    except (IOError, ValueError):
+      # Pytest failed before running any tests.
+      return
+
+    # Map the covered chrooted sources back to their paths relative to the buildroot.
+    source_chroot = os.path.realpath(self._source_chroot_path)
+    chroot_to_source = {}
+    for target in Target.closure_for_targets(test_targets):
+      if target.has_sources('.py'):
+        for src in target.sources_relative_to_source_root():
+          chroot_to_source[os.path.join(source_chroot, src)] = os.path.join(target.target_base, src)
+
+    index = self._coverage_selection_index
+    for nodeid, test in covered.items():
+      if test['passed']:
+        index.record(nodeid,
+                     [chroot_to_source[path] for path in test['files'] if path in chroot_to_source],
+                     coverage_selection.context)
+      else:
+        index.forget(nodeid)
+
   @staticmethod
   def _ensure_section(cp, section):
     if not cp.has_section(section):
@@ -336,22 +419,22 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
 
         # The '.coverage' data file is output in the CWD of the test run above; so we make sure to
         # look for it there.
-        with self._maybe_run_in_chroot():
-          # On failures or timeouts, the .coverage file won't be written.
-          if not os.path.exists('.coverage'):
-            self.context.log.warn('No .coverage file was found! Skipping coverage reporting.')
-          else:
-            coverage_run('report', ['-i', '--rcfile', coverage_rc])
+        # On failures or timeouts, the .coverage file won't be written.
+        if not os.path.exists(os.path.join(self._test_cwd, '.coverage')):
+          self.context.log.warn('No .coverage file was found! Skipping coverage reporting.')
+        else:
+          coverage_run('report', ['-i', '--rcfile', coverage_rc])
 
-            coverage_workdir = workdirs.coverage_path
-            coverage_run('html', ['-i', '--rcfile', coverage_rc, '-d', coverage_workdir])
+          coverage_workdir = workdirs.coverage_path
+          coverage_run('html', ['-i', '--rcfile', coverage_rc, '-d', coverage_workdir])
 
-            coverage_xml = os.path.join(coverage_workdir, 'coverage.xml')
-            coverage_run('xml', ['-i', '--rcfile', coverage_rc, '-o', coverage_xml])
+          coverage_xml = os.path.join(coverage_workdir, 'coverage.xml')
+          coverage_run('xml', ['-i', '--rcfile', coverage_rc, '-o', coverage_xml])
 
   def _get_shard_conftest_content(self):
     shard_spec = self.get_options().test_shard
-    if shard_spec is None:
+    if shard_spec is None or self._shard_by_durations:
+      # With --shard-by-durations, whole targets are sharded before pytest is run.
       return ''
 
     try:
@@ -382,7 +465,171 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
     except Sharder.InvalidShardSpec as e:
       raise self.InvalidShardSpecification(e)
 
-  def _get_conftest_content(self, sources_map, rootdir_comm_path):
+  def _get_coverage_selection_conftest_content(self, sources_map, coverage_selection):
+    # A conftest hook that deselects the tests the coverage selection index found unaffected, and
+    # records the files each test that does run executes. Tests are identified by their node ids
+    # with the chroot-based source paths replaced by the source tree-based ones, as in the console
+    # output above.
+    #
+    # Coverage only measures the code a test executes while it runs, but a test also depends on
+    # the code that ran when its module and conftests were imported during collection, which is
+    # executed only once per session, by whichever module imports it first. So the modules that
+    # each module imports are recorded from the start of the session, and every test is attributed
+    # the files of the modules that its module and the conftests transitively import.
+    return dedent("""
+
+      ### GENERATED BY PANTS ###
+
+      import json
+      import sys
+      import types
+      from collections import defaultdict
+
+      import coverage
+
+      try:
+        import builtins
+      except ImportError:
+        import __builtin__ as builtins
+
+
+      class ImportRecorder(object):
+        def __init__(self):
+          self._imports = defaultdict(set)
+          self._version = 0
+          self._files = {{}}
+          self._real_import = builtins.__import__
+
+        def install(self):
+          builtins.__import__ = self._import
+
+        def uninstall(self):
+          builtins.__import__ = self._real_import
+
+        def _import(self, name, globals=None, locals=None, fromlist=(), *args, **kwargs):
+          module = self._real_import(name, globals, locals, fromlist, *args, **kwargs)
+          importer = globals.get('__name__') if globals else None
+          if importer:
+            imported = [module]
+            if fromlist:
+              imported.extend(getattr(module, attr, None) for attr in fromlist)
+            else:
+              imported.append(sys.modules.get(name))
+            names = {{m.__name__ for m in imported if isinstance(m, types.ModuleType)}}
+            if not names.issubset(self._imports[importer]):
+              self._imports[importer].update(names)
+              self._version += 1
+          return module
+
+        def files(self, module_names):
+          # The source files of the given modules, and of all the modules they import.
+          key = (self._version, tuple(sorted(module_names)))
+          files = self._files.get(key)
+          if files is None:
+            seen = set()
+            pending = list(module_names)
+            while pending:
+              name = pending.pop()
+              if name in seen:
+                continue
+              seen.add(name)
+              pending.extend(self._imports.get(name, ()))
+              parent = name.rpartition('.')[0]
+              if parent:
+                pending.append(parent)
+            files = set()
+            for name in seen:
+              path = getattr(sys.modules.get(name), '__file__', None)
+              if path:
+                if path.endswith(('.pyc', '.pyo')):
+                  path = path[:-1]
+                path = os.path.realpath(path)
+                if path.startswith(_SOURCE_CHROOT):
+                  files.add(path)
+            self._files = {{key: files}}
+          return files
+
+
+      _SOURCE_CHROOT = {source_chroot!r}
+
+      # Installed as this conftest is loaded, before any tests are collected.
+      _IMPORT_RECORDER = ImportRecorder()
+      _IMPORT_RECORDER.install()
+
+
+      class CoverageSelectionPlugin(object):
+        _SOURCES_MAP = {sources_map!r}
+
+        def __init__(self, rootdir):
+          def rootdir_relative(path):
+            return os.path.relpath(path, rootdir)
+
+          self._sources_map = {{rootdir_relative(k): rootdir_relative(v)
+                                for k, v in self._SOURCES_MAP.items()}}
+          with open({unaffected_path!r}, 'r') as fp:
+            self._unaffected = set(json.load(fp))
+          self._covered = {{}}
+          self._not_passed = set()
+
+        def _stable_nodeid(self, nodeid):
+          path, sep, rest = nodeid.partition('::')
+          return self._sources_map.get(path, path) + sep + rest
+
+        def pytest_collection_modifyitems(self, session, config, items):
+          selected = []
+          deselected = []
+          for item in items:
+            if self._stable_nodeid(item.nodeid) in self._unaffected:
+              deselected.append(item)
+            else:
+              selected.append(item)
+          if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+
+        def _import_time_modules(self, item):
+          modules = [name for name in sys.modules
+                     if name == 'conftest' or name.endswith('.conftest')]
+          module = getattr(item, 'module', None)
+          if module is not None:
+            modules.append(module.__name__)
+          return modules
+
+        @pytest.hookimpl(hookwrapper=True)
+        def pytest_runtest_protocol(self, item, nextitem):
+          nodeid = self._stable_nodeid(item.nodeid)
+          cov = coverage.Coverage(config_file=False, include=[_SOURCE_CHROOT + '*'])
+          cov.start()
+          try:
+            yield
+          finally:
+            cov.stop()
+            files = set(cov.get_data().measured_files())
+            files.update(_IMPORT_RECORDER.files(self._import_time_modules(item)))
+            self._covered[nodeid] = sorted(files)
+
+        def pytest_runtest_logreport(self, report):
+          # Skipped tests must run again once whatever skipped them changes.
+          if report.failed or report.skipped:
+            self._not_passed.add(self._stable_nodeid(report.nodeid))
+
+        def pytest_sessionfinish(self, session, exitstatus):
+          _IMPORT_RECORDER.uninstall()
+          with open({covered_path!r}, 'w') as fp:
+            json.dump({{nodeid: {{'files': files, 'passed': nodeid not in self._not_passed}}
+                       for nodeid, files in self._covered.items()}}, fp)
+
+
+      def pytest_sessionstart(session):
+        rootdir = str(session.config.rootdir)
+        session.config.pluginmanager.register(CoverageSelectionPlugin(rootdir),
+                                              'pants_coverage_selection')
+    """.format(sources_map=dict(sources_map),
+               unaffected_path=coverage_selection.unaffected_path,
+               covered_path=coverage_selection.covered_path,
+               source_chroot=os.path.join(os.path.realpath(self._source_chroot_path), '')))
+
+  def _get_conftest_content(self, sources_map, rootdir_comm_path, coverage_selection=None):
     # A conftest hook to modify the console output, replacing the chroot-based
     # source paths with the source-tree based ones, which are more readable to the end user.
     # Note that python stringifies a dict to its source representation, so we can use sources_map
@@ -445,10 +692,17 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
     """.format(sources_map=dict(sources_map), rootdir_comm_path=rootdir_comm_path))
     # Add in the sharding conftest, if any.
     shard_conftest_content = self._get_shard_conftest_content()
-    return (console_output_conftest_content + shard_conftest_content).encode('utf8')
+    # And the coverage selection conftest, if selecting tests by coverage.
+    coverage_selection_conftest_content = ''
+    if coverage_selection:
+      coverage_selection_conftest_content = self._get_coverage_selection_conftest_content(
+        sources_map, coverage_selection)
+    return (console_output_conftest_content +
+            shard_conftest_content +
+            coverage_selection_conftest_content).encode('utf8')
 
   @contextmanager
-  def _conftest(self, sources_map):
+  def _conftest(self, sources_map, test_targets):
     """Creates a conftest.py to customize our pytest run."""
     # Note that it's important to put the tmpdir under the workdir, because pytest
     # uses all arguments that look like paths to compute its rootdir, and we want
@@ -460,26 +714,42 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
         with open(rootdir_comm_path, 'r') as fp:
           return fp.read()
 
+      coverage_selection = None
+      if self._select_by_coverage:
+        coverage_selection = _CoverageSelection(
+          unaffected_path=os.path.join(conftest_dir, 'unaffected_tests.json'),
+          covered_path=os.path.join(conftest_dir, 'covered_files.json'),
+          context=self._coverage_selection_context(test_targets))
+        unaffected = self._coverage_selection_index.unaffected_tests(sources_map.values(),
+                                                                     coverage_selection.context)
+        with open(coverage_selection.unaffected_path, 'w') as fp:
+          json.dump(sorted(unaffected), fp)
+
       conftest_content = self._get_conftest_content(sources_map,
-                                                    rootdir_comm_path=rootdir_comm_path)
+                                                    rootdir_comm_path=rootdir_comm_path,
+                                                    coverage_selection=coverage_selection)
 
       conftest = os.path.join(conftest_dir, 'conftest.py')
       with open(conftest, 'w') as fp:
         fp.write(conftest_content)
-      yield conftest, get_pytest_rootdir
+      yield conftest, get_pytest_rootdir, coverage_selection
 
   @contextmanager
   def _test_runner(self, workdirs, test_targets, sources_map):
     pytest_binary = self.context.products.get_data(PytestPrep.PytestBinary)
-    with self._conftest(sources_map) as (conftest, get_pytest_rootdir):
+    with self._conftest(sources_map, test_targets) as (conftest,
+                                                       get_pytest_rootdir,
+                                                       coverage_selection):
       with self._maybe_emit_coverage_data(workdirs,
                                           test_targets,
                                           pytest_binary.pex) as coverage_args:
-        yield pytest_binary, [conftest] + coverage_args, get_pytest_rootdir
+        yield pytest_binary, [conftest] + coverage_args, get_pytest_rootdir, coverage_selection
 
   def _do_run_tests_with_args(self, pex, args):
     try:
-      env = dict(os.environ)
+      # NB: Like `pex.run`, scrub variables that would reconfigure the pex from the environment.
+      env = {k: v for k, v in os.environ.items()
+             if not k.startswith('PEX_') and k != 'MACOSX_DEPLOYMENT_TARGET'}
 
       # Ensure we don't leak source files or undeclared 3rdparty requirements into the py.test PEX
       # environment.
@@ -507,7 +777,8 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
       with self.context.new_workunit(name='run',
                                      cmd=pex.cmdline(args),
                                      labels=[WorkUnitLabel.TOOL, WorkUnitLabel.TEST]) as workunit:
-        rc = self._spawn_and_wait(pex, workunit=workunit, args=args, setsid=True, env=env)
+        rc = self._spawn_and_wait(pex, workunit=workunit, args=args, setsid=True, env=env,
+                                  warm=True)
         return PytestResult.rc(rc)
     except ErrorWhileTesting:
       # _spawn_and_wait wraps the test runner in a timeout, so it could
@@ -584,7 +855,11 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
         args = (workdirs,)
         yield partition, args
 
-    yield iter_partitions_with_args
+    try:
+      yield iter_partitions_with_args
+    finally:
+      if self._select_by_coverage:
+        self._coverage_selection_index.save()
 
   # TODO(John Sirois): Its probably worth generalizing a means to mark certain options or target
   # attributes as making results un-cacheable. See: https://github.com/pantsbuild/pants/issues/4748
@@ -612,6 +887,11 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
   def result_class(self):
     return PytestResult
 
+  @property
+  def supports_concurrent_partitions(self):
+    # Coverage data is written to the working directory shared by all partitions.
+    return self.get_options().coverage is None
+
   def collect_files(self, workdirs):
     return workdirs.files()
 
@@ -651,7 +931,8 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
 
     with self._test_runner(workdirs, test_targets, sources_map) as (pytest_binary,
                                                                     test_args,
-                                                                    get_pytest_rootdir):
+                                                                    get_pytest_rootdir,
+                                                                    coverage_selection):
       # Validate that the user didn't provide any passthru args that conflict
       # with those we must set ourselves.
       for arg in self.get_passthru_args():
@@ -684,8 +965,10 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
       if os.path.exists(junitxml_path):
         os.unlink(junitxml_path)
 
-      with self._maybe_run_in_chroot():
-        result = self._do_run_tests_with_args(pytest_binary.pex, args)
+      result = self._do_run_tests_with_args(pytest_binary.pex, args)
+
+      if coverage_selection:
+        self._update_coverage_selection_index(coverage_selection, test_targets)
 
       # There was a problem prior to test execution preventing junit xml file creation so just let
       # the failure result bubble.
@@ -721,21 +1004,76 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
       process = self._spawn(pex, workunit, args, setsid=False, env=env)
       return process.wait()
 
-  @contextmanager
-  def _maybe_run_in_chroot(self):
-    if self.run_tests_in_chroot:
-      with pushd(self._source_chroot_path):
-        yield
-    else:
-      yield
+  @property
+  def _test_cwd(self):
+    return self._source_chroot_path if self.run_tests_in_chroot else os.getcwd()
+
+  @property
+  def _warm_workers(self):
+    options = self.get_options()
+    return (options.warm_workers and
+            options.coverage is None and
+            not options.profile and
+            '--pdb' not in self.get_passthru_args())
 
-  def _spawn(self, pex, workunit, args, setsid=False, env=None):
+  @memoized_property
+  def _forked_worker_pool(self):
+    pants_workdir = self.context.options.for_global_scope().pants_workdir
+    return ForkedWorkerPool(ForkedWorkerPool.location(pants_workdir),
+                            idle_timeout=self.get_options().warm_workers_idle_timeout)
+
+  def _forked_worker_key(self, pex, preload):
+    # A zygote imports from the interpreter and the requirements pexes, but never from sources.
+    source_chroot = os.path.realpath(self._source_chroot_path)
+    pex_path = PexInfo.from_pex(pex.path()).pex_path or ''
+    requirements_pexes = [path for path in pex_path.split(':')
+                          if path and os.path.realpath(path) != source_chroot]
+    return stable_json_hash(dict(interpreter=[pex.interpreter.binary,
+                                              str(pex.interpreter.identity)],
+                                 requirements_pexes=requirements_pexes,
+                                 preload=sorted(preload),
+                                 zygote=hash_all([ForkedWorkerPool.zygote_source()])))
+
+  def _spawn_forked_worker(self, pex, workunit, args, env, cwd):
+    preload = self.get_options().warm_workers_preload
+
+    def launch(config, log):
+      zygote_env = dict(env, PEX_MODULE='{}:main'.format(PytestPrep.PytestBinary.zygote_module()))
+      return subprocess.Popen(pex.cmdline([config]), env=zygote_env, preexec_fn=os.setsid,
+                              stdout=log, stderr=log)
+
+    workunit.output('stdout')
+    workunit.output('stderr')
+    output_paths = workunit.output_paths()
+    try:
+      return self._forked_worker_pool.spawn(self._forked_worker_key(pex, preload),
+                                            launch,
+                                            entry_point='pytest:main',
+                                            code_paths=[pex.path(), self._source_chroot_path],
+                                            args=args,
+                                            cwd=cwd,
+                                            env=env,
+                                            stdout=output_paths['stdout'],
+                                            stderr=output_paths['stderr'],
+                                            preload=preload,
+                                            preload_entry_points=['pytest11'])
+    except ForkedWorkerPool.LaunchError as e:
+      self.context.log.warn('{} Running py.test in a new process instead.'.format(e))
+      return None
+
+  def _spawn(self, pex, workunit, args, setsid=False, env=None, warm=False):
     env = env or {}
-    process = pex.run(args,
-                      with_chroot=False,  # We handle chrooting ourselves.
-                      blocking=False,
-                      setsid=setsid,
-                      env=env,
-                      stdout=workunit.output('stdout'),
-                      stderr=workunit.output('stderr'))
+    # NB: Partitions may be spawned concurrently, so rather than changing the working directory
+    # of this process (as `pex.run` would require), the test process is given its own.
+    cwd = self._test_cwd
+    if warm and self._warm_workers:
+      process_handler = self._spawn_forked_worker(pex, workunit, args, env, cwd)
+      if process_handler:
+        return process_handler
+    process = subprocess.Popen(pex.cmdline(args),
+                               cwd=cwd,
+                               env=env,
+                               preexec_fn=os.setsid if setsid else None,
+                               stdout=workunit.output('stdout'),
+                               stderr=workunit.output('stderr'))
     return SubprocessProcessHandler(process)
@@ -0,0 +1,116 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from pants.base.hash_utils import hash_file
+from pants.util.dirutil import safe_delete, safe_mkdir_for
+
+
+logger = logging.getLogger(__name__)
+
+
+class FileDigestCache(object):
+  """A persistent cache of the sha1 digests of file contents.
+
+  Entries are keyed by path, and are only used while the file's mtime, size and inode are
+  unchanged, so that unchanged files need only be stat'd rather than read. The whole cache is
+  loaded on first use, and new digests are written back in batches.
+
+  Files modified within the last few seconds are never cached: a further modification within
+  the granularity of the filesystem's mtimes would not change the file's stat.
+  """
+
+  # The minimum age of a file's mtime for its digest to be cached.
+  RACY_SECONDS = 3
+
+  # The number of new digests to buffer before writing them back.
+  FLUSH_THRESHOLD = 1000
+
+  _global_instance = None
+
+  @classmethod
+  def global_instance(cls):
+    """Returns the FileDigestCache for this run, or None if digests are not cached."""
+    return cls._global_instance
+
+  @classmethod
+  def set_global_instance(cls, instance):
+    """Sets (or with None, clears) the FileDigestCache for this run, flushing any previous one."""
+    if cls._global_instance and cls._global_instance is not instance:
+      cls._global_instance.flush()
+    cls._global_instance = instance
+
+  def __init__(self, path):
+    """
+    :param str path: The path of the sqlite database to store digests in.
+    """
+    self._path = path
+    self._lock = threading.Lock()
+    self._entries = None
+    self._pending = {}
+
+  @contextmanager
+  def _connection(self):
+    safe_mkdir_for(self._path)
+    conn = sqlite3.connect(self._path, timeout=60)
+    try:
+      conn.execute('CREATE TABLE IF NOT EXISTS digests (path TEXT PRIMARY KEY, mtime REAL, '
+                   'size INTEGER, inode INTEGER, digest TEXT)')
+      with conn:
+        yield conn
+    finally:
+      conn.close()
+
+  def _load(self):
+    if self._entries is None:
+      self._entries = {}
+      try:
+        with self._connection() as conn:
+          for path, mtime, size, inode, digest in conn.execute('SELECT * FROM digests'):
+            self._entries[path] = (mtime, size, inode, digest)
+      except sqlite3.DatabaseError as e:
+        # The cache is only an optimization: start afresh rather than failing the run.
+        logger.warn('Discarding unreadable file digest cache {}: {}'.format(self._path, e))
+        safe_delete(self._path)
+    return self._entries
+
+  def digest(self, path):
+    """Returns the hex sha1 digest of the contents of the file at the given absolute path."""
+    stat = os.stat(path)
+    key = (stat.st_mtime, stat.st_size, stat.st_ino)
+    with self._lock:
+      entry = self._load().get(path)
+    if entry and entry[:3] == key:
+      return entry[3]
+
+    digest = hash_file(path)
+    if time.time() - stat.st_mtime >= self.RACY_SECONDS:
+      with self._lock:
+        self._entries[path] = self._pending[path] = key + (digest,)
+        should_flush = len(self._pending) >= self.FLUSH_THRESHOLD
+      if should_flush:
+        self.flush()
+    return digest
+
+  def flush(self):
+    """Write any new digests back to the cache."""
+    with self._lock:
+      pending, self._pending = self._pending, {}
+    if not pending:
+      return
+    try:
+      with self._connection() as conn:
+        conn.executemany('INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?)',
+                         [(path,) + entry for path, entry in pending.items()])
+    except sqlite3.DatabaseError as e:
+      logger.warn('Failed to write to file digest cache {}: {}'.format(self._path, e))
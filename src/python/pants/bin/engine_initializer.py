@@ -6,11 +6,13 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import logging
+import os
 from collections import namedtuple
 
 from pants.base.build_environment import get_buildroot, get_scm
 from pants.base.file_system_project_tree import FileSystemProjectTree
 from pants.base.specs import Specs
+from pants.build_graph.build_file_compiler import BuildFileCompiler
 from pants.engine.build_files import create_graph_rules
 from pants.engine.fs import create_fs_rules
 from pants.engine.isolated_process import create_process_rules
@@ -157,7 +159,8 @@ class EngineInitializer(object):
     parser = LegacyPythonCallbacksParser(
       symbol_table,
       build_file_aliases,
-      build_file_imports_behavior
+      build_file_imports_behavior,
+      build_file_compiler=BuildFileCompiler(cache_dir=os.path.join(workdir, 'build_file_code'))
     )
     address_mapper = AddressMapper(parser=parser,
                                    build_ignore_patterns=build_ignore_patterns,
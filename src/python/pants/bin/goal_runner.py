@@ -6,9 +6,11 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import logging
+import os
 import sys
 
 from pants.base.cmd_line_spec_parser import CmdLineSpecParser
+from pants.base.file_digest_cache import FileDigestCache
 from pants.base.workunit import WorkUnit, WorkUnitLabel
 from pants.bin.engine_initializer import EngineInitializer
 from pants.bin.repro import Reproducer
@@ -68,6 +70,12 @@ class GoalRunnerFactory(object):
     self._explain = self._global_options.explain
     self._kill_nailguns = self._global_options.kill_nailguns
 
+    if self._global_options.cache_file_digests:
+      FileDigestCache.set_global_instance(
+        FileDigestCache(os.path.join(self._global_options.pants_workdir, 'file_digests.db')))
+    else:
+      FileDigestCache.set_global_instance(None)
+
   def _handle_help(self, help_request):
     """Handle requests for `help` information."""
     if help_request:
@@ -279,6 +287,9 @@ class GoalRunner(object):
       self._run_tracker.set_root_outcome(WorkUnit.FAILURE)
       raise
     finally:
+      digest_cache = FileDigestCache.global_instance()
+      if digest_cache:
+        digest_cache.flush()
       # Must kill nailguns only after run_tracker.end() is called, otherwise there may still
       # be pending background work that needs a nailgun.
       if should_kill_nailguns:
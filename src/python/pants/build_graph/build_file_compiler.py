@@ -0,0 +1,81 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import logging
+import marshal
+import os
+import sys
+
+from pants.util.dirutil import safe_concurrent_creation, safe_mkdir_for, safe_rm_oldest_items_in_dir
+from pants.util.strutil import ensure_binary
+
+
+logger = logging.getLogger(__name__)
+
+
+class BuildFileCompiler(object):
+  """Compiles BUILD files to code objects, with a persistent cache.
+
+  Compiled code is cached in `cache_dir` keyed by the content and path of each BUILD file, so
+  unchanged BUILD files are never recompiled. The cache is sharded into 256 directories, each of
+  which keeps only its most recently used `MAX_CACHED_PER_SHARD` entries.
+  """
+
+  MAX_CACHED_PER_SHARD = 256
+
+  def __init__(self, cache_dir=None):
+    """
+    :param str cache_dir: A directory to persist compiled code in, or None to not persist it.
+    """
+    self._cache_dir = cache_dir
+
+  def _cache_path(self, full_path, source):
+    hasher = hashlib.sha1()
+    # Marshalled code is specific to the version of the interpreter.
+    hasher.update(sys.version.encode('utf-8'))
+    hasher.update(ensure_binary(full_path))
+    hasher.update(b'\0')
+    hasher.update(source)
+    digest = hasher.hexdigest()
+    return os.path.join(self._cache_dir, digest[:2], digest[2:])
+
+  def _read_cached(self, cache_path):
+    try:
+      with open(cache_path, 'rb') as fp:
+        code = marshal.loads(fp.read())
+      # Mark the entry as recently used, so that it outlives stale entries in its shard.
+      os.utime(cache_path, None)
+      return code
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+      return None
+
+  def _write_cached(self, cache_path, marshalled):
+    try:
+      safe_mkdir_for(cache_path)
+      with safe_concurrent_creation(cache_path) as tmp_path:
+        with open(tmp_path, 'wb') as fp:
+          fp.write(marshalled)
+      safe_rm_oldest_items_in_dir(os.path.dirname(cache_path), self.MAX_CACHED_PER_SHARD)
+    except (IOError, OSError) as e:
+      # The cache is only an optimization, and concurrent runs may evict each other's entries.
+      logger.debug('Failed to cache compiled code at {}: {}'.format(cache_path, e))
+
+  def compile_source(self, full_path, source):
+    """Compiles the given source of a BUILD file, using the cache if there is one.
+
+    :param str full_path: The path of the BUILD file, which is the filename of the returned code.
+    :param bytes source: The content of the BUILD file.
+    :raises: :class:`SyntaxError` if the source doesn't compile.
+    """
+    cache_path = self._cache_path(full_path, source) if self._cache_dir else None
+    code = self._read_cached(cache_path) if cache_path else None
+    if code is None:
+      code = compile(source, full_path, 'exec', flags=0, dont_inherit=True)
+      if cache_path:
+        self._write_cached(cache_path, marshal.dumps(code))
+    return code
@@ -7,6 +7,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import itertools
 import logging
+import threading
 from abc import abstractmethod
 from collections import OrderedDict, defaultdict, deque
 
@@ -23,6 +24,56 @@ from pants.util.meta import AbstractClass
 logger = logging.getLogger(__name__)
 
 
+class _ClosureMemo(object):
+  """A memo of the closures of single addresses, bounded by the total size of the closures.
+
+  Memoizing the closure of every target of a large graph would otherwise take memory quadratic in
+  the size of the graph, so the least recently used closures are dropped once the bound is exceeded.
+
+  The memo is safe to use from several threads (e.g. code generators that walk closures), although
+  the graph itself must not be mutated concurrently.
+  """
+
+  def __init__(self, max_size):
+    """
+    :param int max_size: The maximum total number of targets in the memoized closures.
+    """
+    self._max_size = max_size
+    self._size = 0
+    self._closures = OrderedDict()  # key -> tuple of Target, from least to most recently used.
+    self._lock = threading.Lock()
+
+  def __len__(self):
+    return len(self._closures)
+
+  def get(self, key):
+    with self._lock:
+      closure = self._closures.pop(key, None)
+      if closure is not None:
+        self._closures[key] = closure
+      return closure
+
+  def put(self, key, closure):
+    with self._lock:
+      self._pop(key)
+      if len(closure) > self._max_size:
+        return
+      self._closures[key] = closure
+      self._size += len(closure)
+      while self._size > self._max_size:
+        _, evicted = self._closures.popitem(last=False)
+        self._size -= len(evicted)
+
+  def pop(self, key):
+    with self._lock:
+      self._pop(key)
+
+  def _pop(self, key):
+    closure = self._closures.pop(key, None)
+    if closure is not None:
+      self._size -= len(closure)
+
+
 class BuildGraph(AbstractClass):
   """A directed acyclic graph of Targets and dependencies. Not necessarily connected.
 
@@ -111,6 +162,9 @@ class BuildGraph(AbstractClass):
     def dep_predicate(self, target, dep, level):
       return self._leveled_predicate(dep, level)
 
+  # The maximum total number of targets in the closures memoized in each direction.
+  _MAX_MEMOIZED_CLOSURE_SIZE = 1000000
+
   @staticmethod
   def closure(*vargs, **kwargs):
     """See `Target.closure_for_targets` for arguments.
@@ -154,6 +208,9 @@ class BuildGraph(AbstractClass):
     self._derived_from_by_derivative = {}  # Address -> Address.
     self._derivatives_by_derived_from = defaultdict(list)   # Address -> list of Address.
     self.synthetic_addresses = set()
+    # Memoized closures of single addresses: (Address, postorder) -> tuple of Target.
+    self._dependency_closures = _ClosureMemo(self._MAX_MEMOIZED_CLOSURE_SIZE)
+    self._dependee_closures = _ClosureMemo(self._MAX_MEMOIZED_CLOSURE_SIZE)
 
   def contains_address(self, address):
     """
@@ -338,6 +395,31 @@ class BuildGraph(AbstractClass):
     else:
       self._target_dependencies_by_address[dependent].add(dependency)
       self._target_dependees_by_address[dependency].add(dependent)
+      self._invalidate_closures(dependent, dependency)
+
+  def _invalidate_closures(self, dependent, dependency):
+    """Drops the memoized closures that are changed by an edge from `dependent` to `dependency`.
+
+    The dependency closures of `dependent` and its transitive dependees change, as do the dependee
+    closures of `dependency` and its transitive dependencies. Nothing is walked unless closures in
+    the relevant direction have been memoized, so building the graph pays nothing for this.
+    """
+    for closures, root, edges in ((self._dependency_closures, dependent,
+                                   self._target_dependees_by_address),
+                                  (self._dependee_closures, dependency,
+                                   self._target_dependencies_by_address)):
+      if not closures:
+        continue
+      walked = set()
+      to_walk = [root]
+      while to_walk:
+        address = to_walk.pop()
+        if address in walked:
+          continue
+        walked.add(address)
+        closures.pop((address, False))
+        closures.pop((address, True))
+        to_walk.extend(edges.get(address, ()))
 
   def targets(self, predicate=None):
     """Returns all the targets in the graph in no particular order.
@@ -473,6 +555,9 @@ class BuildGraph(AbstractClass):
     :param list<Address> addresses: The root addresses to transitively close over.
     :param function predicate: The predicate passed through to `walk_transitive_dependee_graph`.
     """
+    if predicate is None:
+      return self._memoized_closure(addresses, self._dependee_closures,
+                                    self.walk_transitive_dependee_graph, postorder=postorder)
     ret = OrderedSet()
     self.walk_transitive_dependee_graph(addresses, ret.add, predicate=predicate,
                                         postorder=postorder)
@@ -504,12 +589,44 @@ class BuildGraph(AbstractClass):
       target in the search tree as a second parameter, and it is checked just before a dependency is
       expanded.
     """
+    predicates = ('predicate', 'leveled_predicate', 'dep_predicate')
+    if (not vargs and set(kwargs) <= set(predicates + ('postorder',)) and
+        not any(kwargs.get(name) for name in predicates)):
+      return self._memoized_closure(addresses, self._dependency_closures,
+                                    self.walk_transitive_dependency_graph,
+                                    postorder=kwargs.get('postorder'))
     ret = OrderedSet()
     self.walk_transitive_dependency_graph(addresses, ret.add,
                                           *vargs,
                                           **kwargs)
     return ret
 
+  def _memoized_closure(self, addresses, closures, walk, postorder=False):
+    """Returns the unfiltered transitive closure of `addresses` in the given direction.
+
+    The closure of each address is walked once and memoized until an injected dependency changes
+    it. Because a closure is closed under the walked edges, the walk of several addresses with a
+    shared visited set is exactly the concatenation of the closures of each address with
+    duplicates removed, and any address that was already reached contributes nothing new.
+
+    :param closures: The memo of closures for the direction being walked.
+    :param function walk: The `walk_transitive_*_graph` method for the direction being walked.
+    """
+    postorder = bool(postorder)
+    ret = OrderedSet()
+    for address in addresses:
+      target = self._target_by_address.get(address)
+      if target is not None and target in ret:
+        continue
+      closure = closures.get((address, postorder))
+      if closure is None:
+        walked = []
+        walk([address], walked.append, postorder=postorder)
+        closure = tuple(walked)
+        closures.put((address, postorder), closure)
+      ret.update(closure)
+    return ret
+
   def transitive_subgraph_of_addresses_bfs(self,
                                            addresses,
                                            predicate=None,
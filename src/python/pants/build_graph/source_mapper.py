@@ -38,6 +38,7 @@ class SpecSourceMapper(SourceMapper):
     self._stop_after_match = stop_after_match
     self._build_graph = build_graph
     self._address_mapper = address_mapper
+    self._targets_by_spec_path = {}
 
   def target_addresses_for_source(self, source):
     result = []
@@ -46,19 +47,29 @@ class SpecSourceMapper(SourceMapper):
     # a top-level source has empty dirname, so do/while instead of straight while loop.
     while path:
       path = os.path.dirname(path)
-      try:
-        result.extend(self._find_targets_for_source(source, path))
-      except BuildFileAddressMapper.BuildFileScanError:
-        pass
+      result.extend(self._find_targets_for_source(source, path))
       if self._stop_after_match and len(result) > 0:
         break
 
     return result
 
+  def _targets_in_spec_path(self, spec_path):
+    # Each spec path is scanned and injected at most once, however many sources are looked up in it.
+    targets = self._targets_by_spec_path.get(spec_path)
+    if targets is None:
+      targets = []
+      try:
+        for address in self._address_mapper.addresses_in_spec_path(spec_path):
+          self._build_graph.inject_address_closure(address)
+          targets.append(self._build_graph.get_target(address))
+      except BuildFileAddressMapper.BuildFileScanError:
+        pass
+      self._targets_by_spec_path[spec_path] = targets
+    return targets
+
   def _find_targets_for_source(self, source, spec_path):
-    for address in self._address_mapper.addresses_in_spec_path(spec_path):
-      self._build_graph.inject_address_closure(address)
-      target = self._build_graph.get_target(address)
+    for target in self._targets_in_spec_path(spec_path):
+      address = target.address
       sources_field = target.payload.get_field('sources')
       if sources_field and sources_field.matches(source):
         yield address
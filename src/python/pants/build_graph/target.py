@@ -241,7 +241,10 @@ class Target(AbstractTarget):
                                                respect_intransitive=respect_intransitive)
     closure = OrderedSet()
 
-    if not bfs:
+    if not bfs and dep_predicate is None:
+      # Unfiltered depth-first closures are memoized by the graph.
+      closure.update(build_graph.transitive_subgraph_of_addresses(addresses, postorder=postorder))
+    elif not bfs:
       build_graph.walk_transitive_dependency_graph(
         addresses=addresses,
         work=closure.add,
@@ -442,10 +445,13 @@ class Target(AbstractTarget):
         hasher.update(dep_hash)
       target_hash = self.invalidation_hash(fingerprint_strategy)
       if target_hash is None and not dep_hashes:
-        return None
-      dependencies_hash = hasher.hexdigest()[:12]
-      combined_hash = '{target_hash}.{deps_hash}'.format(target_hash=target_hash,
-                                                         deps_hash=dependencies_hash)
+        # Memoize the absence of a hash too: otherwise it would be recomputed (along with that of
+        # the target's whole closure) once per dependee.
+        combined_hash = None
+      else:
+        dependencies_hash = hasher.hexdigest()[:12]
+        combined_hash = '{target_hash}.{deps_hash}'.format(target_hash=target_hash,
+                                                           deps_hash=dependencies_hash)
       fingerprint_map[fingerprint_strategy] = combined_hash
     return fingerprint_map[fingerprint_strategy]
 
@@ -5,19 +5,31 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
-import errno
+import fcntl
+import json
 import os
 import shutil
+import stat
+import sys
 import tarfile
+import zlib
+from collections import OrderedDict
 
+from pants.base.hash_utils import hash_file
+from pants.cache.parallel_gzip import ParallelGzipWriter, ReadAheadGzipReader
 from pants.util.contextutil import open_tar
-from pants.util.dirutil import safe_mkdir, safe_mkdir_for, safe_walk
+from pants.util.dirutil import (safe_concurrent_creation, safe_delete, safe_mkdir, safe_mkdir_for,
+                                safe_rmtree, safe_walk)
 
 
 class ArtifactError(Exception):
   pass
 
 
+class MissingBlobError(ArtifactError):
+  """Indicates that a blob referenced by a ContentAddressedArtifact has been evicted."""
+
+
 class Artifact(object):
   """Represents a set of files in an artifact."""
 
@@ -85,11 +97,22 @@ class TarballArtifact(Artifact):
 
   # TODO: Expose `dereference` for tasks.
   # https://github.com/pantsbuild/pants/issues/3961
-  def __init__(self, artifact_root, tarfile_, compression=9, dereference=True):
+  def __init__(self, artifact_root, tarfile_, compression=9, dereference=True,
+               compression_threads=1):
+    """
+    :param str artifact_root: The path under which cacheable products will be read/written.
+    :param str tarfile_: The path of the tarball.
+    :param int compression: The gzip compression level for created tarballs.
+    :param bool dereference: Dereference symlinks when creating the tarball.
+    :param int compression_threads: The number of threads to gzip a created tarball on. When
+                                    greater than 1, the tarball is written as a multi-member gzip
+                                    file, which any gzip reader can extract.
+    """
     super(TarballArtifact, self).__init__(artifact_root)
     self._tarfile = tarfile_
     self._compression = compression
     self._dereference = dereference
+    self._compression_threads = compression_threads
 
   def exists(self):
     return os.path.isfile(self._tarfile)
@@ -97,42 +120,203 @@ class TarballArtifact(Artifact):
   def collect(self, paths):
     # In our tests, gzip is slightly less compressive than bzip2 on .class files,
     # but decompression times are much faster.
-    mode = 'w:gz'
-
-    tar_kwargs = {'dereference': self._dereference, 'errorlevel': 2, 'compresslevel': self._compression}
+    if self._compression_threads > 1:
+      with open(self._tarfile, 'wb') as outfile:
+        gzip_out = ParallelGzipWriter(outfile, compresslevel=self._compression,
+                                      threads=self._compression_threads)
+        try:
+          with open_tar(gzip_out, 'w|', dereference=self._dereference, errorlevel=2) as tarout:
+            self._add_paths(tarout, paths)
+        finally:
+          gzip_out.close()
+    else:
+      tar_kwargs = {'dereference': self._dereference, 'errorlevel': 2,
+                    'compresslevel': self._compression}
+      with open_tar(self._tarfile, 'w:gz', **tar_kwargs) as tarout:
+        self._add_paths(tarout, paths)
 
-    with open_tar(self._tarfile, mode, **tar_kwargs) as tarout:
-      for path in paths or ():
-        # Adds dirs recursively.
-        relpath = os.path.relpath(path, self._artifact_root)
-        tarout.add(path, relpath)
-        self._relpaths.add(relpath)
+  def _add_paths(self, tarout, paths):
+    for path in paths or ():
+      # Adds dirs recursively.
+      relpath = os.path.relpath(path, self._artifact_root)
+      tarout.add(path, relpath)
+      self._relpaths.add(relpath)
 
   def extract(self):
+    # Members are extracted as they are streamed out of the tarball, so the tarball is read and
+    # decompressed exactly once, with decompression running ahead on a background thread.
     try:
-      with open_tar(self._tarfile, 'r', errorlevel=2) as tarin:
-        # Note: We create all needed paths proactively, even though extractall() can do this for us.
-        # This is because we may be called concurrently on multiple artifacts that share directories,
-        # and there will be a race condition inside extractall(): task T1 A) sees that a directory
-        # doesn't exist and B) tries to create it. But in the gap between A) and B) task T2 creates
-        # the same directory, so T1 throws "File exists" in B).
-        # This actually happened, and was very hard to debug.
-        # Creating the paths here up front allows us to squelch that "File exists" error.
-        paths = []
-        dirs = set()
-        for tarinfo in tarin.getmembers():
-          paths.append(tarinfo.name)
-          if tarinfo.isdir():
-            dirs.add(tarinfo.name)
-          else:
-            dirs.add(os.path.dirname(tarinfo.name))
-        for d in dirs:
-          try:
-            os.makedirs(os.path.join(self._artifact_root, d))
-          except OSError as e:
-            if e.errno != errno.EEXIST:
-              raise
-        tarin.extractall(self._artifact_root)
-        self._relpaths.update(paths)
-    except tarfile.ReadError as e:
+      with open(self._tarfile, 'rb') as infile:
+        gzip_in = ReadAheadGzipReader(infile)
+        try:
+          with open_tar(gzip_in, 'r|', errorlevel=2) as tarin:
+            self._extract_members(tarin)
+        finally:
+          gzip_in.close()
+    except (tarfile.ReadError, IOError, EOFError, zlib.error) as e:
       raise ArtifactError(str(e))
+
+  def _extract_members(self, tarin):
+    paths = []
+    dirs = []
+    for tarinfo in tarin:
+      paths.append(tarinfo.name)
+      # Note: We create all needed paths proactively, even though extract() can do this for us.
+      # This is because we may be called concurrently on multiple artifacts that share directories,
+      # and there will be a race condition inside extract(): task T1 A) sees that a directory
+      # doesn't exist and B) tries to create it. But in the gap between A) and B) task T2 creates
+      # the same directory, so T1 throws "File exists" in B).
+      # This actually happened, and was very hard to debug.
+      # Creating the paths here up front allows us to squelch that "File exists" error.
+      if tarinfo.isdir():
+        safe_mkdir(os.path.join(self._artifact_root, tarinfo.name))
+        # Like extractall(), defer setting directory attributes until their contents exist.
+        dirs.append(tarinfo)
+      else:
+        safe_mkdir_for(os.path.join(self._artifact_root, tarinfo.name))
+        tarin.extract(tarinfo, self._artifact_root)
+
+    for tarinfo in sorted(dirs, key=lambda info: info.name, reverse=True):
+      dirpath = os.path.join(self._artifact_root, tarinfo.name)
+      tarin.chown(tarinfo, dirpath)
+      tarin.utime(tarinfo, dirpath)
+      tarin.chmod(tarinfo, dirpath)
+    self._relpaths.update(paths)
+
+
+class ContentAddressedArtifact(Artifact):
+  """An artifact stored as a manifest of file digests, whose contents live in a shared blob store.
+
+  Each distinct file content (and executable bit) is stored exactly once under `blob_root`, no
+  matter how many artifacts contain it. Extraction gives each file a private, writable copy of its
+  blob, because tools may rewrite their outputs in place (e.g.: zinc rewriting classfiles during an
+  incremental compile): a hardlink would be read-only, or would corrupt the blob for every artifact
+  sharing it. Where the filesystem supports it, the copy is a reflink that shares the blob's
+  extents until it is written to.
+  """
+
+  _MANIFEST_VERSION = 1
+
+  # The linux ioctl request that clones the extents of a file into another (i.e.: a reflink).
+  _FICLONE = 0x40049409
+
+  def __init__(self, artifact_root, manifest, blob_root, dereference=True):
+    """
+    :param str artifact_root: The path under which cacheable products will be read/written.
+    :param str manifest: The path of the manifest file describing this artifact.
+    :param str blob_root: The root directory of the blob store shared between artifacts.
+    :param bool dereference: Dereference symlinks when collecting the artifact.
+    """
+    super(ContentAddressedArtifact, self).__init__(artifact_root)
+    self._manifest = manifest
+    self._blob_root = blob_root
+    self._dereference = dereference
+
+  def exists(self):
+    return os.path.isfile(self._manifest)
+
+  def blob_path(self, blob):
+    """Returns the path in the blob store of the given blob name."""
+    return os.path.join(self._blob_root, blob[:2], blob)
+
+  def get_blob_paths(self):
+    """Returns the paths of the blobs referenced by this artifact's manifest."""
+    return sorted(set(self.blob_path(blob) for _, blob in self._read_manifest()['files']))
+
+  def _read_manifest(self):
+    try:
+      with open(self._manifest, 'r') as fp:
+        manifest = json.load(fp)
+    except (IOError, ValueError) as e:
+      raise ArtifactError('Failed to read manifest {}: {}'.format(self._manifest, e))
+    if manifest.get('version') != self._MANIFEST_VERSION:
+      raise ArtifactError('Unsupported manifest version in {}: {}'
+                          .format(self._manifest, manifest.get('version')))
+    return manifest
+
+  def collect(self, paths):
+    dirs = OrderedDict()
+    files = OrderedDict()
+    symlinks = OrderedDict()
+
+    def add(path):
+      relpath = os.path.relpath(path, self._artifact_root)
+      if os.path.islink(path) and not self._dereference:
+        symlinks[relpath] = os.readlink(path)
+      elif os.path.isdir(path):
+        dirs[relpath] = None
+      else:
+        files[relpath] = self._store_blob(path)
+
+    for path in paths or ():
+      add(path)
+      if os.path.isdir(path) and (self._dereference or not os.path.islink(path)):
+        for dir_name, dir_names, filenames in safe_walk(path, followlinks=self._dereference):
+          for name in dir_names + filenames:
+            add(os.path.join(dir_name, name))
+      self._relpaths.add(os.path.relpath(path, self._artifact_root))
+
+    manifest = {
+      'version': self._MANIFEST_VERSION,
+      'dirs': list(dirs),
+      'files': list(files.items()),
+      'symlinks': list(symlinks.items()),
+    }
+    with safe_concurrent_creation(self._manifest) as tmp_manifest:
+      with open(tmp_manifest, 'w') as fp:
+        json.dump(manifest, fp)
+
+  def extract(self):
+    manifest = self._read_manifest()
+
+    # See the comment in TarballArtifact.extract: safe_mkdir tolerates concurrent creation of
+    # shared parent directories by other extractions.
+    for relpath in manifest['dirs']:
+      safe_mkdir(os.path.join(self._artifact_root, relpath))
+      self._relpaths.add(relpath)
+    for relpath, blob in manifest['files']:
+      self._materialize(self.blob_path(blob), os.path.join(self._artifact_root, relpath))
+      self._relpaths.add(relpath)
+    for relpath, target in manifest['symlinks']:
+      dst = os.path.join(self._artifact_root, relpath)
+      self._clear(dst)
+      os.symlink(target, dst)
+      self._relpaths.add(relpath)
+
+  def _store_blob(self, path):
+    executable = bool(os.stat(path).st_mode & stat.S_IXUSR)
+    blob = '{}{}'.format(hash_file(path), '.x' if executable else '')
+    blob_path = self.blob_path(blob)
+    if not os.path.isfile(blob_path):
+      with safe_concurrent_creation(blob_path) as tmp_blob:
+        shutil.copyfile(path, tmp_blob)
+        os.chmod(tmp_blob, 0o555 if executable else 0o444)
+    return blob
+
+  def _materialize(self, blob_path, dst):
+    if not os.path.isfile(blob_path):
+      raise MissingBlobError('Missing blob {} for {}'.format(blob_path, dst))
+    self._clear(dst)
+    safe_mkdir_for(dst)
+    with open(blob_path, 'rb') as src_fp, open(dst, 'wb') as dst_fp:
+      if not self._clone(src_fp, dst_fp):
+        shutil.copyfileobj(src_fp, dst_fp)
+    os.chmod(dst, 0o755 if blob_path.endswith('.x') else 0o644)
+
+  @classmethod
+  def _clone(cls, src_fp, dst_fp):
+    """Reflinks the contents of `src_fp` into the empty `dst_fp`, and returns True if supported."""
+    if not sys.platform.startswith('linux'):
+      return False
+    try:
+      fcntl.ioctl(dst_fp.fileno(), cls._FICLONE, src_fp.fileno())
+      return True
+    except (IOError, OSError):
+      return False
+
+  @staticmethod
+  def _clear(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+      safe_rmtree(path)
+    else:
+      safe_delete(path)
@@ -87,9 +87,7 @@ class ArtifactCache(object):
                             These must be under the artifact_root.
     :param bool overwrite: Skip check for existing, insert even if already in cache.
     """
-    missing_files = filter(lambda f: not os.path.exists(f), paths)
-    if missing_files:
-      raise ArtifactCacheError('Tried to cache nonexistent files {0}'.format(missing_files))
+    self._check_paths_exist(paths)
 
     if not overwrite:
       if self.has(cache_key):
@@ -103,6 +101,12 @@ class ArtifactCache(object):
       logger.error('Error while writing to artifact cache: {0}'.format(e))
       return False
 
+  @staticmethod
+  def _check_paths_exist(paths):
+    missing_files = filter(lambda f: not os.path.exists(f), paths)
+    if missing_files:
+      raise ArtifactCacheError('Tried to cache nonexistent files {0}'.format(missing_files))
+
   def try_insert(self, cache_key, paths):
     """Attempt to cache the output of a build, without error-handling.
 
@@ -114,6 +118,19 @@ class ArtifactCache(object):
   def has(self, cache_key):
     pass
 
+  def has_many(self, cache_keys):
+    """Check whether the cache holds artifacts for each of the given keys.
+
+    Subclasses backed by remote services should override this to check many keys with fewer
+    round trips, or concurrently.
+
+    :param list cache_keys: A list of CacheKey objects.
+    :returns: A list of booleans, one per key, in the order of `cache_keys`. A True value may be
+              a false positive (e.g. when a remote service could not be reached), so it should be
+              confirmed by `use_cached_files`.
+    """
+    return [bool(self.has(cache_key)) for cache_key in cache_keys]
+
   def use_cached_files(self, cache_key, results_dir=None):
     """Use the files cached for the given key.
 
@@ -14,10 +14,13 @@ from six.moves import range
 
 from pants.base.build_environment import get_buildroot
 from pants.cache.artifact_cache import ArtifactCacheError
-from pants.cache.local_artifact_cache import LocalArtifactCache, TempLocalArtifactCache
+from pants.cache.local_artifact_cache import (ContentAddressedLocalArtifactCache,
+                                              LocalArtifactCache, TempLocalArtifactCache)
+from pants.cache.local_cache_index import LocalCacheIndex
 from pants.cache.pinger import BestUrlSelector, Pinger
 from pants.cache.resolver import NoopResolver, Resolver, RESTfulResolver
 from pants.cache.restful_artifact_cache import RESTfulArtifactCache
+from pants.cache.upload_spool import UploadSpool
 from pants.subsystem.subsystem import Subsystem
 from pants.util.memo import memoized_property
 
@@ -76,14 +79,47 @@ class CacheSetup(Subsystem):
                   'the resolver. When resolver is \'none\' list is used as is.')
     register('--compression-level', advanced=True, type=int, default=5,
              help='The gzip compression level (0-9) for created artifacts.')
+    register('--compression-threads', advanced=True, type=int, default=1,
+             help='The number of threads to gzip each created artifact on. Values greater than 1 '
+                  'create multi-member gzip artifacts, which are readable by any gzip reader.')
     register('--dereference-symlinks', type=bool, default=True, fingerprint=True,
              help='Dereference symlinks when creating cache tarball.')
+    register('--local-layout', advanced=True, choices=['tarball', 'content-addressed'],
+             default='tarball',
+             help='How to store artifacts in local caches. tarball: one gzipped tarball per '
+                  'target. content-addressed: a manifest per target, with identical files '
+                  'stored once in a shared blob store and copied (or reflinked, where the '
+                  'filesystem supports it) into place on use. Blobs are only evicted by the '
+                  'local cache budget, so this layout requires --local-max-bytes or '
+                  '--local-max-age-secs.')
+    register('--local-max-bytes', advanced=True, type=int, default=None,
+             help='The maximum total size in bytes of each local artifact cache. When exceeded, '
+                  'the least recently used artifacts are evicted as new artifacts are stored. '
+                  'Unbounded by default.')
+    register('--local-max-age-secs', advanced=True, type=int, default=None,
+             help='The maximum time in seconds since an artifact in a local artifact cache was '
+                  'last stored or used. Older artifacts are evicted as new artifacts are stored. '
+                  'Unbounded by default.')
     register('--max-entries-per-target', advanced=True, type=int, default=8,
              help='Maximum number of old cache files to keep per task target pair')
     register('--pinger-timeout', advanced=True, type=float, default=0.5,
              help='number of seconds before pinger times out')
     register('--pinger-tries', advanced=True, type=int, default=2,
              help='number of times pinger tries a cache')
+    register('--remote-read-concurrency', advanced=True, type=int, default=16,
+             help='The maximum number of concurrent requests to make when checking a remote '
+                  'artifact cache for many artifacts at once.')
+    register('--spool-remote-writes', advanced=True, type=bool, default=False,
+             help='Enqueue artifacts for remote caches in an on-disk spool under the workdir, and '
+                  'upload them in the background (in pantsd if it is enabled, and otherwise in a '
+                  'detached process) rather than during the build.')
+    register('--spool-max-attempts', advanced=True, type=int, default=5,
+             help='The number of times to attempt to upload a spooled artifact before dropping it.')
+    register('--spool-upload-timeout', advanced=True, type=float, default=60.0,
+             help='The timeout in seconds for each request uploading a spooled artifact.')
+    register('--spool-bandwidth-limit', advanced=True, type=int, default=0,
+             help='The maximum rate, in bytes per second, at which to upload each spooled '
+                  'artifact. 0 means no limit.')
     register('--write-permissions', advanced=True, type=str, default=None,
              help='Permissions to use when writing artifacts to a local cache, in octal.')
 
@@ -175,7 +211,8 @@ class CacheFactory(object):
       cache_spec = self._resolve(self._sanitize_cache_spec(self._options.write_to))
       if cache_spec:
         with self._cache_setup_lock:
-          self._write_cache = self._do_create_artifact_cache(cache_spec, 'will write to')
+          self._write_cache = self._do_create_artifact_cache(cache_spec, 'will write to',
+                                                             spool=self._upload_spool())
     return self._write_cache
 
   # VisibleForTesting
@@ -256,7 +293,22 @@ class CacheFactory(object):
 
     return available_urls
 
-  def _do_create_artifact_cache(self, spec, action):
+  def _upload_spool(self):
+    """Returns an UploadSpool for remote writes if they are spooled, or else None.
+
+    When pantsd is not enabled to drain the spool, a detached uploader process is launched.
+    """
+    if not self._options.spool_remote_writes:
+      return None
+    spool = UploadSpool(UploadSpool.location(self._options.pants_workdir),
+                        timeout=self._options.spool_upload_timeout,
+                        max_attempts=self._options.spool_max_attempts,
+                        bytes_per_second=self._options.spool_bandwidth_limit)
+    if not self._options.enable_pantsd:
+      spool.launch_uploader()
+    return spool
+
+  def _do_create_artifact_cache(self, spec, action, spool=None):
     """Returns an artifact cache for the specified spec.
 
     spec can be:
@@ -264,10 +316,20 @@ class CacheFactory(object):
       - a URL of a RESTful cache root.
       - a bar-separated list of URLs, where we'll pick the one with the best ping times.
       - A list or tuple of two specs, local, then remote, each as described above
+
+    If an UploadSpool is given, remote caches enqueue written artifacts in it.
     """
     compression = self._options.compression_level
     if compression not in range(1, 10):
       raise ValueError('compression_level must be an integer 1-9: {}'.format(compression))
+    if self._options.compression_threads < 1:
+      raise ValueError('compression_threads must be a positive integer: {}'
+                       .format(self._options.compression_threads))
+    if (self._options.local_layout == 'content-addressed' and
+        self._options.local_max_bytes is None and self._options.local_max_age_secs is None):
+      # Pruning old manifests doesn't remove the blobs they use: only the index evicts blobs.
+      raise ValueError('The content-addressed local_layout requires a local_max_bytes or '
+                       'local_max_age_secs budget.')
 
     artifact_root = self._options.pants_workdir
 
@@ -275,10 +337,21 @@ class CacheFactory(object):
       path = os.path.join(parent_path, self._cache_dirname)
       self._log.debug('{0} {1} local artifact cache at {2}'
                       .format(self._task.stable_name(), action, path))
-      return LocalArtifactCache(artifact_root, path, compression,
-                                self._options.max_entries_per_target,
-                                permissions=self._options.write_permissions,
-                                dereference=self._options.dereference_symlinks)
+      if self._options.local_layout == 'content-addressed':
+        local_cache_cls = ContentAddressedLocalArtifactCache
+      else:
+        local_cache_cls = LocalArtifactCache
+      max_bytes = self._options.local_max_bytes
+      max_age_secs = self._options.local_max_age_secs
+      # The index is shared by the caches of all tasks under the same local cache root.
+      index = (LocalCacheIndex(parent_path, max_bytes=max_bytes, max_age_secs=max_age_secs)
+               if max_bytes is not None or max_age_secs is not None else None)
+      return local_cache_cls(artifact_root, path, compression,
+                             self._options.max_entries_per_target,
+                             permissions=self._options.write_permissions,
+                             dereference=self._options.dereference_symlinks,
+                             compression_threads=self._options.compression_threads,
+                             index=index)
 
     def create_remote_cache(remote_spec, local_cache):
       urls = self.get_available_urls(remote_spec.split('|'))
@@ -287,8 +360,11 @@ class CacheFactory(object):
         best_url_selector = BestUrlSelector(
           ['{}/{}'.format(url.rstrip('/'), self._cache_dirname) for url in urls]
         )
-        local_cache = local_cache or TempLocalArtifactCache(artifact_root, compression)
-        return RESTfulArtifactCache(artifact_root, best_url_selector, local_cache)
+        local_cache = local_cache or TempLocalArtifactCache(
+          artifact_root, compression, compression_threads=self._options.compression_threads)
+        return RESTfulArtifactCache(artifact_root, best_url_selector, local_cache,
+                                    max_concurrency=self._options.remote_read_concurrency,
+                                    spool=spool)
 
     local_cache = create_local_cache(spec.local) if spec.local else None
     remote_cache = create_remote_cache(spec.remote, local_cache) if spec.remote else None
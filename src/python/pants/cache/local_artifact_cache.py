@@ -9,7 +9,7 @@ import logging
 import os
 from contextlib import contextmanager
 
-from pants.cache.artifact import TarballArtifact
+from pants.cache.artifact import ContentAddressedArtifact, MissingBlobError, TarballArtifact
 from pants.cache.artifact_cache import ArtifactCache, UnreadableArtifact
 from pants.util.contextutil import temporary_file
 from pants.util.dirutil import (safe_delete, safe_mkdir, safe_mkdir_for,
@@ -21,22 +21,27 @@ logger = logging.getLogger(__name__)
 
 class BaseLocalArtifactCache(ArtifactCache):
 
-  def __init__(self, artifact_root, compression, permissions=None, dereference=True):
+  def __init__(self, artifact_root, compression, permissions=None, dereference=True,
+               compression_threads=1):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     :param int compression: The gzip compression level for created artifacts.
                             Valid values are 0-9.
     :param str permissions: File permissions to use when creating artifact files.
     :param bool dereference: Dereference symlinks when creating the cache tarball.
+    :param int compression_threads: The number of threads to compress each created tarball on.
     """
     super(BaseLocalArtifactCache, self).__init__(artifact_root)
     self._compression = compression
     self._cache_root = None
     self._permissions = permissions
     self._dereference = dereference
+    self._compression_threads = compression_threads
 
   def _artifact(self, path):
-    return TarballArtifact(self.artifact_root, path, self._compression, dereference=self._dereference)
+    return TarballArtifact(self.artifact_root, path, self._compression,
+                           dereference=self._dereference,
+                           compression_threads=self._compression_threads)
 
   @contextmanager
   def _tmpfile(self, cache_key, use):
@@ -96,7 +101,7 @@ class LocalArtifactCache(BaseLocalArtifactCache):
   """An artifact cache that stores the artifacts in local files."""
 
   def __init__(self, artifact_root, cache_root, compression, max_entries_per_target=None,
-               permissions=None, dereference=True):
+               permissions=None, dereference=True, compression_threads=1, index=None):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     :param str cache_root: The locally cached files are stored under this directory.
@@ -104,15 +109,19 @@ class LocalArtifactCache(BaseLocalArtifactCache):
     :param int max_entries_per_target: The maximum number of old cache files to leave behind on a cache miss.
     :param str permissions: File permissions to use when creating artifact files.
     :param bool dereference: Dereference symlinks when creating the cache tarball.
+    :param int compression_threads: The number of threads to compress each created tarball on.
+    :param index: An optional `LocalCacheIndex` used to bound the size and age of the cache.
     """
     super(LocalArtifactCache, self).__init__(
       artifact_root,
       compression,
       permissions=int(permissions.strip(), base=8) if permissions else None,
-      dereference=dereference
+      dereference=dereference,
+      compression_threads=compression_threads
     )
     self._cache_root = os.path.realpath(os.path.expanduser(cache_root))
     self._max_entries_per_target = max_entries_per_target
+    self._index = index
     safe_mkdir(self._cache_root)
 
   def prune(self, root):
@@ -122,11 +131,13 @@ class LocalArtifactCache(BaseLocalArtifactCache):
     old cache files for each target/task.
 
     :param str root: The path under which cacheable artifacts will be cleaned
+    :returns: The removed paths.
     """
 
     max_entries_per_target = self._max_entries_per_target
     if os.path.isdir(root) and max_entries_per_target:
-      safe_rm_oldest_items_in_dir(root, max_entries_per_target)
+      return safe_rm_oldest_items_in_dir(root, max_entries_per_target)
+    return []
 
   def has(self, cache_key):
     return self._artifact_for(cache_key).exists()
@@ -142,7 +153,16 @@ class LocalArtifactCache(BaseLocalArtifactCache):
         if results_dir is not None:
           safe_rmtree(results_dir)
         artifact.extract()
+        if self._index:
+          self._index.touch(self._indexed_paths(tarfile))
         return True
+    except MissingBlobError as e:
+      # A blob used by this manifest was evicted: this is a normal miss, rather than corruption.
+      logger.debug('Evicted blob for {0} in local artifact cache: {1}'.format(tarfile, e))
+      if results_dir is not None:
+        safe_rmtree(results_dir)
+      self.delete(cache_key)
+      return False
     except Exception as e:
       # TODO(davidt): Consider being more granular in what is caught.
       logger.warn('Error while reading {0} from local artifact cache: {1}'.format(tarfile, e))
@@ -156,7 +176,10 @@ class LocalArtifactCache(BaseLocalArtifactCache):
       pass
 
   def delete(self, cache_key):
-    safe_delete(self._cache_file_for_key(cache_key))
+    path = self._cache_file_for_key(cache_key)
+    safe_delete(path)
+    if self._index:
+      self._index.forget([path])
 
   def _store_tarball(self, cache_key, src):
     dest = self._cache_file_for_key(cache_key)
@@ -164,15 +187,124 @@ class LocalArtifactCache(BaseLocalArtifactCache):
     os.rename(src, dest)
     if self._permissions:
       os.chmod(dest, self._permissions)
-    self.prune(os.path.dirname(dest))  # Remove old cache files.
+    removed = self.prune(os.path.dirname(dest))  # Remove old cache files.
+    if self._index:
+      exceeds_bounds = self._index.record(self._indexed_paths(dest))
+      self._index.forget(removed)
+      if exceeds_bounds:
+        self._index.evict_in_background()
     return dest
 
+  def _indexed_paths(self, path):
+    """Returns the files in the cache that a use of the cache file at `path` depends on."""
+    return [path]
+
   def _cache_file_for_key(self, cache_key):
     # Note: it's important to use the id as well as the hash, because two different targets
     # may have the same hash if both have no sources, but we may still want to differentiate them.
     return os.path.join(self._cache_root, cache_key.id, cache_key.hash) + '.tgz'
 
 
+class ContentAddressedLocalArtifactCache(LocalArtifactCache):
+  """A local artifact cache that stores files in a content-addressed blob store.
+
+  Rather than one tarball per cache key, each key maps to a small manifest of file digests, and
+  each distinct file content is stored once in a blob store under the cache root. Using cached
+  files copies (or reflinks) the blobs into place, which avoids decompression entirely.
+
+  Pruning old manifests doesn't remove the blobs they use: blobs are only evicted by the `index`,
+  which should be given to bound the size of the blob store.
+
+  Remote caches still exchange tarballs: `insert_paths` yields a tarball for upload, and
+  `store_and_use_artifact` ingests a downloaded tarball into the blob store.
+  """
+
+  # Target ids never start with a dot, so this cannot collide with a per-target directory.
+  _BLOBS_DIRNAME = '.blobs'
+
+  def __init__(self, artifact_root, cache_root, compression, max_entries_per_target=None,
+               permissions=None, dereference=True, compression_threads=1, index=None):
+    """
+    :param str artifact_root: The path under which cacheable products will be read/written.
+    :param str cache_root: The manifests and blob store are stored under this directory.
+    :param int compression: The gzip compression level for tarballs exchanged with remote caches.
+    :param int max_entries_per_target: The maximum number of old manifests to leave behind on a
+                                       cache miss.
+    :param str permissions: File permissions to use when creating manifest files.
+    :param bool dereference: Dereference symlinks when collecting artifacts.
+    :param int compression_threads: The number of threads to compress each tarball exchanged with
+                                    remote caches on.
+    :param index: An optional `LocalCacheIndex` used to bound the size and age of the cache. Blobs
+                  are indexed individually, and evicting one turns the manifests using it into
+                  cache misses.
+    """
+    super(ContentAddressedLocalArtifactCache, self).__init__(
+      artifact_root,
+      cache_root,
+      compression,
+      max_entries_per_target=max_entries_per_target,
+      permissions=permissions,
+      dereference=dereference,
+      compression_threads=compression_threads,
+      index=index
+    )
+    self._blob_root = os.path.join(self._cache_root, self._BLOBS_DIRNAME)
+
+  def _artifact(self, path):
+    return ContentAddressedArtifact(self.artifact_root, path, self._blob_root,
+                                    dereference=self._dereference)
+
+  def _tarball_artifact(self, path):
+    return super(ContentAddressedLocalArtifactCache, self)._artifact(path)
+
+  def _indexed_paths(self, path):
+    return [path] + self._artifact(path).get_blob_paths()
+
+  def try_insert(self, cache_key, paths):
+    with super(ContentAddressedLocalArtifactCache, self).insert_paths(cache_key, paths):
+      pass
+
+  @contextmanager
+  def insert_paths(self, cache_key, paths):
+    """Store paths in the blob store, and yield the path to a tarball of them for remote caches."""
+    self.try_insert(cache_key, paths)
+    with self._tmpfile(cache_key, 'tarball') as tmp:
+      self._tarball_artifact(tmp.name).collect(paths)
+      yield tmp.name
+
+  def store_and_use_artifact(self, cache_key, src, results_dir=None):
+    """Extract the tarball from the given `src` iterator, and then store its files for cache_key.
+
+    See `BaseLocalArtifactCache.store_and_use_artifact`.
+    """
+    with self._tmpfile(cache_key, 'read') as tmp:
+      for chunk in src:
+        tmp.write(chunk)
+      tmp.close()
+
+      if results_dir is not None:
+        safe_mkdir(results_dir, clean=True)
+
+      artifact = self._tarball_artifact(tmp.name)
+      try:
+        artifact.extract()
+      except Exception:
+        if results_dir is not None:
+          safe_mkdir(results_dir, clean=True)
+        raise
+
+      try:
+        self.try_insert(cache_key, list(artifact.get_paths()))
+      except Exception as e:
+        # The artifact was successfully used: failing to backfill the local cache is not fatal.
+        logger.warn('Error while storing {0} in local artifact cache: {1}'.format(cache_key, e))
+
+      return True
+
+  def _cache_file_for_key(self, cache_key):
+    return os.path.join(self._cache_root, cache_key.id, cache_key.hash) + '.manifest'
+
+
 class TempLocalArtifactCache(BaseLocalArtifactCache):
   """A local cache that does not actually store any files between calls.
 
@@ -180,12 +312,13 @@ class TempLocalArtifactCache(BaseLocalArtifactCache):
   actually stores files between calls, but is useful for handling file IO for a remote cache.
   """
 
-  def __init__(self, artifact_root, compression, permissions=None):
+  def __init__(self, artifact_root, compression, permissions=None, compression_threads=1):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     """
     super(TempLocalArtifactCache, self).__init__(artifact_root, compression=compression,
-                                                 permissions=permissions)
+                                                 permissions=permissions,
+                                                 compression_threads=compression_threads)
 
   def _store_tarball(self, cache_key, src):
     return src
@@ -0,0 +1,262 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from pants.util.dirutil import safe_delete, safe_mkdir, safe_walk
+
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCacheIndex(object):
+  """A sqlite index of the size and last use time of each file in a local artifact cache.
+
+  The index allows a local cache to be bounded by total size and by age with least-recently-used
+  eviction, without walking the cache: the total size is maintained by triggers, and the least
+  recently used files are found via an index on their use time. The cost of eviction is thus
+  proportional to the number of evicted files.
+
+  The index is shared by all of the task caches under a cache root. Files that exist under the
+  root when the index is first created are imported, so that pre-existing caches are bounded too.
+
+  Caches should call `evict_in_background` when `record` reports that the index exceeds its
+  bounds, so that deleting files happens off of the critical path of the task that stored them.
+  """
+
+  INDEX_FILENAME = '.index.sqlite'
+
+  # The maximum number of files to evict per call to `evict`, so that a single insert never pays
+  # for a large backlog of evictions (e.g. after the budget is lowered).
+  DEFAULT_MAX_EVICTIONS = 1000
+
+  def __init__(self, root, max_bytes=None, max_age_secs=None,
+               max_evictions=DEFAULT_MAX_EVICTIONS):
+    """
+    :param str root: The root directory of the cache, under which the index is stored.
+    :param int max_bytes: The maximum total size of indexed files, or None for no limit.
+    :param int max_age_secs: The maximum time since an indexed file was last used, or None for no
+                             limit.
+    :param int max_evictions: The maximum number of files to evict per call to `evict`.
+    """
+    self._root = os.path.realpath(os.path.expanduser(root))
+    self._path = os.path.join(self._root, self.INDEX_FILENAME)
+    self._max_bytes = max_bytes
+    self._max_age_secs = max_age_secs
+    self._max_evictions = max_evictions
+    self._eviction_lock = threading.Lock()
+    self._eviction_thread = None
+    self._eviction_pending = False
+
+  @contextmanager
+  def _connection(self):
+    safe_mkdir(self._root)
+    # Multiple processes (and the subprocess pool) may use the index concurrently: each use is a
+    # single IMMEDIATE transaction, which serializes writers.
+    conn = sqlite3.connect(self._path, timeout=60, isolation_level=None)
+    try:
+      # Fire delete triggers for rows replaced by `INSERT OR REPLACE`, to keep the total accurate.
+      conn.execute('PRAGMA recursive_triggers = ON')
+      conn.execute('BEGIN IMMEDIATE')
+      try:
+        self._ensure_tables(conn)
+        yield conn
+      except Exception:
+        conn.execute('ROLLBACK')
+        raise
+      else:
+        conn.execute('COMMIT')
+    finally:
+      conn.close()
+
+  @contextmanager
+  def _cursor(self):
+    with self._connection() as conn:
+      yield conn.cursor()
+
+  def _ensure_tables(self, conn):
+    for statement in (
+      """
+      CREATE TABLE IF NOT EXISTS entries (
+        path TEXT PRIMARY KEY,  -- Relative to the cache root.
+        size INTEGER,
+        used REAL  -- Seconds since the epoch.
+      )
+      """,
+      'CREATE INDEX IF NOT EXISTS entries_used_idx ON entries(used)',
+      'CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY, size INTEGER)',
+      """
+      CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+        UPDATE totals SET size = size + new.size WHERE id = 0;
+      END
+      """,
+      """
+      CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+        UPDATE totals SET size = size - old.size WHERE id = 0;
+      END
+      """,
+      """
+      CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+        UPDATE totals SET size = size - old.size + new.size WHERE id = 0;
+      END
+      """,
+    ):
+      conn.execute(statement)
+    # Only the process that creates the totals row imports pre-existing files.
+    if conn.execute('INSERT OR IGNORE INTO totals VALUES (0, 0)').rowcount == 1:
+      self._import_existing(conn)
+
+  def _import_existing(self, conn):
+    now = time.time()
+    rows = []
+    for dir_name, _, filenames in safe_walk(self._root):
+      for filename in filenames:
+        path = os.path.join(dir_name, filename)
+        if path.startswith(self._path):  # The index itself, and its journal.
+          continue
+        try:
+          stat = os.stat(path)
+        except OSError:
+          continue
+        rows.append((os.path.relpath(path, self._root), stat.st_size, min(stat.st_mtime, now)))
+    conn.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?)', rows)
+
+  def _relpath(self, path):
+    return os.path.relpath(os.path.realpath(path), self._root)
+
+  def _exceeds_bounds(self, c):
+    if self._max_bytes is not None:
+      if c.execute('SELECT size FROM totals WHERE id = 0').fetchone()[0] > self._max_bytes:
+        return True
+    if self._max_age_secs is not None:
+      # Uses the index on `used`, rather than scanning the entries.
+      oldest = c.execute('SELECT MIN(used) FROM entries').fetchone()[0]
+      if oldest is not None and oldest < time.time() - self._max_age_secs:
+        return True
+    return False
+
+  def record(self, paths):
+    """Record that the given files were written or replaced, and are thus freshly used.
+
+    :returns: True if the cache exceeds its bounds after recording the files.
+    :rtype: bool
+    """
+    now = time.time()
+    rows = [(self._relpath(path), os.path.getsize(path), now) for path in paths]
+    with self._cursor() as c:
+      c.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?)', rows)
+      return self._exceeds_bounds(c)
+
+  def touch(self, paths):
+    """Record that the given files were used."""
+    now = time.time()
+    with self._cursor() as c:
+      c.executemany('UPDATE entries SET used = ? WHERE path = ?',
+                    [(now, self._relpath(path)) for path in paths])
+
+  def forget(self, paths):
+    """Remove the given files from the index, e.g. because they were deleted."""
+    with self._cursor() as c:
+      c.executemany('DELETE FROM entries WHERE path = ?',
+                    [(self._relpath(path),) for path in paths])
+
+  def total_size(self):
+    with self._cursor() as c:
+      return c.execute('SELECT size FROM totals WHERE id = 0').fetchone()[0]
+
+  def evict(self):
+    """Delete the least recently used files until the cache is within its bounds.
+
+    At most `max_evictions` files are deleted per call.
+
+    :returns: The paths of the deleted files.
+    :rtype: list of string
+    """
+    if self._max_bytes is None and self._max_age_secs is None:
+      return []
+
+    evicted = []
+    with self._cursor() as c:
+      if self._max_age_secs is not None:
+        cutoff = time.time() - self._max_age_secs
+        evicted.extend(c.execute('SELECT path, size, used FROM entries WHERE used < ? '
+                                 'ORDER BY used LIMIT ?', (cutoff, self._max_evictions)))
+      if self._max_bytes is not None:
+        excess = c.execute('SELECT size FROM totals WHERE id = 0').fetchone()[0] - self._max_bytes
+        excess -= sum(size for _, size, _ in evicted)
+        if excess > 0:
+          already_evicted = set(path for path, _, _ in evicted)
+          rows = c.execute('SELECT path, size, used FROM entries ORDER BY used LIMIT ?',
+                           (self._max_evictions,))
+          for path, size, used in rows:
+            if excess <= 0 or len(evicted) >= self._max_evictions:
+              break
+            if path not in already_evicted:
+              evicted.append((path, size, used))
+              excess -= size
+
+    # Files are deleted before their index entries, so that an eviction cut short (e.g. when the
+    # process exits during a background eviction) leaves at worst index entries for missing files,
+    # which are evicted again harmlessly, rather than files that are never evicted.
+    evicted_paths = [os.path.join(self._root, path) for path, _, _ in evicted]
+    for path in evicted_paths:
+      safe_delete(path)
+    with self._cursor() as c:
+      # NB: Entries that were recorded or used again since they were selected are left alone.
+      c.executemany('DELETE FROM entries WHERE path = ? AND used = ?',
+                    [(path, used) for path, _, used in evicted])
+    if evicted_paths:
+      logger.debug('Evicted {} files from the local artifact cache at {}.'
+                   .format(len(evicted_paths), self._root))
+    return evicted_paths
+
+  def evict_in_background(self):
+    """Evict files as `evict` does, on a daemon thread, until the cache is within its bounds.
+
+    Returns immediately. Calls made while a background eviction is running cause it to check the
+    bounds again once it finishes its current pass, rather than starting another thread.
+    """
+    with self._eviction_lock:
+      self._eviction_pending = True
+      # A thread started before a fork doesn't exist in the child, and so isn't alive there.
+      if self._eviction_thread is not None and self._eviction_thread.is_alive():
+        return
+      self._eviction_thread = threading.Thread(target=self._evict_until_within_bounds,
+                                               name='local-cache-eviction')
+      self._eviction_thread.daemon = True
+      self._eviction_thread.start()
+
+  def _evict_until_within_bounds(self):
+    while True:
+      with self._eviction_lock:
+        if not self._eviction_pending:
+          return
+        self._eviction_pending = False
+      try:
+        evicted = self.evict()
+      except Exception as e:
+        logger.warn('Failed to evict from the local artifact cache at {}: {}'.format(self._root, e))
+        return
+      if len(evicted) >= self._max_evictions:
+        # There may be more to evict than a single pass allows.
+        with self._eviction_lock:
+          self._eviction_pending = True
+
+  def wait_for_eviction(self, timeout=None):
+    """Wait for a background eviction started by `evict_in_background` to finish.
+
+    :param float timeout: The maximum number of seconds to wait, or None to wait indefinitely.
+    """
+    with self._eviction_lock:
+      thread = self._eviction_thread
+    if thread is not None:
+      thread.join(timeout)
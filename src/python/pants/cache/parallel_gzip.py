@@ -0,0 +1,165 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import gzip
+import threading
+import zlib
+from collections import deque
+from multiprocessing.pool import ThreadPool
+
+from six.moves import queue
+
+
+class ParallelGzipWriter(object):
+  """A write-only file-like object that gzips its input on multiple threads.
+
+  Input is split into fixed size blocks, and each block is compressed as an independent gzip
+  member. Concatenated gzip members form a valid gzip file, which any gzip reader (including
+  `gzip.GzipFile`, and thus `tarfile` in non-streaming mode) can read.
+
+  zlib releases the GIL while compressing, so blocks are compressed concurrently.
+  """
+
+  DEFAULT_BLOCK_SIZE = 1024 * 1024
+
+  def __init__(self, fileobj, compresslevel=9, threads=2, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    :param fileobj: The file-like object to write the compressed stream to. It is not closed.
+    :param int compresslevel: The gzip compression level for each block (0-9).
+    :param int threads: The number of threads to compress blocks on.
+    :param int block_size: The number of uncompressed bytes to compress as each gzip member.
+    """
+    self._fileobj = fileobj
+    self._compresslevel = compresslevel
+    self._threads = threads
+    self._block_size = block_size
+    self._pool = ThreadPool(processes=threads)
+    self._buffer = []
+    self._buffered = 0
+    self._pending = deque()
+    self._closed = False
+
+  def _compress(self, data):
+    compressor = zlib.compressobj(self._compresslevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+  def _submit_buffer(self):
+    if self._buffered:
+      data = b''.join(self._buffer)
+      self._buffer = []
+      self._buffered = 0
+      self._pending.append(self._pool.apply_async(self._compress, (data,)))
+
+  def _drain(self, max_pending):
+    # Write completed members in order, bounding the number of blocks held in memory.
+    while len(self._pending) > max_pending:
+      self._fileobj.write(self._pending.popleft().get())
+
+  def write(self, data):
+    if self._closed:
+      raise ValueError('I/O operation on closed {}.'.format(type(self).__name__))
+    self._buffer.append(data)
+    self._buffered += len(data)
+    if self._buffered >= self._block_size:
+      self._submit_buffer()
+      self._drain(2 * self._threads)
+
+  def close(self):
+    if self._closed:
+      return
+    self._closed = True
+    try:
+      self._submit_buffer()
+      self._drain(0)
+    finally:
+      self._pool.close()
+      self._pool.join()
+
+
+class ReadAheadGzipReader(object):
+  """A read-only file-like object that decompresses a gzip file on a background thread.
+
+  Decompression runs ahead of the consumer by a bounded number of blocks, so that decompressing
+  an artifact overlaps with writing its contents to disk. Multi-member gzip files (such as those
+  created by `ParallelGzipWriter`) are supported.
+  """
+
+  DEFAULT_BLOCK_SIZE = 1024 * 1024
+
+  _EOF = object()
+
+  def __init__(self, fileobj, block_size=DEFAULT_BLOCK_SIZE, max_blocks_ahead=4):
+    """
+    :param fileobj: The file-like object to read the compressed stream from. It is not closed.
+    :param int block_size: The number of uncompressed bytes to decompress at a time.
+    :param int max_blocks_ahead: The maximum number of decompressed blocks to buffer.
+    """
+    self._gzip = gzip.GzipFile(fileobj=fileobj, mode='rb')
+    self._block_size = block_size
+    self._blocks = queue.Queue(maxsize=max_blocks_ahead)
+    self._current = b''
+    self._offset = 0
+    self._exhausted = False
+    self._closed = threading.Event()
+    self._thread = threading.Thread(target=self._read_ahead, name='gzip-read-ahead')
+    self._thread.daemon = True
+    self._thread.start()
+
+  def _put(self, item):
+    # Bail out if the consumer stops reading before the end of the stream.
+    while not self._closed.is_set():
+      try:
+        self._blocks.put(item, timeout=0.1)
+        return True
+      except queue.Full:
+        pass
+    return False
+
+  def _read_ahead(self):
+    try:
+      while True:
+        block = self._gzip.read(self._block_size)
+        if not block:
+          break
+        if not self._put(block):
+          return
+      self._put(self._EOF)
+    except Exception as e:
+      self._put(e)
+
+  def _next_block(self):
+    item = self._blocks.get()
+    if item is self._EOF:
+      self._exhausted = True
+      return False
+    if isinstance(item, Exception):
+      self._exhausted = True
+      raise item
+    self._current = item
+    self._offset = 0
+    return True
+
+  def read(self, size=-1):
+    chunks = []
+    remaining = size
+    while remaining != 0:
+      if self._offset >= len(self._current):
+        if self._exhausted or not self._next_block():
+          break
+      if remaining < 0:
+        end = len(self._current)
+      else:
+        end = min(len(self._current), self._offset + remaining)
+        remaining -= end - self._offset
+      chunks.append(self._current[self._offset:end])
+      self._offset = end
+    return b''.join(chunks)
+
+  def close(self):
+    self._closed.set()
+    self._thread.join()
+    self._gzip.close()
@@ -5,6 +5,7 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import threading
 import urlparse
 from collections import Counter, deque
 from contextlib import contextmanager
@@ -88,6 +89,17 @@ class BestUrlSelector(object):
     self.parsed_urls = deque(self._parse_urls(available_urls))
     self.unsuccessful_calls = Counter()
     self.max_failures = max_failures
+    self._lock = threading.Lock()
+
+  def __getstate__(self):
+    # Selectors are pickled to be sent to subprocesses, but locks cannot be.
+    state = self.__dict__.copy()
+    del state['_lock']
+    return state
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self._lock = threading.Lock()
 
   def _parse_urls(self, urls):
     parsed_urls = [urlparse.urlparse(url) for url in urls]
@@ -112,12 +124,15 @@ class BestUrlSelector(object):
     try:
       yield best_url
     except Exception:
-      self.unsuccessful_calls[best_url] += 1
-
-      # Not thread-safe but pool used by cache is based on subprocesses, therefore no race.
-      if self.unsuccessful_calls[best_url] > self.max_failures:
-        self.parsed_urls.rotate(-1)
-        self.unsuccessful_calls[best_url] = 0
+      # Requests may be made concurrently from multiple threads: see RESTfulArtifactCache.has_many.
+      with self._lock:
+        self.unsuccessful_calls[best_url] += 1
+        failed_too_often = self.unsuccessful_calls[best_url] > self.max_failures
+        # Another thread may already have rotated past this url.
+        if failed_too_often and best_url == self.parsed_urls[0]:
+          self.parsed_urls.rotate(-1)
+          self.unsuccessful_calls[best_url] = 0
       raise
     else:
-      self.unsuccessful_calls[best_url] = 0
+      with self._lock:
+        self.unsuccessful_calls[best_url] = 0
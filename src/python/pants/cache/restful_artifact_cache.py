@@ -9,9 +9,11 @@ import logging
 import multiprocessing
 import Queue
 import threading
+from multiprocessing.pool import ThreadPool
 
 import requests
 from requests import RequestException
+from requests.adapters import HTTPAdapter
 
 from pants.cache.artifact_cache import ArtifactCache, NonfatalArtifactCacheError, UnreadableArtifact
 
@@ -26,10 +28,18 @@ logging.getLogger('requests').setLevel(logging.WARNING)
 class RequestsSession(object):
   _session = None
 
+  # The number of connections to keep alive per cache host. This should be at least as large as
+  # the concurrency of requests made by `RESTfulArtifactCache.has_many`.
+  _max_connections = 64
+
   @classmethod
   def instance(cls):
     if cls._session is None:
-      cls._session = requests.Session()
+      session = requests.Session()
+      adapter = HTTPAdapter(pool_maxsize=cls._max_connections)
+      session.mount('http://', adapter)
+      session.mount('https://', adapter)
+      cls._session = session
     return cls._session
 
 
@@ -38,19 +48,42 @@ class RESTfulArtifactCache(ArtifactCache):
 
   READ_SIZE_BYTES = 4 * 1024 * 1024
 
-  def __init__(self, artifact_root, best_url_selector, local):
+  def __init__(self, artifact_root, best_url_selector, local, max_concurrency=16, spool=None):
     """
     :param string artifact_root: The path under which cacheable products will be read/written.
     :param BestUrlSelector best_url_selector: Url selector that supports fail-over. Each returned
       url represents prefix for some RESTful service. We must be able to PUT and GET to any path
       under this base.
     :param BaseLocalArtifactCache local: local cache instance for storing and creating artifacts
+    :param int max_concurrency: The maximum number of concurrent requests made when checking for
+      many artifacts at once.
+    :param UploadSpool spool: If set, artifacts are enqueued here to be uploaded asynchronously,
+      rather than being uploaded during `insert`.
     """
     super(RESTfulArtifactCache, self).__init__(artifact_root)
 
     self.best_url_selector = best_url_selector
     self._timeout_secs = 4.0
     self._localcache = local
+    self._max_concurrency = max_concurrency
+    self._spool = spool
+
+  def insert(self, cache_key, paths, overwrite=False):
+    if self._spool is None:
+      return super(RESTfulArtifactCache, self).insert(cache_key, paths, overwrite=overwrite)
+
+    # When spooling, whether the remote already holds the artifact is checked by the uploader,
+    # so that no network I/O happens here.
+    self._check_paths_exist(paths)
+    try:
+      with self._localcache.insert_paths(cache_key, paths) as tarfile:
+        with self.best_url_selector.select_best_url() as best_url:
+          url = self._url_for_key(best_url, cache_key)
+        self._spool.enqueue(url, tarfile, overwrite=overwrite)
+      return True
+    except (NonfatalArtifactCacheError, IOError, OSError) as e:
+      logger.error('Error while spooling artifact for upload: {0}'.format(e))
+      return False
 
   def try_insert(self, cache_key, paths):
     # Delegate creation of artifact to local cache.
@@ -65,6 +98,33 @@ class RESTfulArtifactCache(ArtifactCache):
       return True
     return self._request('HEAD', cache_key) is not None
 
+  def has_many(self, cache_keys):
+    """Check for many keys at once, issuing up to `max_concurrency` HEAD requests concurrently.
+
+    Keys that could not be checked due to a remote error are reported as present, so that the
+    error surfaces (and is accounted for) when the artifact is subsequently read.
+    """
+    results = self._localcache.has_many(cache_keys)
+    remote_indexes = [i for i, present in enumerate(results) if not present]
+    if remote_indexes:
+      def remote_has(cache_key):
+        try:
+          return self._request('HEAD', cache_key) is not None
+        except NonfatalArtifactCacheError as e:
+          logger.debug('Error while checking remote artifact cache for {0}: {1}'
+                       .format(cache_key, e))
+          return True
+
+      pool = ThreadPool(processes=min(self._max_concurrency, len(remote_indexes)))
+      try:
+        remote_results = pool.map(remote_has, [cache_keys[i] for i in remote_indexes])
+      finally:
+        pool.close()
+        pool.join()
+      for i, present in zip(remote_indexes, remote_results):
+        results[i] = present
+    return results
+
   def use_cached_files(self, cache_key, results_dir=None):
     if self._localcache.has(cache_key):
       return self._localcache.use_cached_files(cache_key, results_dir)
@@ -0,0 +1,255 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import errno
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+import uuid
+
+from fasteners import InterProcessLock
+from requests import RequestException
+
+from pants.cache.restful_artifact_cache import RequestsSession
+from pants.util.dirutil import safe_concurrent_creation, safe_delete, safe_mkdir
+from pants.util.process_handler import subprocess
+
+
+logger = logging.getLogger(__name__)
+
+
+class _ThrottledFile(object):
+  """A read-only file wrapper that limits the rate at which it can be read."""
+
+  def __init__(self, fp, size, bytes_per_second):
+    self._fp = fp
+    self._size = size
+    self._bytes_per_second = bytes_per_second
+    self._start = time.time()
+    self._read = 0
+
+  def __len__(self):
+    # Allows requests to send a Content-Length header rather than a chunked body.
+    return self._size
+
+  def read(self, size=-1):
+    data = self._fp.read(size)
+    self._read += len(data)
+    if self._bytes_per_second:
+      ahead = self._read / self._bytes_per_second - (time.time() - self._start)
+      if ahead > 0:
+        time.sleep(ahead)
+    return data
+
+
+class UploadSpool(object):
+  """An on-disk queue of artifacts waiting to be uploaded to a RESTful artifact cache.
+
+  Builds enqueue artifact tarballs here instead of uploading them, so that they can finish as
+  soon as their local outputs exist. The spool is drained with retries by the pantsd
+  `ArtifactUploadService` when pantsd is enabled, and otherwise by a detached uploader process
+  (see `launch_uploader`). Entries survive the exit of the process that created them.
+
+  Each entry is a tarball and a json metadata file describing where and how to upload it. The
+  metadata file is written last, so only entries with metadata are visible to drainers.
+  """
+
+  # The maximum delay between attempts to upload an entry.
+  MAX_BACKOFF_SECONDS = 60
+
+  _uploaders_launched = set()
+
+  @staticmethod
+  def location(pants_workdir):
+    """Returns the spool directory used for the given workdir."""
+    return os.path.join(pants_workdir, 'artifact_upload_spool')
+
+  def __init__(self, spool_dir, timeout=60.0, max_attempts=5, bytes_per_second=0):
+    """
+    :param str spool_dir: The directory to store pending uploads in.
+    :param float timeout: The timeout in seconds for each upload request of enqueued entries.
+    :param int max_attempts: The number of times to attempt to upload an enqueued entry before
+                             dropping it.
+    :param int bytes_per_second: The maximum upload rate of enqueued entries, or 0 for no limit.
+    """
+    self._spool_dir = spool_dir
+    self._entries_dir = os.path.join(spool_dir, 'entries')
+    self._timeout = timeout
+    self._max_attempts = max_attempts
+    self._bytes_per_second = bytes_per_second
+
+  @property
+  def spool_dir(self):
+    return self._spool_dir
+
+  def enqueue(self, url, tarball, overwrite=False):
+    """Add a copy of the given tarball to the spool, to be PUT to the given url.
+
+    :param str url: The url to upload the tarball to.
+    :param str tarball: The path of the tarball to upload. It may be deleted once this returns.
+    :param bool overwrite: Upload the tarball even if the url already holds an artifact.
+    """
+    safe_mkdir(self._entries_dir)
+    entry = os.path.join(self._entries_dir, '{:020.6f}-{}'.format(time.time(), uuid.uuid4().hex))
+    try:
+      os.link(tarball, entry + '.tgz')
+    except OSError as e:
+      if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+        raise
+      shutil.copyfile(tarball, entry + '.tgz')
+    self._write_metadata(entry, {
+      'url': url,
+      'overwrite': overwrite,
+      'timeout': self._timeout,
+      'max_attempts': self._max_attempts,
+      'bytes_per_second': self._bytes_per_second,
+      'attempts': 0,
+      'next_attempt': 0,
+    })
+
+  def pending(self):
+    """Returns the number of entries waiting to be uploaded."""
+    return len(self._entries())
+
+  def drain(self, stop=None):
+    """Attempt to upload each entry that is due, if no other process is draining this spool.
+
+    :param func stop: An optional function returning True if draining should stop early.
+    :returns: The number of seconds until the next entry is due, 0 if entries may be due now, or
+              None if the spool is empty.
+    :rtype: float
+    """
+    safe_mkdir(self._spool_dir)
+    lock = InterProcessLock(os.path.join(self._spool_dir, 'drain.lock'))
+    if not lock.acquire(blocking=False):
+      # Another process is draining: we are not responsible for any entries right now.
+      return 0
+    try:
+      for entry in self._entries():
+        if stop and stop():
+          return 0
+        self._maybe_upload(entry)
+
+      due = [metadata['next_attempt'] for metadata in
+             (self._read_metadata(entry) for entry in self._entries()) if metadata]
+      if not due:
+        return None
+      return max(0, min(due) - time.time())
+    finally:
+      lock.release()
+
+  def _entries(self):
+    try:
+      names = os.listdir(self._entries_dir)
+    except OSError as e:
+      if e.errno != errno.ENOENT:
+        raise
+      return []
+    return sorted(os.path.join(self._entries_dir, name[:-len('.json')])
+                  for name in names if name.endswith('.json'))
+
+  def _read_metadata(self, entry):
+    try:
+      with open(entry + '.json', 'r') as fp:
+        return json.load(fp)
+    except (IOError, ValueError):
+      return None
+
+  def _write_metadata(self, entry, metadata):
+    with safe_concurrent_creation(entry + '.json') as tmp_metadata:
+      with open(tmp_metadata, 'w') as fp:
+        json.dump(metadata, fp)
+
+  def _remove(self, entry):
+    safe_delete(entry + '.json')
+    safe_delete(entry + '.tgz')
+
+  def _maybe_upload(self, entry):
+    metadata = self._read_metadata(entry)
+    if metadata is None or not os.path.isfile(entry + '.tgz'):
+      logger.warn('Dropping invalid artifact upload spool entry {}'.format(entry))
+      self._remove(entry)
+      return
+    if metadata['next_attempt'] > time.time():
+      return
+
+    try:
+      self._upload(entry + '.tgz', metadata)
+    except (RequestException, IOError) as e:
+      metadata['attempts'] += 1
+      if metadata['attempts'] >= metadata['max_attempts']:
+        logger.warn('Giving up uploading {} after {} attempts: {}'
+                    .format(metadata['url'], metadata['attempts'], e))
+        self._remove(entry)
+      else:
+        logger.debug('Failed to upload {}, will retry: {}'.format(metadata['url'], e))
+        backoff = min(self.MAX_BACKOFF_SECONDS, 2 ** metadata['attempts'])
+        metadata['next_attempt'] = time.time() + backoff
+        self._write_metadata(entry, metadata)
+    else:
+      self._remove(entry)
+
+  def _upload(self, tarball, metadata):
+    session = RequestsSession.instance()
+    url = metadata['url']
+    timeout = metadata['timeout']
+    if not metadata['overwrite']:
+      response = session.head(url, timeout=timeout)
+      if int(response.status_code / 100) == 2:
+        logger.debug('Skipping upload of existing artifact {}'.format(url))
+        return
+    with open(tarball, 'rb') as fp:
+      body = _ThrottledFile(fp, os.path.getsize(tarball), metadata['bytes_per_second'])
+      response = session.put(url, data=body, timeout=timeout)
+    if int(response.status_code / 100) != 2:
+      raise IOError('Failed to PUT {}: {} {}'.format(url, response.status_code, response.reason))
+
+  def launch_uploader(self):
+    """Launch a detached process to drain the spool, unless one was already launched by us.
+
+    The uploader drains the spool until it is empty and the launching process has exited.
+    """
+    if self._spool_dir in self._uploaders_launched:
+      return
+    self._uploaders_launched.add(self._spool_dir)
+    safe_mkdir(self._spool_dir)
+    env = os.environ.copy()
+    env[b'PYTHONPATH'] = os.pathsep.join(sys.path)
+    with open(os.devnull, 'r') as devnull, \
+         open(os.path.join(self._spool_dir, 'uploader.log'), 'a') as log:
+      subprocess.Popen([sys.executable, '-m', __name__, self._spool_dir, str(os.getpid())],
+                       env=env,
+                       stdin=devnull,
+                       stdout=log,
+                       stderr=log,
+                       close_fds=True,
+                       preexec_fn=os.setsid)
+
+
+def _is_alive(pid):
+  try:
+    os.kill(pid, 0)
+    return True
+  except OSError as e:
+    return e.errno == errno.EPERM
+
+
+def _run_uploader(spool_dir, parent_pid, poll_interval=1.0):
+  spool = UploadSpool(spool_dir)
+  while True:
+    next_due = spool.drain()
+    if next_due is None and not _is_alive(parent_pid):
+      return
+    time.sleep(min(poll_interval, next_due or poll_interval))
+
+
+if __name__ == '__main__':
+  logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+  _run_uploader(sys.argv[1], int(sys.argv[2]))
@@ -34,7 +34,7 @@ class LegacyPythonCallbacksParser(Parser):
   macros and target factories.
   """
 
-  def __init__(self, symbol_table, aliases, build_file_imports_behavior):
+  def __init__(self, symbol_table, aliases, build_file_imports_behavior, build_file_compiler=None):
     """
     :param symbol_table: A SymbolTable for this parser, which will be overlaid with the given
       additional aliases.
@@ -44,10 +44,14 @@ class LegacyPythonCallbacksParser(Parser):
     :param build_file_imports_behavior: How to behave if a BUILD file being parsed tries to use
       import statements. Valid values: "allow", "warn", "error".
     :type build_file_imports_behavior: string
+    :param build_file_compiler: An optional BuildFileCompiler to compile (and cache) BUILD files
+      with.
+    :type build_file_compiler: :class:`pants.build_graph.build_file_compiler.BuildFileCompiler`
     """
     super(LegacyPythonCallbacksParser, self).__init__()
     self._symbols, self._parse_context = self._generate_symbols(symbol_table, aliases)
     self._build_file_imports_behavior = build_file_imports_behavior
+    self._build_file_compiler = build_file_compiler
 
   @staticmethod
   def _generate_symbols(symbol_table, aliases):
@@ -127,7 +131,10 @@ class LegacyPythonCallbacksParser(Parser):
     return symbols, parse_context
 
   def parse(self, filepath, filecontent):
-    python = filecontent
+    if self._build_file_compiler:
+      python = self._build_file_compiler.compile_source(filepath, filecontent)
+    else:
+      python = filecontent
 
     # Mutate the parse context for the new path, then exec, and copy the resulting objects.
     # We execute with a (shallow) clone of the symbols as a defense against accidental
@@ -142,8 +149,8 @@ class LegacyPythonCallbacksParser(Parser):
     # Note that this is incredibly poor sandboxing. There are many ways to get around it.
     # But it's sufficient to tell most users who aren't being actively malicious that they're doing
     # something wrong, and it has a low performance overhead.
-    if self._build_file_imports_behavior != 'allow' and 'import' in python:
-      for token in tokenize.generate_tokens(StringIO(python).readline):
+    if self._build_file_imports_behavior != 'allow' and 'import' in filecontent:
+      for token in tokenize.generate_tokens(StringIO(filecontent).readline):
         if token[1] == 'import':
           line_being_tokenized = token[4]
           if self._build_file_imports_behavior == 'warn':
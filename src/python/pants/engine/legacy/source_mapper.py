@@ -6,6 +6,8 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+import threading
+from bisect import bisect_left
 
 import six
 
@@ -33,19 +35,72 @@ def resolve_and_parse_specs(*args, **kwargs):
 
 
 class EngineSourceMapper(SourceMapper):
-  """A v2 engine backed SourceMapper that supports pre-`BuildGraph` cache warming in the daemon."""
+  """A v2 engine backed SourceMapper that supports pre-`BuildGraph` cache warming in the daemon.
+
+  The targets declared in each directory are indexed in-process as they are hydrated, so that a
+  long-lived instance (e.g. the one held by pantsd) only needs to hydrate directories it has not
+  seen since they were last invalidated via `invalidate_files`.
+  """
 
   def __init__(self, scheduler):
     self._scheduler = scheduler
-
-  def _unique_dirs_for_sources(self, sources):
-    """Given an iterable of sources, yield unique dirname'd paths."""
-    seen = set()
+    # A dict from a directory to a tuple of the `HydratedTarget`s declared directly in it.
+    self._targets_by_dir = {}
+    self._lock = threading.Lock()
+
+  @staticmethod
+  def _ascendant_dirs_for_sources(sources):
+    """Given an iterable of sources, return the unique directories containing or above them."""
+    dirs = set()
     for source in sources:
-      source_dir = os.path.dirname(source)
-      if source_dir not in seen:
-        seen.add(source_dir)
-        yield source_dir
+      directory = os.path.dirname(source)
+      while directory not in dirs:
+        dirs.add(directory)
+        if not directory:
+          break
+        directory = os.path.dirname(directory)
+    return dirs
+
+  def invalidate_files(self, filenames):
+    """Drops the indexed targets of any directory that the given changed files may affect.
+
+    :param iterable filenames: Changed paths relative to the build root.
+    """
+    with self._lock:
+      for filename in filenames:
+        self._targets_by_dir.pop(filename, None)
+        self._targets_by_dir.pop(os.path.dirname(filename), None)
+
+  def _targets_in_dirs(self, dirs):
+    """Returns the `HydratedTarget`s declared in the given directories, hydrating unindexed ones.
+
+    :param set dirs: A set of directories, which must contain all of the ancestors of its members.
+    """
+    with self._lock:
+      missing_dirs = [d for d in dirs if d not in self._targets_by_dir]
+      if missing_dirs:
+        # The AscendantAddresses of each missing directory cover every target declared in it.
+        specs = tuple(AscendantAddresses(directory=d) for d in missing_dirs)
+        hydrated_targets, = self._scheduler.product_request(HydratedTargets, [Specs(specs)])
+        targets_by_missing_dir = {d: set() for d in missing_dirs}
+        for hydrated_target in hydrated_targets.dependencies:
+          spec_path = hydrated_target.adaptor.address.spec_path
+          if spec_path in targets_by_missing_dir:
+            targets_by_missing_dir[spec_path].add(hydrated_target)
+        for directory, targets in six.iteritems(targets_by_missing_dir):
+          self._targets_by_dir[directory] = tuple(targets)
+      return [t for d in dirs for t in self._targets_by_dir[d]]
+
+  @staticmethod
+  def _sources_under(sorted_sources, directory):
+    """Returns the sources in the given directory or beneath it, from a sorted list of sources."""
+    if not directory:
+      return sorted_sources
+    # All of the paths beneath the directory sort between its path with a trailing separator, and
+    # its path followed by the character after the separator.
+    start = bisect_left(sorted_sources, directory + os.sep)
+    end = bisect_left(sorted_sources, directory + chr(ord(os.sep) + 1))
+    return sorted_sources[start:end]
 
   def target_addresses_for_source(self, source):
     return list(self.iter_target_addresses_for_sources([source]))
@@ -79,17 +134,17 @@ class EngineSourceMapper(SourceMapper):
     """Bulk, iterable form of `target_addresses_for_source`."""
     # Walk up the buildroot looking for targets that would conceivably claim changed sources.
     sources_set = set(sources)
-    specs = tuple(AscendantAddresses(directory=d) for d in self._unique_dirs_for_sources(sources_set))
+    sorted_sources = sorted(sources_set)
+    hydrated_targets = self._targets_in_dirs(self._ascendant_dirs_for_sources(sources_set))
 
-    # Uniqify all transitive hydrated targets.
-    hydrated_target_to_address = {}
-    hydrated_targets, = self._scheduler.product_request(HydratedTargets, [Specs(specs)])
-    for hydrated_target in hydrated_targets.dependencies:
-      if hydrated_target not in hydrated_target_to_address:
-        hydrated_target_to_address[hydrated_target] = hydrated_target.adaptor.address
-
-    for hydrated_target, legacy_address in six.iteritems(hydrated_target_to_address):
+    for hydrated_target in hydrated_targets:
+      legacy_address = hydrated_target.adaptor.address
       # Handle BUILD files.
-      if (LegacyAddressMapper.any_is_declaring_file(legacy_address, sources_set) or
-          self._owns_any_source(sources_set, hydrated_target)):
+      if LegacyAddressMapper.any_is_declaring_file(legacy_address, sources_set):
+        yield legacy_address
+        continue
+      # A target can only own sources beneath its own directory, so only those are matched against
+      # its sources, rather than all of the sources for every target.
+      candidate_sources = self._sources_under(sorted_sources, legacy_address.spec_path)
+      if candidate_sources and self._owns_any_source(set(candidate_sources), hydrated_target):
         yield legacy_address
@@ -6,6 +6,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+import time
 from collections import defaultdict
 
 from pants.util.dirutil import safe_mkdir_for
@@ -15,13 +16,19 @@ class AggregatedTimings(object):
   """Aggregates timings over multiple invocations of 'similar' work.
 
   If filepath is not none, stores the timings in that file. Useful for finding bottlenecks.
+
+  The file is rewritten at most once per `write_interval` seconds as timings are added, and
+  must be `flush`ed once the last timing has been added.
   """
 
-  def __init__(self, path=None):
+  def __init__(self, path=None, write_interval=1.0):
     # Map path -> timing in seconds (a float)
     self._timings_by_path = defaultdict(float)
     self._tool_labels = set()
     self._path = path
+    self._write_interval = write_interval
+    self._last_write_time = None
+    self._dirty = False
     if path:
       safe_mkdir_for(self._path)
 
@@ -34,11 +41,25 @@ class AggregatedTimings(object):
     self._timings_by_path[label] += secs
     if is_tool:
       self._tool_labels.add(label)
+    if self._path:
+      self._dirty = True
+      now = time.time()
+      if self._last_write_time is None or now - self._last_write_time >= self._write_interval:
+        self._write(now)
+
+  def flush(self):
+    """Writes any timings added since the file was last written."""
+    if self._dirty:
+      self._write(time.time())
+
+  def _write(self, now):
     # Check existence in case we're a clean-all. We don't want to write anything in that case.
-    if self._path and os.path.exists(os.path.dirname(self._path)):
+    if os.path.exists(os.path.dirname(self._path)):
       with open(self._path, 'w') as f:
         for x in self.get_all():
           f.write('{label}: {timing}\n'.format(**x))
+    self._last_write_time = now
+    self._dirty = False
 
   def get_all(self):
     """Returns all the timings, sorted in decreasing order.
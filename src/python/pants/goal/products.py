@@ -35,6 +35,9 @@ class UnionProducts(object):
     """
     # A map of target to OrderedSet of product members.
     self._products_by_target = products_by_target or defaultdict(OrderedSet)
+    # The targets whose OrderedSets are not shared with any copies of this UnionProducts, and so
+    # can be updated in place.
+    self._owned_targets = set(self._products_by_target)
 
   def copy(self):
     """Returns a copy of this UnionProducts.
@@ -43,21 +46,32 @@ class UnionProducts(object):
     The copy is shallow though, so edits to the copy's product values will mutate the original's
     product values.
 
+    The copy shares each target's set of products with the original until either of them edits it.
+
     :API: public
 
     :rtype: :class:`UnionProducts`
     """
-    products_by_target = defaultdict(OrderedSet)
-    for key, value in self._products_by_target.items():
-      products_by_target[key] = OrderedSet(value)
-    return UnionProducts(products_by_target=products_by_target)
+    products_by_target = defaultdict(OrderedSet, self._products_by_target)
+    copied = UnionProducts(products_by_target=products_by_target)
+    copied._owned_targets = set()
+    self._owned_targets = set()
+    return copied
+
+  def _products_for_update(self, target):
+    products = self._products_by_target.get(target)
+    if products is None or target not in self._owned_targets:
+      products = OrderedSet(products or ())
+      self._products_by_target[target] = products
+      self._owned_targets.add(target)
+    return products
 
   def add_for_target(self, target, products):
     """Updates the products for a particular target, adding to existing entries.
 
     :API: public
     """
-    self._products_by_target[target].update(products)
+    self._products_for_update(target).update(products)
 
   def add_for_targets(self, targets, products):
     """Updates the products for the given targets, adding to existing entries.
@@ -73,8 +87,9 @@ class UnionProducts(object):
 
     :API: public
     """
+    target_products = self._products_for_update(target)
     for product in products:
-      self._products_by_target[target].discard(product)
+      target_products.discard(product)
 
   def get_for_target(self, target):
     """Gets the products for the given target.
@@ -400,6 +400,9 @@ class RunTracker(Subsystem):
       pass
 
     self.end_workunit(self._main_root_workunit)
+    with self._stats_lock:
+      self.cumulative_timings.flush()
+      self.self_timings.flush()
 
     outcome = self._main_root_workunit.outcome()
     if self._background_root_workunit:
@@ -7,15 +7,19 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import errno
 import hashlib
+import multiprocessing
 import os
+import sqlite3
+import threading
 from abc import abstractmethod
 from collections import namedtuple
+from contextlib import contextmanager
 
 from pants.base.hash_utils import hash_all
 from pants.build_graph.target import Target
 from pants.fs.fs import safe_filename
 from pants.subsystem.subsystem import Subsystem
-from pants.util.dirutil import safe_mkdir
+from pants.util.dirutil import safe_delete, safe_mkdir
 from pants.util.meta import AbstractClass
 
 
@@ -95,11 +99,10 @@ class CacheKeyGenerator(CacheKeyGeneratorInterface):
     hasher.update(GLOBAL_CACHE_KEY_GEN_VERSION)
     for base_fingerprint_input in base_fingerprint_inputs:
       hasher.update(base_fingerprint_input)
-    self._base_hasher = hasher
+    self._key_suffix = hasher.hexdigest()[:12]
 
   def key_for_target(self, target, transitive=False, fingerprint_strategy=None):
-    hasher = self._base_hasher.copy()
-    key_suffix = hasher.hexdigest()[:12]
+    key_suffix = self._key_suffix
     if transitive:
       target_key = target.transitive_invalidation_hash(fingerprint_strategy)
     else:
@@ -127,6 +130,13 @@ class BuildInvalidator(object):
   class Factory(Subsystem):
     options_scope = 'build-invalidator'
 
+    @classmethod
+    def register_options(cls, register):
+      super(BuildInvalidator.Factory, cls).register_options(register)
+      register('--workers', type=int, default=multiprocessing.cpu_count(), advanced=True,
+               help='The number of threads to fingerprint targets and create their results dirs '
+                    'on when checking them for invalidation.')
+
     @classmethod
     def create(cls, build_task=None):
       """Creates a build invalidator optionally scoped to a task.
@@ -147,6 +157,13 @@ class BuildInvalidator(object):
     """
     return cache_key.cacheable
 
+  # The name of the sqlite database, within the invalidator's root, that stores the valid hash of
+  # each target set.
+  _DB_NAME = 'hashes.db'
+
+  # The maximum number of keys to look up per query in `previous_keys`.
+  _BATCH_SIZE = 500
+
   def __init__(self, root, scope=None):
     """Create a build invalidator using the given root fingerprint database directory.
 
@@ -157,22 +174,43 @@ class BuildInvalidator(object):
     if scope:
       root = os.path.join(root, scope)
     self._root = root
+    self._db_path = os.path.join(self._root, self._DB_NAME)
+    self._lock = threading.RLock()
+    self._conn = None
+    self._conn_identity = None
     safe_mkdir(self._root)
 
+  def __getstate__(self):
+    state = self.__dict__.copy()
+    state['_lock'] = None
+    state['_conn'] = None
+    state['_conn_identity'] = None
+    return state
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self._lock = threading.RLock()
+
   def previous_key(self, cache_key):
     """If there was a previous successful build for the given key, return the previous key.
 
     :param cache_key: A CacheKey object (as returned by CacheKeyGenerator.key_for().
     :returns: The previous cache_key, or None if there was not a previous build.
     """
-    if not self.cacheable(cache_key):
-      # We should never successfully cache an uncacheable CacheKey.
-      return None
+    return self.previous_keys([cache_key])[0]
 
-    previous_hash = self._read_sha(cache_key)
-    if not previous_hash:
-      return None
-    return CacheKey(cache_key.id, previous_hash)
+  def previous_keys(self, cache_keys):
+    """Like `previous_key`, but for many keys at once.
+
+    :param list cache_keys: A list of CacheKey objects.
+    :returns: A list of the previous cache_key (or None) for each given key, in order.
+    """
+    previous_hashes = self._read_shas([cache_key for cache_key in cache_keys
+                                       if self.cacheable(cache_key)])
+    # We should never successfully cache an uncacheable CacheKey.
+    return [CacheKey(cache_key.id, previous_hashes[cache_key.id])
+            if self.cacheable(cache_key) and previous_hashes.get(cache_key.id) else None
+            for cache_key in cache_keys]
 
   def needs_update(self, cache_key):
     """Check if the given cached item is invalid.
@@ -184,47 +222,121 @@ class BuildInvalidator(object):
       # An uncacheable CacheKey is always out of date.
       return True
 
-    return self._read_sha(cache_key) != cache_key.hash
+    return self._read_shas([cache_key]).get(cache_key.id) != cache_key.hash
 
   def update(self, cache_key):
     """Makes cache_key the valid version of the corresponding target set.
 
     :param cache_key: A CacheKey object (typically returned by CacheKeyGenerator.key_for()).
     """
-    if self.cacheable(cache_key):
-      self._write_sha(cache_key)
+    self.update_all([cache_key])
+
+  def update_all(self, cache_keys):
+    """Makes each of the given cache_keys the valid version of its corresponding target set.
+
+    :param list cache_keys: A list of CacheKey objects.
+    """
+    rows = [(self._db_key_by_id(cache_key.id), cache_key.hash)
+            for cache_key in cache_keys if self.cacheable(cache_key)]
+    if rows:
+      with self._transaction() as conn:
+        conn.executemany('INSERT OR REPLACE INTO hashes VALUES (?, ?)', rows)
 
   def force_invalidate_all(self):
     """Force-invalidates all cached items."""
-    safe_mkdir(self._root, clean=True)
+    with self._lock:
+      self._close()
+      safe_mkdir(self._root, clean=True)
 
   def force_invalidate(self, cache_key):
     """Force-invalidate the cached item."""
-    try:
-      if self.cacheable(cache_key):
-        os.unlink(self._sha_file(cache_key))
-    except OSError as e:
-      if e.errno != errno.ENOENT:
+    if self.cacheable(cache_key):
+      with self._transaction() as conn:
+        conn.execute('DELETE FROM hashes WHERE key = ?', (self._db_key_by_id(cache_key.id),))
+
+  def _db_key_by_id(self, id):
+    # Target set ids are keyed by the name of the file their hash was stored in before hashes were
+    # stored in a database, which allows those files to be migrated exactly.
+    return safe_filename(id, extension='.hash')
+
+  def _read_shas(self, cache_keys):
+    """Returns a dict from the id of each of the given keys to its stored hash, if any."""
+    id_by_db_key = {self._db_key_by_id(cache_key.id): cache_key.id for cache_key in cache_keys}
+    db_keys = list(id_by_db_key)
+    shas = {}
+    if not db_keys:
+      return shas
+    with self._transaction() as conn:
+      for i in range(0, len(db_keys), self._BATCH_SIZE):
+        batch = db_keys[i:i + self._BATCH_SIZE]
+        query = 'SELECT key, hash FROM hashes WHERE key IN ({})'.format(', '.join('?' * len(batch)))
+        for db_key, sha in conn.execute(query, batch):
+          shas[id_by_db_key[db_key]] = sha
+    return shas
+
+  @contextmanager
+  def _transaction(self):
+    with self._lock:
+      conn = self._connection()
+      conn.execute('BEGIN')
+      try:
+        yield conn
+      except Exception:
+        conn.execute('ROLLBACK')
         raise
-
-  def _sha_file(self, cache_key):
-    return self._sha_file_by_id(cache_key.id)
-
-  def _sha_file_by_id(self, id):
-    return os.path.join(self._root, safe_filename(id, extension='.hash'))
-
-  def _write_sha(self, cache_key):
-    with open(self._sha_file(cache_key), 'w') as fd:
-      fd.write(cache_key.hash)
-
-  def _read_sha(self, cache_key):
-    return self._read_sha_by_id(cache_key.id)
-
-  def _read_sha_by_id(self, id):
+      else:
+        conn.execute('COMMIT')
+
+  def _connection(self):
+    # The database is deleted by `force_invalidate_all` of this invalidator or of an enclosing
+    # (e.g. the global) invalidator: reconnect if it was replaced since we connected.
+    identity = self._db_identity()
+    if self._conn is None or identity is None or identity != self._conn_identity:
+      self._close()
+      safe_mkdir(self._root)
+      conn = sqlite3.connect(self._db_path, timeout=60, isolation_level=None,
+                             check_same_thread=False)
+      # The write-ahead log avoids an fsync per update: a lost update only causes a rebuild.
+      conn.execute('PRAGMA journal_mode = WAL')
+      conn.execute('PRAGMA synchronous = NORMAL')
+      conn.execute('CREATE TABLE IF NOT EXISTS hashes (key TEXT PRIMARY KEY, hash TEXT)')
+      self._migrate_hash_files(conn)
+      self._conn = conn
+      self._conn_identity = self._db_identity()
+    return self._conn
+
+  def _db_identity(self):
+    # Inodes may be reused by a replacement file, but its ctime will differ.
     try:
-      with open(self._sha_file_by_id(id), 'rb') as fd:
-        return fd.read().strip()
-    except IOError as e:
+      stat = os.stat(self._db_path)
+    except OSError as e:
       if e.errno != errno.ENOENT:
         raise
-      return None  # File doesn't exist.
+      return None
+    return stat.st_ino, stat.st_ctime
+
+  def _close(self):
+    if self._conn is not None:
+      self._conn.close()
+      self._conn = None
+      self._conn_identity = None
+
+  def _migrate_hash_files(self, conn):
+    """Moves the hashes stored one per file by older versions of pants into the database."""
+    hash_files = [name for name in os.listdir(self._root) if name.endswith('.hash')]
+    if not hash_files:
+      return
+    rows = []
+    for name in hash_files:
+      try:
+        with open(os.path.join(self._root, name), 'rb') as fd:
+          rows.append((name, fd.read().strip().decode('utf-8')))
+      except IOError as e:
+        if e.errno != errno.ENOENT:
+          raise
+    conn.execute('BEGIN')
+    # Hashes written by a concurrent pants run of the new version take precedence.
+    conn.executemany('INSERT OR IGNORE INTO hashes VALUES (?, ?)', rows)
+    conn.execute('COMMIT')
+    for name in hash_files:
+      safe_delete(os.path.join(self._root, name))
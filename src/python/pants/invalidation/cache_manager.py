@@ -8,11 +8,13 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import os
 import shutil
 import sys
+from contextlib import contextmanager
 from hashlib import sha1
+from multiprocessing.pool import ThreadPool
 
 from pants.build_graph.build_graph import sort_targets
 from pants.build_graph.target import Target
-from pants.invalidation.build_invalidator import CacheKey
+from pants.invalidation.build_invalidator import CacheKey, CacheKeyGenerator
 from pants.util.dirutil import relative_symlink, safe_delete, safe_mkdir, safe_rmtree
 from pants.util.memo import memoized_method
 
@@ -263,6 +265,12 @@ class InvalidationCacheManager(object):
 
   _STABLE_DIR_NAME = 'current'
 
+  # The number of targets whose cache keys are computed and checked together.
+  _CHECK_BATCH_SIZE = 500
+
+  # Below this number of targets, a pool of threads costs more than it saves.
+  _MIN_TARGETS_FOR_POOL = 16
+
   def __init__(self,
                results_dir_root,
                cache_key_generator,
@@ -272,9 +280,12 @@ class InvalidationCacheManager(object):
                invalidation_report=None,
                task_name=None,
                task_version=None,
-               artifact_write_callback=lambda _: None):
+               artifact_write_callback=lambda _: None,
+               workers=1):
     """
     :API: public
+
+    :param int workers: The number of threads to fingerprint targets and to create results dirs on.
     """
     self._cache_key_generator = cache_key_generator
     self._task_name = task_name or 'UNKNOWN'
@@ -284,6 +295,8 @@ class InvalidationCacheManager(object):
     self._fingerprint_strategy = fingerprint_strategy
     self._artifact_write_callback = artifact_write_callback
     self.invalidation_report = invalidation_report
+    self._prefetched_previous_keys = {}
+    self._workers = workers
 
     # Create the task-versioned prefix of the results dir, and a stable symlink to it
     # (useful when debugging).
@@ -296,17 +309,20 @@ class InvalidationCacheManager(object):
 
   def update(self, vts):
     """Mark a changed or invalidated VersionedTargetSet as successfully processed."""
+    updated = []
     for vt in vts.versioned_targets:
       vt.ensure_legal()
       if not vt.valid:
-        self._invalidator.update(vt.cache_key)
-        vt.valid = True
-        self._artifact_write_callback(vt)
-    if not vts.valid:
+        updated.append(vt)
+    # NB: A VersionedTarget is its own (singleton) list of versioned_targets.
+    if not vts.valid and all(vt is not vts for vt in updated):
       vts.ensure_legal()
-      self._invalidator.update(vts.cache_key)
-      vts.valid = True
-      self._artifact_write_callback(vts)
+      updated.append(vts)
+
+    self._invalidator.update_all([vt.cache_key for vt in updated])
+    for vt in updated:
+      vt.valid = True
+      self._artifact_write_callback(vt)
 
   def force_invalidate(self, vts):
     """Force invalidation of a VersionedTargetSet."""
@@ -332,6 +348,16 @@ class InvalidationCacheManager(object):
     invalid_vts = filter(lambda vt: not vt.valid, all_vts)
     return InvalidationCheck(all_vts, invalid_vts)
 
+  def create_results_dirs(self, vts):
+    """Creates the results dirs of the given VersionedTargets, concurrently if there are many."""
+    create_results_dir = lambda vt: vt.create_results_dir()
+    with self._thread_pool(len(vts)) as pool:
+      if pool:
+        pool.map(create_results_dir, vts)
+      else:
+        for vt in vts:
+          create_results_dir(vt)
+
   @property
   def task_name(self):
     return self._task_name
@@ -358,17 +384,67 @@ class InvalidationCacheManager(object):
 
     Returns a list of VersionedTargets, each representing one input target.
     """
-    def vt_iter():
-      if topological_order:
-        target_set = set(targets)
-        sorted_targets = [t for t in reversed(sort_targets(targets)) if t in target_set]
-      else:
-        sorted_targets = sorted(targets)
-      for target in sorted_targets:
-        target_key = self._key_for(target)
-        if target_key is not None:
-          yield VersionedTarget(self, target, target_key)
-    return list(vt_iter())
+    return [vt for vts in self._iter_wrapped_batches(targets, topological_order) for vt in vts]
+
+  def _iter_wrapped_batches(self, targets, topological_order):
+    if topological_order:
+      target_set = set(targets)
+      sorted_targets = [t for t in reversed(sort_targets(targets)) if t in target_set]
+    else:
+      sorted_targets = sorted(targets)
+
+    with self._thread_pool(len(sorted_targets)) as pool:
+      fingerprinted = set()
+      for start in range(0, len(sorted_targets), self._CHECK_BATCH_SIZE):
+        batch = sorted_targets[start:start + self._CHECK_BATCH_SIZE]
+        if pool:
+          self._fingerprint_concurrently(pool, batch, fingerprinted)
+        keyed_targets = [(target, self._key_for(target)) for target in batch]
+        keyed_targets = [(target, key) for target, key in keyed_targets if key is not None]
+
+        # Look up the previous keys of all of the targets in one batch, rather than one at a time
+        # as each VersionedTarget is created.
+        keys = [key for _, key in keyed_targets]
+        self._prefetched_previous_keys = dict(zip(keys, self._invalidator.previous_keys(keys)))
+        try:
+          vts = [VersionedTarget(self, target, key) for target, key in keyed_targets]
+        finally:
+          self._prefetched_previous_keys = {}
+        yield vts
+
+  @contextmanager
+  def _thread_pool(self, num_targets):
+    if self._workers > 1 and num_targets >= self._MIN_TARGETS_FOR_POOL:
+      pool = ThreadPool(processes=self._workers)
+      try:
+        yield pool
+      finally:
+        pool.close()
+        pool.join()
+    else:
+      yield None
+
+  def _fingerprint_concurrently(self, pool, targets, fingerprinted):
+    """Computes and memoizes the fingerprints of the given targets on the pool.
+
+    Fingerprinting a target, which usually means digesting its sources, is by far the most expensive
+    part of computing its key. Once the fingerprints of a target and (if dependents are invalidated)
+    of its dependencies are memoized, its key is cheap to compute serially.
+    """
+    if not isinstance(self._cache_key_generator, CacheKeyGenerator):
+      return
+    if self._invalidate_dependents:
+      targets = Target.closure_for_targets(targets)
+    pending = [target for target in targets if target not in fingerprinted]
+    fingerprinted.update(pending)
+    pool.map(self._fingerprint, pending)
+
+  def _fingerprint(self, target):
+    try:
+      target.invalidation_hash(self._fingerprint_strategy)
+    except Exception:
+      # The error is raised with a better diagnostic when the target's key is computed.
+      pass
 
   def cacheable(self, cache_key):
     """Indicates whether artifacts associated with the given `cache_key` should be cached.
@@ -379,6 +455,8 @@ class InvalidationCacheManager(object):
     return self._invalidator.cacheable(cache_key)
 
   def previous_key(self, cache_key):
+    if cache_key in self._prefetched_previous_keys:
+      return self._prefetched_previous_keys[cache_key]
     return self._invalidator.previous_key(cache_key)
 
   def _key_for(self, target):
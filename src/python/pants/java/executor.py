@@ -9,13 +9,11 @@ import logging
 import os
 import sys
 from abc import abstractmethod, abstractproperty
-from contextlib import contextmanager
 
 from six import string_types
 from twitter.common.collections import maybe_list
 
 from pants.base.build_environment import get_buildroot
-from pants.util.contextutil import environment_as
 from pants.util.dirutil import relativize_paths
 from pants.util.meta import AbstractClass
 from pants.util.process_handler import subprocess
@@ -109,9 +107,13 @@ class Executor(AbstractClass):
     """Returns the `Distribution` this executor runs via."""
     return self._distribution
 
-  def runner(self, classpath, main, jvm_options=None, args=None, cwd=None):
-    """Returns an `Executor.Runner` for the given java command."""
-    return self._runner(*self._scrub_args(classpath, main, jvm_options, args, cwd=cwd))
+  def runner(self, classpath, main, jvm_options=None, args=None, cwd=None, env=None):
+    """Returns an `Executor.Runner` for the given java command.
+
+    :param dict env: an optional environment for the java program; defaults to that of this
+      process. Executors that run programs in an already running jvm may ignore it.
+    """
+    return self._runner(*self._scrub_args(classpath, main, jvm_options, args, cwd=cwd), env=env)
 
   def execute(self, classpath, main, jvm_options=None, args=None, stdout=None, stderr=None,
       cwd=None):
@@ -131,7 +133,7 @@ class Executor(AbstractClass):
     return runner.run(stdout=stdout, stderr=stderr)
 
   @abstractmethod
-  def _runner(self, classpath, main, jvm_options, args, cwd=None):
+  def _runner(self, classpath, main, jvm_options, args, cwd=None, env=None):
     """Subclasses should return a `Runner` that can execute the given java main."""
 
   def _create_command(self, classpath, main, jvm_options, args, cwd=None):
@@ -151,7 +153,7 @@ class CommandLineGrabber(Executor):
     super(CommandLineGrabber, self).__init__(distribution=distribution)
     self._command = None  # Initialized when we run something.
 
-  def _runner(self, classpath, main, jvm_options, args, cwd=None):
+  def _runner(self, classpath, main, jvm_options, args, cwd=None, env=None):
     self._command = self._create_command(classpath, main, jvm_options, args, cwd=cwd)
 
     class Runner(self.Runner):
@@ -196,21 +198,25 @@ class SubprocessExecutor(Executor):
   }
 
   @classmethod
-  @contextmanager
-  def _maybe_scrubbed_env(cls):
+  def _scrubbed_env(cls, env=None):
+    """Returns a copy of the given environment, or of this process' environment, to run java with.
+
+    The environment of this process is never modified, since other threads may be spawning
+    processes concurrently.
+    """
+    env = dict(os.environ if env is None else env)
     for env_var in cls._SCRUBBED_ENV:
-      value = os.getenv(env_var)
+      value = env.pop(env_var, None)
       if value:
         logger.warn('Scrubbing {env_var}={value}'.format(env_var=env_var, value=value))
-    with environment_as(**cls._SCRUBBED_ENV):
-      yield
+    return env
 
   def __init__(self, distribution):
     super(SubprocessExecutor, self).__init__(distribution=distribution)
     self._buildroot = get_buildroot()
     self._process = None
 
-  def _runner(self, classpath, main, jvm_options, args, cwd=None):
+  def _runner(self, classpath, main, jvm_options, args, cwd=None, env=None):
     cwd = cwd or os.getcwd()
     command = self._create_command(classpath, main, jvm_options, args, cwd=cwd)
 
@@ -224,10 +230,11 @@ class SubprocessExecutor(Executor):
         return list(command)
 
       def spawn(_, stdout=None, stderr=None, stdin=None):
-        return self._spawn(command, cwd, stdout=stdout, stderr=stderr, stdin=stdin)
+        return self._spawn(command, cwd, stdout=stdout, stderr=stderr, stdin=stdin, env=env)
 
       def run(_, stdout=None, stderr=None, stdin=None):
-        return self._spawn(command, cwd, stdout=stdout, stderr=stderr, stdin=stdin).wait()
+        return self._spawn(command, cwd, stdout=stdout, stderr=stderr, stdin=stdin,
+                           env=env).wait()
 
     return Runner()
 
@@ -244,16 +251,16 @@ class SubprocessExecutor(Executor):
     cmd = self._create_command(*self._scrub_args(classpath, main, jvm_options, args, cwd=cwd))
     return self._spawn(cmd, cwd, **subprocess_args)
 
-  def _spawn(self, cmd, cwd, stdout=None, stderr=None, stdin=None, **subprocess_args):
+  def _spawn(self, cmd, cwd, stdout=None, stderr=None, stdin=None, env=None, **subprocess_args):
     # NB: Only stdout and stderr have non-None defaults: callers that want to capture
     # stdin should pass it explicitly.
     stdout = stdout or sys.stdout
     stderr = stderr or sys.stderr
-    with self._maybe_scrubbed_env():
-      logger.debug('Executing: {cmd} args={args} at cwd={cwd}'
-                   .format(cmd=' '.join(cmd), args=subprocess_args, cwd=cwd))
-      try:
-        return subprocess.Popen(cmd, cwd=cwd, stdin=stdin, stdout=stdout, stderr=stderr,
-                                **subprocess_args)
-      except OSError as e:
-        raise self.Error('Problem executing {0}: {1}'.format(self._distribution.java, e))
+    env = self._scrubbed_env(env)
+    logger.debug('Executing: {cmd} args={args} at cwd={cwd}'
+                 .format(cmd=' '.join(cmd), args=subprocess_args, cwd=cwd))
+    try:
+      return subprocess.Popen(cmd, cwd=cwd, stdin=stdin, stdout=stdout, stderr=stderr, env=env,
+                              **subprocess_args)
+    except OSError as e:
+      raise self.Error('Problem executing {0}: {1}'.format(self._distribution.java, e))
@@ -125,8 +125,11 @@ class NailgunExecutor(Executor, FingerprintedProcessManager):
                                       repr(java_version))]
     return digest.hexdigest()
 
-  def _runner(self, classpath, main, jvm_options, args, cwd=None):
-    """Runner factory. Called via Executor.execute()."""
+  def _runner(self, classpath, main, jvm_options, args, cwd=None, env=None):
+    """Runner factory. Called via Executor.execute().
+
+    The nailgun server is already running, so `env` is ignored.
+    """
     command = self._create_command(classpath, main, jvm_options, args)
 
     class Runner(self.Runner):
@@ -25,7 +25,7 @@ logger = logging.getLogger(__name__)
 
 def _get_runner(classpath, main, jvm_options, args, executor,
                cwd, distribution,
-               create_synthetic_jar, synthetic_jar_dir):
+               create_synthetic_jar, synthetic_jar_dir, env=None):
   """Gets the java runner for execute_java and execute_java_async."""
 
   executor = executor or SubprocessExecutor(distribution)
@@ -35,13 +35,13 @@ def _get_runner(classpath, main, jvm_options, args, executor,
     safe_cp = safe_classpath(classpath, synthetic_jar_dir)
     logger.debug('Bundling classpath {} into {}'.format(':'.join(classpath), safe_cp))
 
-  return executor.runner(safe_cp, main, args=args, jvm_options=jvm_options, cwd=cwd)
+  return executor.runner(safe_cp, main, args=args, jvm_options=jvm_options, cwd=cwd, env=env)
 
 
 def execute_java(classpath, main, jvm_options=None, args=None, executor=None,
                  workunit_factory=None, workunit_name=None, workunit_labels=None,
                  cwd=None, workunit_log_config=None, distribution=None,
-                 create_synthetic_jar=True, synthetic_jar_dir=None, stdin=None):
+                 create_synthetic_jar=True, synthetic_jar_dir=None, stdin=None, env=None):
   """Executes the java program defined by the classpath and main.
 
   If `workunit_factory` is supplied, does so in the context of a workunit.
@@ -63,13 +63,14 @@ def execute_java(classpath, main, jvm_options=None, args=None, executor=None,
     a temporary directory will be provided and cleaned up upon process exit.
   :param file stdin: The stdin handle to use: by default None, meaning that stdin will
     not be propagated into the process.
+  :param dict env: an optional environment for the java program; defaults to that of this process
 
   Returns the exit code of the java program.
   Raises `pants.java.Executor.Error` if there was a problem launching java itself.
   """
 
   runner = _get_runner(classpath, main, jvm_options, args, executor, cwd, distribution,
-                       create_synthetic_jar, synthetic_jar_dir)
+                       create_synthetic_jar, synthetic_jar_dir, env=env)
   workunit_name = workunit_name or main
 
   return execute_runner(runner,
@@ -83,7 +84,7 @@ def execute_java(classpath, main, jvm_options=None, args=None, executor=None,
 def execute_java_async(classpath, main, jvm_options=None, args=None, executor=None,
                        workunit_factory=None, workunit_name=None, workunit_labels=None,
                        cwd=None, workunit_log_config=None, distribution=None,
-                       create_synthetic_jar=True, synthetic_jar_dir=None):
+                       create_synthetic_jar=True, synthetic_jar_dir=None, env=None):
   """This is just like execute_java except that it returns a ProcessHandler rather than a return code.
 
 
@@ -104,13 +105,14 @@ def execute_java_async(classpath, main, jvm_options=None, args=None, executor=No
     classpath in its manifest.
   :param string synthetic_jar_dir: an optional directory to store the synthetic jar, if `None`
     a temporary directory will be provided and cleaned up upon process exit.
+  :param dict env: an optional environment for the java program; defaults to that of this process
 
   Returns a ProcessHandler to the java program.
   Raises `pants.java.Executor.Error` if there was a problem launching java itself.
   """
 
   runner = _get_runner(classpath, main, jvm_options, args, executor, cwd, distribution,
-                       create_synthetic_jar, synthetic_jar_dir)
+                       create_synthetic_jar, synthetic_jar_dir, env=env)
   workunit_name = workunit_name or main
 
   return execute_runner_async(runner,
@@ -222,6 +222,9 @@ class GlobalOptionsRegistrar(SubsystemClientMixin, Optionable):
                   'to process the non-erroneous subset of the input.')
     register('--cache-key-gen-version', advanced=True, default='200', recursive=True,
              help='The cache key generation. Bump this to invalidate every artifact for a scope.')
+    register('--cache-file-digests', advanced=True, type=bool, default=True,
+             help='Cache the digests of source files in the workdir, keyed by their mtime, size '
+                  'and inode, so that unchanged files are not re-read to fingerprint targets.')
     register('--workdir-max-build-entries', advanced=True, type=int, default=8,
              help='Maximum number of previous builds to keep per task target pair in workdir. '
              'If set, minimum 2 will always be kept to support incremental compilation.')
@@ -17,6 +17,7 @@ from pants.base.build_environment import get_buildroot
 from pants.base.exiter import Exiter
 from pants.bin.daemon_pants_runner import DaemonExiter, DaemonPantsRunner
 from pants.bin.engine_initializer import EngineInitializer
+from pants.cache.upload_spool import UploadSpool
 from pants.engine.native import Native
 from pants.init.target_roots_calculator import TargetRootsCalculator
 from pants.logging.setup import setup_logging
@@ -24,11 +25,14 @@ from pants.option.arg_splitter import GLOBAL_SCOPE
 from pants.option.options_bootstrapper import OptionsBootstrapper
 from pants.option.options_fingerprinter import OptionsFingerprinter
 from pants.pantsd.process_manager import FingerprintedProcessManager
+from pants.pantsd.service.artifact_upload_service import ArtifactUploadService
+from pants.pantsd.service.forked_worker_service import ForkedWorkerService
 from pants.pantsd.service.fs_event_service import FSEventService
 from pants.pantsd.service.pailgun_service import PailgunService
 from pants.pantsd.service.scheduler_service import SchedulerService
 from pants.pantsd.service.store_gc_service import StoreGCService
 from pants.pantsd.watchman_launcher import WatchmanLauncher
+from pants.python.forked_worker_pool import ForkedWorkerPool
 from pants.util.collections import combined_dict
 from pants.util.contextutil import stdio_as
 from pants.util.memo import memoized_property
@@ -180,9 +184,18 @@ class PantsDaemon(FingerprintedProcessManager):
 
       store_gc_service = StoreGCService(legacy_graph_helper.scheduler)
 
+      artifact_upload_service = ArtifactUploadService(
+        UploadSpool.location(bootstrap_options.pants_workdir)
+      )
+
+      forked_worker_service = ForkedWorkerService(
+        ForkedWorkerPool.location(bootstrap_options.pants_workdir)
+      )
+
       return (
         # Services.
-        (fs_event_service, scheduler_service, pailgun_service, store_gc_service),
+        (fs_event_service, scheduler_service, pailgun_service, store_gc_service,
+         artifact_upload_service, forked_worker_service),
         # Port map.
         dict(pailgun=pailgun_service.pailgun_port)
       )
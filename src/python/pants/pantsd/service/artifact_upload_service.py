@@ -0,0 +1,40 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import logging
+
+from pants.cache.upload_spool import UploadSpool
+from pants.pantsd.service.pants_service import PantsService
+
+
+class ArtifactUploadService(PantsService):
+  """Artifact Upload Service.
+
+  This service drains the `UploadSpool` of the workdir, uploading artifacts that runs enqueued
+  for remote artifact caches (see `--cache-spool-remote-writes`) after those runs have completed.
+  """
+
+  _POLL_INTERVAL_SECONDS = 1.0
+
+  def __init__(self, spool_dir):
+    """
+    :param str spool_dir: The directory of the UploadSpool to drain.
+    """
+    super(ArtifactUploadService, self).__init__()
+    self._spool = UploadSpool(spool_dir)
+    self._logger = logging.getLogger(__name__)
+
+  def run(self):
+    """Main service entrypoint. Called via Thread.start() via PantsDaemon.run()."""
+    while not self.is_killed:
+      try:
+        next_due = self._spool.drain(stop=lambda: self.is_killed)
+      except Exception as e:
+        self._logger.warn('Failed to drain artifact upload spool: {}'.format(e))
+        next_due = None
+      poll_interval = self._POLL_INTERVAL_SECONDS
+      self._kill_switch.wait(min(poll_interval, next_due or poll_interval))
@@ -0,0 +1,47 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import logging
+
+from pants.pantsd.service.pants_service import PantsService
+from pants.python.forked_worker_pool import ForkedWorkerPool
+
+
+class ForkedWorkerService(PantsService):
+  """Forked Worker Service.
+
+  This service owns the warm zygotes of the workdir's `ForkedWorkerPool` (see e.g.
+  `--test-pytest-warm-workers`) for the lifetime of the daemon: it purges the metadata of zygotes
+  that have exited, and retires the remaining zygotes when the daemon shuts down.
+  """
+
+  _POLL_INTERVAL_SECONDS = 10.0
+
+  def __init__(self, pool_dir):
+    """
+    :param str pool_dir: The directory of the ForkedWorkerPool to own.
+    """
+    super(ForkedWorkerService, self).__init__()
+    self._pool = ForkedWorkerPool(pool_dir)
+    self._logger = logging.getLogger(__name__)
+
+  def run(self):
+    """Main service entrypoint. Called via Thread.start() via PantsDaemon.run()."""
+    while not self.is_killed:
+      try:
+        self._pool.purge_dead()
+      except Exception as e:
+        self._logger.warn('Failed to purge exited forked worker zygotes: {}'.format(e))
+      self._kill_switch.wait(self._POLL_INTERVAL_SECONDS)
+
+  def terminate(self):
+    """Retires all zygotes of the pool before stopping the service."""
+    try:
+      self._pool.retire_all()
+    except Exception as e:
+      self._logger.warn('Failed to retire forked worker zygotes: {}'.format(e))
+    super(ForkedWorkerService, self).terminate()
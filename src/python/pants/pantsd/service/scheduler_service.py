@@ -90,6 +90,8 @@ class SchedulerService(PantsService):
 
     with self.fork_lock:
       self._scheduler.invalidate_files(files)
+      if self.change_calculator:
+        self.change_calculator.invalidate_files(files)
 
   def _process_event_queue(self):
     """File event notification queue processor."""
@@ -0,0 +1,231 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import errno
+import importlib
+import json
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+
+# NB: This module is embedded in the PEX environments that workers run in and is run there as the
+# entry point of a zygote process, so it must only depend on the standard library.
+#
+# The zygote imports an entry point and any modules to preload, then listens on a unix socket.
+# Each connection carries a single json request line, and is handed to a forked "reaper", which
+# forks the worker itself and reports its pid and then its exit code back as json lines. Workers
+# are forked after the expensive imports, but never share any other state with each other.
+
+
+def _send_message(conn, message):
+  conn.sendall((json.dumps(message) + '\n').encode('utf-8'))
+
+
+def _native(value):
+  # Under python 2, json strings decode to unicode, but environment variables and args are bytes.
+  if isinstance(value, dict):
+    return {_native(k): _native(v) for k, v in value.items()}
+  if isinstance(value, list):
+    return [_native(v) for v in value]
+  if isinstance(value, type('')) and not isinstance(value, str):
+    return value.encode('utf-8')
+  return value
+
+
+def _read_message(conn):
+  data = b''
+  while not data.endswith(b'\n'):
+    chunk = conn.recv(4096)
+    if not chunk:
+      return None
+    data += chunk
+  return _native(json.loads(data.decode('utf-8')))
+
+
+def _load_entry_point(entry_point):
+  module_name, _, attribute = entry_point.partition(':')
+  module = importlib.import_module(module_name)
+  return getattr(module, attribute) if attribute else module
+
+
+def _preload_entry_points(group):
+  try:
+    import pkg_resources
+  except ImportError:
+    return
+  for entry_point in pkg_resources.iter_entry_points(group):
+    try:
+      entry_point.load()
+    except Exception:
+      # The worker will report the failure to load this entry point itself, if it is used.
+      pass
+
+
+def _swap_code_paths(old_code_paths, new_code_paths):
+  """Replaces the zygote's code paths on the sys.path with those of a request."""
+  replacements = [(os.path.realpath(old), new) for old, new in zip(old_code_paths, new_code_paths)]
+  for index, entry in enumerate(sys.path):
+    real_entry = os.path.realpath(entry)
+    for old, new in replacements:
+      if real_entry == old or real_entry.startswith(old + os.sep):
+        sys.path[index] = new + real_entry[len(old):]
+        break
+  sys.path_importer_cache.clear()
+
+
+def _redirect(fd, path, flags):
+  redirected = os.open(path, flags, 0o644)
+  os.dup2(redirected, fd)
+  os.close(redirected)
+
+
+def _run_worker(entry, code_paths, request):
+  """Runs a request's entry point in this forked worker process, and never returns."""
+  exit_code = 1
+  try:
+    os.setsid()
+    for signum in (signal.SIGCHLD, signal.SIGINT, signal.SIGTERM):
+      signal.signal(signum, signal.SIG_DFL)
+
+    os.chdir(request['cwd'])
+    os.environ.clear()
+    os.environ.update(request['env'])
+    _redirect(0, os.devnull, os.O_RDONLY)
+    _redirect(1, request['stdout'], os.O_WRONLY | os.O_CREAT | os.O_APPEND)
+    _redirect(2, request['stderr'], os.O_WRONLY | os.O_CREAT | os.O_APPEND)
+    _swap_code_paths(code_paths, request['code_paths'])
+
+    sys.argv = [sys.argv[0]] + request['args']
+    try:
+      result = entry(request['args'])
+    except SystemExit as e:
+      result = e.code
+    if result is None:
+      exit_code = 0
+    else:
+      try:
+        exit_code = int(result)
+      except (TypeError, ValueError):
+        print(result, file=sys.stderr)
+        exit_code = 1
+  except BaseException:
+    traceback.print_exc()
+  finally:
+    try:
+      sys.stdout.flush()
+      sys.stderr.flush()
+    finally:
+      os._exit(exit_code)
+
+
+def _reap(server, conn, entry, code_paths, request):
+  """Forks a worker for the request and reports its pid and exit code, and never returns."""
+  try:
+    # Restore the default disposition, which waitpid needs, before forking the worker.
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    pid = os.fork()
+    if pid == 0:
+      server.close()
+      conn.close()
+      _run_worker(entry, code_paths, request)
+    _send_message(conn, {'pid': pid})
+    _, status = os.waitpid(pid, 0)
+    if os.WIFSIGNALED(status):
+      returncode = -os.WTERMSIG(status)
+    else:
+      returncode = os.WEXITSTATUS(status)
+    _send_message(conn, {'returncode': returncode})
+  except Exception:
+    # The client went away: there is nobody left to report to.
+    pass
+  finally:
+    os._exit(0)
+
+
+def _is_bound(socket_path, inode):
+  try:
+    return os.stat(socket_path).st_ino == inode
+  except OSError:
+    return False
+
+
+def serve(config):
+  """Pre-imports the configured modules, then forks a worker for each request until idle.
+
+  :param dict config: The zygote's configuration, with keys:
+    `socket_path`: The path of the unix socket to listen on.
+    `idle_timeout`: The number of seconds without requests after which to exit.
+    `entry_point`: The `module:callable` to call with the args of each request in its worker.
+    `code_paths`: The sys.path entries that are specific to this zygote's launch, and which each
+                  request replaces with its own, in order.
+    `preload`: Further modules to import before serving.
+    `preload_entry_points`: Entry point groups whose entry points to load before serving.
+  """
+  entry = _load_entry_point(config['entry_point'])
+  for module_name in config.get('preload', ()):
+    importlib.import_module(module_name)
+  for group in config.get('preload_entry_points', ()):
+    _preload_entry_points(group)
+
+  socket_path = config['socket_path']
+  try:
+    os.unlink(socket_path)
+  except OSError as e:
+    if e.errno != errno.ENOENT:
+      raise
+  server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  server.bind(socket_path)
+  server.listen(64)
+  inode = os.stat(socket_path).st_ino
+
+  # Reapers are never waited on by the zygote.
+  signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+  server.settimeout(1.0)
+  last_request = time.time()
+  try:
+    # The pool retires a zygote by removing or replacing its socket.
+    while _is_bound(socket_path, inode):
+      try:
+        conn, _ = server.accept()
+      except socket.timeout:
+        if time.time() - last_request > config['idle_timeout']:
+          break
+        continue
+      except socket.error as e:
+        if e.args[0] == errno.EINTR:
+          continue
+        raise
+
+      last_request = time.time()
+      try:
+        conn.settimeout(None)
+        request = _read_message(conn)
+        if request is not None:
+          sys.stdout.flush()
+          sys.stderr.flush()
+          if os.fork() == 0:
+            _reap(server, conn, entry, config['code_paths'], request)
+      except Exception:
+        traceback.print_exc()
+      finally:
+        conn.close()
+  finally:
+    server.close()
+    if _is_bound(socket_path, inode):
+      os.unlink(socket_path)
+
+
+def main():
+  serve(_native(json.loads(sys.argv[1])))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,312 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import errno
+import json
+import logging
+import os
+import select
+import signal
+import socket
+import tempfile
+import time
+
+import pkg_resources
+from fasteners import InterProcessLock
+
+from pants.util.dirutil import read_file, safe_delete, safe_file_dump, safe_mkdir, safe_rmtree
+from pants.util.process_handler import ProcessHandler, subprocess
+
+
+logger = logging.getLogger(__name__)
+
+
+class ForkedWorkerProcessHandler(ProcessHandler):
+  """A `ProcessHandler` for a worker forked by a zygote of a `ForkedWorkerPool`."""
+
+  def __init__(self, conn, pid, cmd='forked worker', buffered=b''):
+    """
+    :param conn: The connection to the zygote that forked the worker.
+    :param int pid: The pid of the worker.
+    :param str cmd: A description of the worker's command, for timeout errors.
+    :param bytes buffered: Data already read from the connection after the worker's pid.
+    """
+    self._conn = conn
+    self._pid = pid
+    self._cmd = cmd
+    self._buffer = buffered
+    self._returncode = None
+
+  @property
+  def pid(self):
+    return self._pid
+
+  def _read_returncode(self, timeout):
+    while b'\n' not in self._buffer:
+      readable, _, _ = select.select([self._conn], [], [], timeout)
+      if not readable:
+        return None
+      chunk = self._conn.recv(4096)
+      if not chunk:
+        # The reaper died before it could report: assume the worker was killed with it.
+        self._returncode = -signal.SIGKILL
+        self._conn.close()
+        return self._returncode
+      self._buffer += chunk
+    self._returncode = json.loads(self._buffer.decode('utf-8'))['returncode']
+    self._conn.close()
+    return self._returncode
+
+  def wait(self, timeout=None):
+    if self._returncode is None:
+      if self._read_returncode(timeout) is None:
+        raise subprocess.TimeoutExpired(self._cmd, timeout)
+    return self._returncode
+
+  def poll(self):
+    if self._returncode is None:
+      self._read_returncode(0)
+    return self._returncode
+
+  def _signal(self, signum):
+    try:
+      os.kill(self._pid, signum)
+    except OSError as e:
+      if e.errno != errno.ESRCH:
+        raise
+
+  def kill(self):
+    if self._returncode is None:
+      self._signal(signal.SIGKILL)
+
+  def terminate(self):
+    if self._returncode is None:
+      self._signal(signal.SIGTERM)
+
+
+class ForkedWorkerPool(object):
+  """A pool of warm zygote processes that fork worker processes on request.
+
+  Each zygote is identified by a key, which must fingerprint everything it imports before forking:
+  usually an interpreter and the third party requirements of an environment. A zygote is launched
+  for a key on its first use, imports its entry point and any modules to preload, and then forks a
+  fresh worker with those imports already done for each request, so that workers only pay for
+  importing the code that is specific to their request. Workers never share any other state.
+
+  Zygotes outlive the runs that launch them, and are shared by all runs using the same workdir.
+  They exit after being idle for a while, and when pantsd is running they are retired by its
+  `ForkedWorkerService` when it shuts down.
+
+  The zygote's code is embedded in the environment it runs in; see `zygote_source`.
+  """
+
+  class LaunchError(Exception):
+    """Indicates a failure to launch or connect to a zygote."""
+
+  # The longest unix socket path that is portable: sun_path is 104 bytes on OSX.
+  _MAX_SOCKET_PATH_LENGTH = 100
+
+  # Records the private directory holding the socket of a zygote whose own dir is too deep.
+  _SOCKET_DIR_FILENAME = 'socket_dir'
+
+  @staticmethod
+  def location(workdir):
+    """Returns the pool directory for the given pants workdir."""
+    return os.path.join(workdir, 'forked_workers')
+
+  @staticmethod
+  def zygote_source():
+    """Returns the source of the zygote module, to embed in environments that workers run in.
+
+    :rtype: bytes
+    """
+    return pkg_resources.resource_string(__name__, 'forked_worker/zygote.py')
+
+  def __init__(self, root, idle_timeout=600, launch_timeout=60):
+    """
+    :param str root: The directory to keep the metadata and sockets of zygotes in.
+    :param int idle_timeout: The number of seconds after its last request that a zygote exits.
+    :param int launch_timeout: The number of seconds to wait for a launched zygote to listen.
+    """
+    self._root = root
+    self._idle_timeout = idle_timeout
+    self._launch_timeout = launch_timeout
+
+  def _zygote_dir(self, key):
+    return os.path.join(self._root, key)
+
+  def _uses_socket_dir(self, key):
+    return len(os.path.join(self._zygote_dir(key), 'sock')) > self._MAX_SOCKET_PATH_LENGTH
+
+  def _socket_dir(self, key):
+    """Returns the directory holding the zygote's socket, or None if it hasn't been launched."""
+    if not self._uses_socket_dir(key):
+      return self._zygote_dir(key)
+    try:
+      return read_file(os.path.join(self._zygote_dir(key), self._SOCKET_DIR_FILENAME)).strip()
+    except IOError:
+      return None
+
+  def _create_socket_dir(self, key):
+    if not self._uses_socket_dir(key):
+      return self._zygote_dir(key)
+    # The zygote dir is too deep for a socket path: use a private (0700) directory, so that other
+    # users can neither predict the socket's path nor bind it first.
+    socket_dir = tempfile.mkdtemp(prefix='pants-worker-')
+    safe_file_dump(os.path.join(self._zygote_dir(key), self._SOCKET_DIR_FILENAME), socket_dir)
+    return socket_dir
+
+  def _socket_path(self, key):
+    socket_dir = self._socket_dir(key)
+    return os.path.join(socket_dir, 'sock') if socket_dir else None
+
+  def _remove_socket(self, key):
+    socket_path = self._socket_path(key)
+    if socket_path:
+      safe_delete(socket_path)
+      if self._uses_socket_dir(key):
+        safe_rmtree(os.path.dirname(socket_path))
+
+  def _connect(self, key):
+    socket_path = self._socket_path(key)
+    if not socket_path:
+      return None
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+      conn.connect(socket_path)
+      return conn
+    except socket.error:
+      conn.close()
+      return None
+
+  def _launch(self, key, launch, config):
+    zygote_dir = self._zygote_dir(key)
+    safe_mkdir(zygote_dir)
+    self._remove_socket(key)
+    socket_path = os.path.join(self._create_socket_dir(key), 'sock')
+    config = dict(config, socket_path=socket_path, idle_timeout=self._idle_timeout)
+
+    logger.debug('Launching forked worker zygote {}.'.format(key))
+    log_path = os.path.join(zygote_dir, 'log')
+    with open(log_path, 'w') as log:
+      process = launch(json.dumps(config), log)
+
+    deadline = time.time() + self._launch_timeout
+    while time.time() < deadline:
+      conn = self._connect(key)
+      if conn:
+        return conn
+      if process.poll() is not None:
+        break
+      time.sleep(0.05)
+    if process.poll() is None:
+      process.kill()
+    raise self.LaunchError('Failed to launch a forked worker zygote, see {}.'.format(log_path))
+
+  def _lock(self, key):
+    safe_mkdir(self._root)
+    return InterProcessLock(os.path.join(self._root, '{}.lock'.format(key)))
+
+  def _zygote_connection(self, key, launch, config):
+    conn = self._connect(key)
+    if conn:
+      return conn
+    # Only one process launches a given zygote: the others connect to it once it's listening.
+    with self._lock(key):
+      return self._connect(key) or self._launch(key, launch, config)
+
+  def spawn(self, key, launch, entry_point, code_paths, args, cwd, env, stdout, stderr,
+            preload=(), preload_entry_points=()):
+    """Runs an entry point in a worker forked by the zygote for the given key.
+
+    :param str key: A fingerprint of the zygote's interpreter and everything it imports.
+    :param func launch: A function to launch the zygote with if it isn't running, which takes the
+                        zygote's json configuration (its single argument) and a file for its
+                        output, and returns a `subprocess.Popen`-like object.
+    :param str entry_point: The `module:callable` to call with `args` in the worker.
+    :param list code_paths: The sys.path entries of this request's environment that aren't covered
+                            by the key, which are swapped in for those the zygote was launched with.
+                            These must have the same length and order for all requests.
+    :param list args: The arguments to call the entry point with.
+    :param str cwd: The working directory of the worker.
+    :param dict env: The full environment of the worker.
+    :param str stdout: The path of a file to append the worker's stdout to.
+    :param str stderr: The path of a file to append the worker's stderr to.
+    :param list preload: Modules for the zygote to import before forking.
+    :param list preload_entry_points: Entry point groups whose entry points the zygote should load
+                                      before forking.
+    :rtype: :class:`ForkedWorkerProcessHandler`
+    :raises: :class:`ForkedWorkerPool.LaunchError` if the zygote couldn't be launched.
+    """
+    config = dict(entry_point=entry_point,
+                  code_paths=list(code_paths),
+                  preload=list(preload),
+                  preload_entry_points=list(preload_entry_points))
+    request = dict(args=list(args),
+                   cwd=cwd,
+                   env=dict(env),
+                   stdout=stdout,
+                   stderr=stderr,
+                   code_paths=list(code_paths))
+
+    conn = self._zygote_connection(key, launch, config)
+    try:
+      conn.sendall((json.dumps(request) + '\n').encode('utf-8'))
+      data = b''
+      while b'\n' not in data:
+        chunk = conn.recv(4096)
+        if not chunk:
+          raise self.LaunchError('The forked worker zygote {} failed to fork a worker.'.format(key))
+        data += chunk
+    except (socket.error, self.LaunchError):
+      conn.close()
+      raise
+    line, _, rest = data.partition(b'\n')
+    return ForkedWorkerProcessHandler(conn, json.loads(line.decode('utf-8'))['pid'],
+                                      cmd=' '.join([entry_point] + list(args)),
+                                      buffered=rest)
+
+  def zygotes(self):
+    """Returns the keys of the zygotes that have been launched and not retired."""
+    try:
+      names = os.listdir(self._root)
+    except OSError:
+      return []
+    return [name for name in names if os.path.isdir(self._zygote_dir(name))]
+
+  def is_alive(self, key):
+    """Returns True if the zygote for the given key is accepting requests."""
+    conn = self._connect(key)
+    if conn:
+      conn.close()
+    return conn is not None
+
+  def retire(self, key):
+    """Stops the zygote for the given key, if it is running.
+
+    The zygote exits within a second of its socket being removed. Workers that it has already
+    forked run to completion.
+    """
+    self._remove_socket(key)
+    safe_rmtree(self._zygote_dir(key))
+
+  def retire_all(self):
+    """Stops all of the pool's zygotes."""
+    for key in self.zygotes():
+      self.retire(key)
+
+  def purge_dead(self):
+    """Removes the metadata of zygotes that have exited, e.g. after being idle."""
+    for key in self.zygotes():
+      lock = self._lock(key)
+      # Skip zygotes that are being launched.
+      if lock.acquire(blocking=False):
+        try:
+          if not self.is_alive(key):
+            self.retire(key)
+        finally:
+          lock.release()
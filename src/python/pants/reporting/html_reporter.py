@@ -64,6 +64,10 @@ class HtmlReporter(Reporter):
 
     # We redirect stdout, stderr etc. of tool invocations to these files.
     self._output_files = defaultdict(dict)  # workunit_id -> {path -> fileobj}.
+    # Map from output file path to the time (secs since the epoch) that we last flushed it.
+    self._last_output_flush_time = {}
+    # Map from output file path to fileobj, for files with writes that haven't been flushed yet.
+    self._unflushed_output_files = {}
     self._linkify_memo = {}
 
     # Map from filename to timestamp (ms since the epoch) of when we last overwrote that file.
@@ -304,8 +308,10 @@ class HtmlReporter(Reporter):
                     lambda: render_cache_stats(self.run_tracker.artifact_cache_stats),
                     force=force_overwrite)
 
-    for f in self._output_files[workunit.id].values():
+    for path, f in self._output_files[workunit.id].items():
       f.close()
+      self._last_output_flush_time.pop(path, None)
+      self._unflushed_output_files.pop(path, None)
 
   def handle_output(self, workunit, label, s):
     """Implementation of Reporter callback."""
@@ -318,8 +324,22 @@ class HtmlReporter(Reporter):
       else:
         f = output_files[path]
       f.write(self._htmlify_text(s).encode('utf-8'))
-      # We must flush in the same thread as the write.
-      f.flush()
+      self._unflushed_output_files[path] = f
+      self._flush_output_files(time.time())
+
+  def flush(self):
+    """Implementation of Reporter callback."""
+    # Picks up writes that were throttled, in case their tool has since gone quiet.
+    self._flush_output_files(time.time())
+
+  def _flush_output_files(self, now):
+    # Tools can emit many small writes: flush each file at most once per second for the live view.
+    # The report serializes all calls to reporters, so this never races with a write.
+    for path, f in list(self._unflushed_output_files.items()):
+      if now - self._last_output_flush_time.get(path, 0) >= 1:
+        f.flush()
+        self._last_output_flush_time[path] = now
+        del self._unflushed_output_files[path]
 
   _log_level_css_map = {
     Report.FATAL: 'fatal',
@@ -114,6 +114,8 @@ class Report(object):
   def flush(self):
     with self._lock:
       self._notify()
+      for reporter in self._reporters.values():
+        reporter.flush()
 
   def close(self):
     self._emitter_thread.stop()
@@ -75,6 +75,13 @@ class Reporter(object):
     """
     pass
 
+  def flush(self):
+    """Flush any buffered output.
+
+    Called periodically while the report is open.
+    """
+    pass
+
   def is_under_main_root(self, workunit):
     """Is the workunit running under the main thread's root."""
     return self.run_tracker.is_under_main_root(workunit)
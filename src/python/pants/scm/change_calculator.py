@@ -8,7 +8,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import itertools
 import logging
 from abc import abstractmethod
-from collections import defaultdict
+from collections import defaultdict, deque
 
 from pants.base.build_environment import get_scm
 from pants.base.specs import DescendantAddresses, Specs
@@ -67,27 +67,24 @@ class _DependentGraph(object):
     """Given an iterable of addresses, yield all of those addresses dependents."""
     seen = set(addresses)
     for address in addresses:
-      for dependent_address in self._dependent_address_map[address]:
+      for dependent_address in self._dependent_address_map.get(address, ()):
         if dependent_address not in seen:
           seen.add(dependent_address)
           yield dependent_address
 
   def transitive_dependents_of_addresses(self, addresses):
-    """Given an iterable of addresses, yield all of those addresses dependents, transitively."""
-    addresses_to_visit = set(addresses)
-    while 1:
-      dependents = set(self.dependents_of_addresses(addresses))
-      # If we've exhausted all dependencies or visited all remaining nodes, break.
-      if (not dependents) or dependents.issubset(addresses_to_visit):
-        break
-      addresses = dependents.difference(addresses_to_visit)
-      addresses_to_visit.update(dependents)
-
-    transitive_set = itertools.chain(
-      *(self._dependent_address_map[address] for address in addresses_to_visit)
-    )
-    for dep in transitive_set:
-      yield dep
+    """Given an iterable of addresses, yield all of those addresses dependents, transitively.
+
+    The dependents are walked breadth-first, so that each is visited (and yielded) once.
+    """
+    seen = set(addresses)
+    addresses_to_visit = deque(seen)
+    while addresses_to_visit:
+      for dependent_address in self._dependent_address_map.get(addresses_to_visit.popleft(), ()):
+        if dependent_address not in seen:
+          seen.add(dependent_address)
+          addresses_to_visit.append(dependent_address)
+          yield dependent_address
 
 
 class ChangeCalculator(AbstractClass):
@@ -127,6 +124,10 @@ class EngineChangeCalculator(ChangeCalculator):
     self._symbol_table = symbol_table
     self._mapper = EngineSourceMapper(self._scheduler)
 
+  def invalidate_files(self, filenames):
+    """Invalidates any source mapping state affected by the given changed files."""
+    self._mapper.invalidate_files(filenames)
+
   def iter_changed_target_addresses(self, changed_request):
     """Given a `ChangedRequest`, compute and yield all affected target addresses."""
     changed_files = self.changed_files(changed_request.changes_since, changed_request.diffspec)
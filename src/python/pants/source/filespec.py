@@ -7,6 +7,8 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import re
 
+from pants.util.memo import memoized
+
 
 def glob_to_regex(pattern):
   """Given a glob pattern, return an equivalent regex expression.
@@ -44,14 +46,21 @@ def glob_to_regex(pattern):
   return ''.join(out)
 
 
+@memoized
+def _glob_regex(pattern):
+  # Globs are matched against many paths by many targets: more distinct globs than fit in the `re`
+  # module's own cache of compiled patterns.
+  return re.compile(glob_to_regex(pattern))
+
+
 def globs_matches(paths, patterns, exclude_patterns):
   def excluded(path):
     if excluded.regexes is None:
-      excluded.regexes = [re.compile(glob_to_regex(ex)) for ex in exclude_patterns]
+      excluded.regexes = [_glob_regex(ex) for ex in exclude_patterns]
     return any(ex.match(path) for ex in excluded.regexes)
   excluded.regexes = None
   for pattern in patterns:
-    regex = re.compile(glob_to_regex(pattern))
+    regex = _glob_regex(pattern)
     for path in paths:
       if regex.match(path) and not excluded(path):
         return True
@@ -13,6 +13,8 @@ from six import string_types
 from twitter.common.dirutil.fileset import Fileset
 
 from pants.base.build_environment import get_buildroot
+from pants.base.file_digest_cache import FileDigestCache
+from pants.base.hash_utils import hash_file
 from pants.util.dirutil import fast_relpath, fast_relpath_optional
 from pants.util.memo import memoized_property
 from pants.util.meta import AbstractClass
@@ -126,11 +128,14 @@ class LazyFilesetWithSpec(FilesetWithSpec):
 
   @property
   def files_hash(self):
+    # Hash the digest of each file rather than its content, so that the digests of unchanged files
+    # can be looked up in the FileDigestCache rather than re-read.
+    digest_cache = FileDigestCache.global_instance()
+    digest_file = digest_cache.digest if digest_cache else hash_file
     h = sha1()
     for path in sorted(self.files):
       h.update(path)
-      with open(os.path.join(get_buildroot(), self.rel_root, path), 'rb') as f:
-        h.update(f.read())
+      h.update(digest_file(os.path.join(get_buildroot(), self.rel_root, path)))
     return h.digest()
 
   def matches(self, path_from_buildroot):
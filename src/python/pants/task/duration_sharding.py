@@ -0,0 +1,117 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from pants.util.dirutil import safe_concurrent_creation, safe_mkdir_for
+
+
+logger = logging.getLogger(__name__)
+
+
+def bin_pack(items, duration, nbins):
+  """Assigns items to bins of roughly equal total duration.
+
+  Items are placed longest first, each into the bin with the least total duration so far. Items of
+  unknown duration are assumed to take the mean of the known durations, so with no known durations
+  the items are simply divided between the bins by count. The assignment is stable for a given set
+  of items and durations.
+
+  :param items: The items to assign, which must be sortable.
+  :param func duration: A function from an item to its expected duration, or None if unknown.
+  :param int nbins: The number of bins.
+  :returns: A list of `nbins` lists of items.
+  """
+  durations = {item: duration(item) for item in items}
+  known = [d for d in durations.values() if d is not None]
+  default = sum(known) / len(known) if known else 1.0
+
+  bins = [[] for _ in range(nbins)]
+  totals = [0.0] * nbins
+  expected = sorted((default if d is None else d, item) for item, d in durations.items())
+  for d, item in reversed(expected):
+    index = min(range(nbins), key=lambda i: (totals[i], i))
+    bins[index].append(item)
+    totals[index] += d
+  return bins
+
+
+class RecordedDurations(object):
+  """A persistent record of how long test targets and test classes took to run.
+
+  Durations are accumulated from the reports of a run, and `save` replaces the recorded duration
+  of each target and class that ran with its duration in that run. Targets and classes that did
+  not run (e.g. because their results were cached) keep their recorded durations.
+  """
+
+  def __init__(self, path, output_path=None):
+    """
+    :param str path: The path of the json file to persist durations in.
+    :param str output_path: The path of the json file to save durations to instead, if `path`
+                            should only be read.
+    """
+    self._path = path
+    self._output_path = output_path or path
+    self._lock = threading.Lock()
+    self._recorded = None
+    self._targets = defaultdict(float)
+    self._classes = defaultdict(float)
+
+  def _load(self):
+    if self._recorded is None:
+      try:
+        with open(self._path, 'r') as fp:
+          recorded = json.load(fp)
+        self._recorded = {'targets': dict(recorded['targets']),
+                          'classes': dict(recorded['classes'])}
+      except (IOError, ValueError, KeyError, TypeError) as e:
+        if not isinstance(e, IOError):
+          logger.warn('Ignoring unreadable test durations file {}: {}'.format(self._path, e))
+        self._recorded = {'targets': {}, 'classes': {}}
+    return self._recorded
+
+  def target_duration(self, spec):
+    """Returns the recorded duration in seconds of the target with the given spec, or None."""
+    with self._lock:
+      return self._load()['targets'].get(spec)
+
+  def class_duration(self, classname):
+    """Returns the recorded duration in seconds of the given test class, or None."""
+    with self._lock:
+      return self._load()['classes'].get(classname)
+
+  def record(self, spec, classname, seconds):
+    """Adds the duration of a single test to the durations of its target and class in this run.
+
+    :param str spec: The spec of the target owning the test, or None if unknown.
+    :param str classname: The class the test belongs to, or None if unknown.
+    :param float seconds: The duration of the test.
+    """
+    with self._lock:
+      if spec:
+        self._targets[spec] += seconds
+      if classname:
+        self._classes[classname] += seconds
+
+  def save(self):
+    """Persists the recorded durations updated with those of this run, if it recorded any."""
+    with self._lock:
+      if not self._targets and not self._classes:
+        return
+      recorded = self._load()
+      recorded['targets'].update(self._targets)
+      recorded['classes'].update(self._classes)
+      self._targets.clear()
+      self._classes.clear()
+
+      safe_mkdir_for(self._output_path)
+      with safe_concurrent_creation(self._output_path) as tmp_path:
+        with open(tmp_path, 'w') as fp:
+          json.dump(recorded, fp, sort_keys=True)
@@ -8,15 +8,17 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import logging
 import os
 from abc import abstractmethod
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 
 from twitter.common.collections import OrderedSet
 
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
+from pants.base.worker_pool import Work, WorkerPool
 from pants.base.workunit import WorkUnitLabel
 from pants.build_graph.address import Address
 from pants.build_graph.address_lookup_error import AddressLookupError
+from pants.build_graph.target import Target
 from pants.source.wrapped_globs import EagerFilesetWithSpec, FilesetRelPathWrapper
 from pants.task.task import Task
 from pants.util.dirutil import fast_relpath, safe_delete, safe_walk
@@ -38,6 +40,10 @@ class SimpleCodegenTask(Task):
   # E.g., JavaThriftLibrary. If not provided, the subclass must implement is_gentarget.
   gentarget_type = None
 
+  # Subclasses whose `execute_codegen` may safely run for several targets at once on different
+  # threads may override this to True, which gives them a `--worker-count` option.
+  supports_concurrent_codegen = False
+
   def __init__(self, context, workdir):
     """
     Add pass-thru Task Constructor for public API visibility.
@@ -65,6 +71,10 @@ class SimpleCodegenTask(Task):
                    'allowed, the logic of find_sources will associate generated sources with '
                    'the least-dependent targets that generate them.',
               advanced=True)
+    if cls.supports_concurrent_codegen:
+      register('--worker-count', type=int, default=1, advanced=True,
+               help='The number of targets to generate code for concurrently. Code for a target is '
+                    'only generated once code has been generated for the targets it depends on.')
 
   @classmethod
   def get_fingerprint_strategy(cls):
@@ -208,24 +218,76 @@ class SimpleCodegenTask(Task):
                           topological_order=True,
                           fingerprint_strategy=self.get_fingerprint_strategy()) as invalidation_check:
 
-      with self.context.new_workunit(name='execute', labels=[WorkUnitLabel.MULTITOOL]):
-        for vt in invalidation_check.all_vts:
-          # Build the target and handle duplicate sources.
-          if not vt.valid:
-            if self._do_validate_sources_present(vt.target):
+      with self.context.new_workunit(name='execute',
+                                     labels=[WorkUnitLabel.MULTITOOL]) as workunit:
+        worker_count = self.get_options().worker_count if self.supports_concurrent_codegen else 1
+        if worker_count > 1:
+          self._execute_codegen_concurrently(invalidation_check.all_vts, worker_count, workunit)
+        else:
+          for vt in invalidation_check.all_vts:
+            # Build the target and handle duplicate sources.
+            generated = not vt.valid and self._do_validate_sources_present(vt.target)
+            if generated:
               self.execute_codegen(vt.target, vt.results_dir)
-              self._handle_duplicate_sources(vt.target, vt.results_dir)
-            vt.update()
-
-          self._inject_synthetic_target(
-            vt.target,
-            vt.results_dir,
-            vt.cache_key,
-          )
+            self._complete_codegen(vt, generated)
         self._mark_transitive_invalidation_hashes_dirty(
           vt.target.address for vt in invalidation_check.all_vts
         )
 
+  def _complete_codegen(self, vt, generated):
+    """Validates the given versioned target if needed, and injects its synthetic target.
+
+    Duplicate sources are handled here rather than during generation, because that requires the
+    synthetic targets of the target's dependencies to have been injected.
+    """
+    if not vt.valid:
+      if generated:
+        self._handle_duplicate_sources(vt.target, vt.results_dir)
+      vt.update()
+
+    self._inject_synthetic_target(
+      vt.target,
+      vt.results_dir,
+      vt.cache_key,
+    )
+
+  def _execute_codegen_concurrently(self, all_vts, worker_count, workunit):
+    """Generates code for the given versioned targets on a pool of workers, and completes them.
+
+    The targets are generated in waves: a target is in a later wave than all of the targets it
+    depends on, so that their code has been generated before its own is. Each wave is completed
+    in topological order as soon as it succeeds, so that a failure in a later wave doesn't discard
+    the results of earlier ones.
+    """
+    generate = set(vt.target for vt in all_vts
+                   if not vt.valid and self._do_validate_sources_present(vt.target))
+
+    # Dependencies come before their dependees in a postorder traversal. Targets that aren't
+    # generated are in the wave of the last target they transitively depend on that is, so that
+    # they are completed after it.
+    wave_by_target = {}
+    for target in Target.closure_for_targets([vt.target for vt in all_vts], bfs=False,
+                                             postorder=True):
+      wave = max([wave_by_target.get(dep, 0) for dep in target.dependencies] or [0])
+      wave_by_target[target] = wave + 1 if target in generate else wave
+    vts_by_wave = defaultdict(list)
+    for vt in all_vts:
+      vts_by_wave[wave_by_target[vt.target]].append(vt)
+
+    def execute_codegen(vt):
+      self.execute_codegen(vt.target, vt.results_dir)
+
+    worker_pool = WorkerPool(workunit, self.context.run_tracker, worker_count)
+    try:
+      for wave in sorted(vts_by_wave):
+        worker_pool.submit_work_and_wait(Work(execute_codegen,
+                                              [(vt,) for vt in vts_by_wave[wave]
+                                               if vt.target in generate]))
+        for vt in vts_by_wave[wave]:
+          self._complete_codegen(vt, vt.target in generate)
+    finally:
+      worker_pool.shutdown()
+
   def _mark_transitive_invalidation_hashes_dirty(self, addresses):
     self.context.build_graph.walk_transitive_dependee_graph(
       addresses,
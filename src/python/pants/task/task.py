@@ -5,8 +5,10 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import json
 import os
 import sys
+import threading
 from abc import abstractmethod
 from contextlib import contextmanager
 from hashlib import sha1
@@ -24,7 +26,8 @@ from pants.option.options_fingerprinter import OptionsFingerprinter
 from pants.option.scope import ScopeInfo
 from pants.reporting.reporting_utils import items_to_report_element
 from pants.subsystem.subsystem_client_mixin import SubsystemClientMixin
-from pants.util.dirutil import safe_mkdir, safe_rm_oldest_items_in_dir
+from pants.util.dirutil import (safe_concurrent_creation, safe_mkdir, safe_mkdir_for,
+                                safe_rm_oldest_items_in_dir)
 from pants.util.memo import memoized_method, memoized_property
 from pants.util.meta import AbstractClass
 
@@ -59,6 +62,11 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
   # its superclass, which is not necessary for regular use, but can be convenient in tests.
   _stable_name = None
 
+  # If at least this fraction of the keys that the previous run checked the artifact cache for were
+  # hits, artifacts are fetched without first checking that they exist: for a remote cache, a hit
+  # then costs one round trip rather than two, and a miss is found by its fetch instead.
+  _SKIP_ARTIFACT_EXISTENCE_CHECK_HIT_RATE = 0.5
+
   @classmethod
   def implementation_version(cls):
     """
@@ -169,6 +177,9 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
     self._task_name = type(self).__name__
     self._cache_key_errors = set()
     self._cache_factory = CacheSetup.create_cache_factory_for_task(self)
+    # The numbers of artifact cache hits and of checked cache keys in this run.
+    self._artifact_cache_check_counts = [0, 0]
+    self._artifact_cache_check_lock = threading.Lock()
     self._force_invalidated = False
 
   @memoized_method
@@ -176,6 +187,10 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
     build_task = None if root else self.fingerprint
     return BuildInvalidator.Factory.create(build_task=build_task)
 
+  @memoized_property
+  def _invalidation_workers(self):
+    return BuildInvalidator.Factory.global_instance().get_options().workers
+
   def get_options(self):
     """Returns the option values for this task's scope.
 
@@ -368,8 +383,6 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
                                                      targets,
                                                      topological_order)
 
-    self._maybe_create_results_dirs(invalidation_check.all_vts)
-
     if invalidation_check.invalid_vts and self.artifact_cache_reads_enabled():
       with self.context.new_workunit('cache'):
         cached_vts, uncached_vts, uncached_causes = \
@@ -467,14 +480,17 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
                                              invalidation_report=self.context.invalidation_report,
                                              task_name=self._task_name,
                                              task_version=self.implementation_version_str(),
-                                             artifact_write_callback=self.maybe_write_artifact)
+                                             artifact_write_callback=self.maybe_write_artifact,
+                                             workers=self._invalidation_workers)
 
     # If this Task's execution has been forced, invalidate all our target fingerprints.
     if self._cache_factory.ignore and not self._force_invalidated:
       self.invalidate()
       self._force_invalidated = True
 
-    return cache_manager.check(targets, topological_order=topological_order)
+    invalidation_check = cache_manager.check(targets, topological_order=topological_order)
+    self._maybe_create_results_dirs(cache_manager, invalidation_check.all_vts)
+    return invalidation_check
 
   def maybe_write_artifact(self, vt):
     if self._should_cache_target_dir(vt):
@@ -506,11 +522,10 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
       self.artifact_cache_writes_enabled()
     )
 
-  def _maybe_create_results_dirs(self, vts):
+  def _maybe_create_results_dirs(self, cache_manager, vts):
     """If `cache_target_dirs`, create results_dirs for the given versioned targets."""
     if self.create_target_dirs:
-      for vt in vts:
-        vt.create_results_dir()
+      cache_manager.create_results_dirs(vts)
 
   def check_artifact_cache_for(self, invalidation_check):
     """Decides which VTS to check the artifact cache for.
@@ -540,9 +555,17 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
       return [], [], []
 
     read_cache = self._cache_factory.get_read_cache()
+    if self._skip_artifact_existence_check:
+      present = [True] * len(vts)
+    else:
+      # Check for all keys at once, so that misses (typically the majority of keys for a remote
+      # cache) cost a concurrent existence check rather than a round trip in the subprocess pool.
+      present = read_cache.has_many([vt.cache_key for vt in vts])
+    present_vts = [vt for vt, is_present in zip(vts, present) if is_present]
     items = [(read_cache, vt.cache_key, vt.current_results_dir if self.cache_target_dirs else None)
-             for vt in vts]
-    res = self.context.subproc_map(call_use_cached_files, items)
+             for vt in present_vts]
+    present_res = iter(self.context.subproc_map(call_use_cached_files, items) if items else [])
+    res = [next(present_res) if is_present else False for is_present in present]
 
     cached_vts = []
     uncached_vts = []
@@ -561,12 +584,43 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
         if isinstance(was_in_cache, UnreadableArtifact):
           self._cache_key_errors.update(was_in_cache.key)
 
+    self._record_artifact_cache_checks(sum(1 for was_in_cache in res if was_in_cache), len(res))
+
     if post_process_cached_vts:
       post_process_cached_vts(cached_vts)
     for vt in cached_vts:
       vt.update()
     return cached_vts, uncached_vts, uncached_causes
 
+  @property
+  def _artifact_cache_hit_rate_file(self):
+    return os.path.join(self.workdir, 'artifact_cache_hit_rate.json')
+
+  @memoized_property
+  def _skip_artifact_existence_check(self):
+    """Whether the previous run's cache hit rate was high enough to skip existence checks."""
+    try:
+      with open(self._artifact_cache_hit_rate_file, 'r') as fp:
+        hits, checked = json.load(fp)
+    except (IOError, ValueError, TypeError):
+      return False
+    return checked > 0 and hits >= self._SKIP_ARTIFACT_EXISTENCE_CHECK_HIT_RATE * checked
+
+  def _record_artifact_cache_checks(self, hits, checked):
+    with self._artifact_cache_check_lock:
+      counts = self._artifact_cache_check_counts
+      counts[0] += hits
+      counts[1] += checked
+      # Written after each check, because tasks may check the cache many times per run.
+      try:
+        path = self._artifact_cache_hit_rate_file
+        safe_mkdir_for(path)
+        with safe_concurrent_creation(path) as tmp_path:
+          with open(tmp_path, 'w') as fp:
+            json.dump(counts, fp)
+      except (IOError, OSError) as e:
+        self.context.log.debug('Failed to record the artifact cache hit rate: {}'.format(e))
+
   def update_artifact_cache(self, vts_artifactfiles_pairs):
     """Write to the artifact cache, if we're configured to.
 
@@ -7,13 +7,21 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import os
 import re
+import sys
+import threading
 import xml.etree.ElementTree as ET
 from abc import abstractmethod
 from threading import Timer
 
+import six
+from six.moves import queue
+
 from pants.base.exceptions import ErrorWhileTesting, TaskError
+from pants.base.hash_utils import Sharder
+from pants.base.worker_pool import Work, WorkerPool
 from pants.build_graph.files import Files
 from pants.invalidation.cache_manager import VersionedTargetSet
+from pants.task.duration_sharding import RecordedDurations, bin_pack
 from pants.task.task import Task
 from pants.util.memo import memoized_method, memoized_property
 from pants.util.process_handler import subprocess
@@ -88,6 +96,74 @@ class TestResult(object):
     return self
 
 
+class _PartitionProcesses(object):
+  """The test processes of concurrently running partitions, which can be terminated together."""
+
+  def __init__(self, terminate_wait):
+    """
+    :param int terminate_wait: How long to wait (in seconds) for a terminated process to exit
+                               before killing it.
+    """
+    self._terminate_wait = terminate_wait
+    self._lock = threading.Lock()
+    self._cancelled = False
+    self._process_handlers = {}  # {thread: process handler}
+    self._terminated_threads = set()
+
+  def started(self, process_handler):
+    """Records the test process of the current thread's partition.
+
+    The process is terminated right away if the partitions were already cancelled.
+    """
+    thread = threading.current_thread()
+    with self._lock:
+      self._process_handlers[thread] = process_handler
+      if self._cancelled:
+        self._terminate(thread, process_handler)
+
+  def finished(self):
+    """Records that the test process of the current thread's partition exited."""
+    with self._lock:
+      self._process_handlers.pop(threading.current_thread(), None)
+
+  def cancel(self):
+    """Terminates the running test processes, and any that are started afterwards."""
+    with self._lock:
+      if not self._cancelled:
+        self._cancelled = True
+        for thread, process_handler in self._process_handlers.items():
+          self._terminate(thread, process_handler)
+
+  def take_terminated(self):
+    """Returns True if a test process of the current thread's partition was terminated.
+
+    NB: Threads run many partitions in turn, so this resets the state of the current thread.
+    """
+    thread = threading.current_thread()
+    with self._lock:
+      terminated = thread in self._terminated_threads
+      self._terminated_threads.discard(thread)
+      return terminated
+
+  def _terminate(self, thread, process_handler):
+    self._terminated_threads.add(thread)
+    try:
+      process_handler.terminate()
+    except OSError:
+      # The process already exited.
+      return
+
+    def kill_if_not_terminated():
+      try:
+        process_handler.kill()
+      except OSError:
+        pass
+
+    timer = Timer(self._terminate_wait, kill_if_not_terminated)
+    timer.daemon = True
+    timer.start()
+
+
 class TestRunnerTaskMixin(object):
   """A mixin to combine with test runner tasks.
 
@@ -116,6 +192,20 @@ class TestRunnerTaskMixin(object):
     register('--timeout-terminate-wait', type=int, advanced=True, default=10,
              help='If a test does not terminate on a SIGTERM, how long to wait (in seconds) before '
                   'sending a SIGKILL.')
+    register('--shard-by-durations', type=bool, advanced=True, fingerprint=True,
+             help='With --test-shard=M/N, divide whole test targets between the N shards so that '
+                  'each shard has roughly the same expected run time, based on the durations '
+                  'recorded by previous runs, rather than dividing tests between shards by count.')
+    register('--durations-file', advanced=True,
+             help='The json file to record test durations in, for use by --shard-by-durations. '
+                  'Defaults to a file in the task workdir. Set this to a location that persists '
+                  'between runs to share durations between workspaces, e.g. on CI. Required by '
+                  '--shard-by-durations, which only reads it: every shard must divide the targets '
+                  'using the same durations.')
+    register('--durations-output-file', advanced=True,
+             help='The json file to record test durations in during a run sharded by '
+                  '--shard-by-durations: the durations in --durations-file updated with those of '
+                  'the tests that ran in this shard. Defaults to a file in the task workdir.')
 
   def execute(self):
     """Run the task."""
@@ -137,7 +227,60 @@ class TestRunnerTaskMixin(object):
         self._validate_target(target)
 
       all_targets = self._get_targets()
-      self._execute(all_targets)
+      try:
+        self._execute(all_targets)
+      finally:
+        self._recorded_durations.save()
+
+  @memoized_property
+  def _recorded_durations(self):
+    options = self.get_options()
+    default_path = os.path.join(self.workdir, 'test_durations.json')
+    if self._shard_by_durations:
+      # The shards of a run may run on different machines, and each only records the durations of
+      # the targets it ran: so the durations they partition the targets by are a read-only
+      # snapshot, and this shard's durations are written elsewhere.
+      return RecordedDurations(options.durations_file or default_path,
+                               output_path=options.durations_output_file or default_path)
+    return RecordedDurations(options.durations_file or default_path)
+
+  @property
+  def _shard_by_durations(self):
+    """Return `True` if test targets are sharded by their recorded durations.
+
+    Test runners should not shard tests themselves when this is `True`.
+
+    :rtype: bool
+    """
+    return bool(self.get_options().shard_by_durations and self.get_options().test_shard)
+
+  def _expected_duration(self, target):
+    """Return the expected duration in seconds of running the tests in the given target.
+
+    By default this is the duration recorded for the target's last run, if any.
+
+    :param Target target: The test target.
+    :returns: The expected duration, or None if it is unknown.
+    :rtype: float
+    """
+    return self._recorded_durations.target_duration(target.address.spec)
+
+  @memoized_method
+  def _targets_in_duration_shard(self, test_targets):
+    try:
+      sharder = Sharder(self.get_options().test_shard)
+    except Sharder.InvalidShardSpec as e:
+      raise TaskError(str(e))
+    if not self.get_options().durations_file:
+      raise TaskError('--shard-by-durations requires a --durations-file shared by all of the '
+                      'shards, so that they divide the test targets between them identically.')
+    by_spec = {target.address.spec: target for target in test_targets}
+    shards = bin_pack(by_spec.keys(), lambda spec: self._expected_duration(by_spec[spec]),
+                      sharder.nshards)
+    shard = shards[sharder.shard]
+    self.context.log.debug('Running {} of {} test targets in shard {} of {}.'
+                           .format(len(shard), len(test_targets), sharder.shard, sharder.nshards))
+    return frozenset(shard)
 
   def report_all_info_for_single_test(self, scope, target, test_name, test_info):
     """Add all of the test information for a single test.
@@ -154,6 +297,10 @@ class TestRunnerTaskMixin(object):
     for test_info_key, test_info_val in test_info.items():
       key_list = [test_name, test_info_key]
       self._report_test_info(scope, target, key_list, test_info_val)
+    if test_info.get('time') is not None:
+      self._recorded_durations.record(target.address.spec if target else None,
+                                      test_info.get('classname'),
+                                      test_info['time'])
 
   def _report_test_info(self, scope, target, keys, test_info):
     """Add test information to target information.
@@ -258,6 +405,9 @@ class TestRunnerTaskMixin(object):
     timeout = self._timeout_for_targets(test_targets)
 
     process_handler = self._spawn(*args, **kwargs)
+    partition_processes = self._partition_processes
+    if partition_processes:
+      partition_processes.started(process_handler)
 
     def maybe_terminate(wait_time):
       if process_handler.poll() < 0:
@@ -284,8 +434,13 @@ class TestRunnerTaskMixin(object):
       self.context.log.error('FAILURE: Timeout of {} seconds reached.'.format(timeout))
       raise ErrorWhileTesting(str(e), failed_targets=test_targets)
     finally:
+      if partition_processes:
+        partition_processes.finished()
       maybe_terminate(wait_time=self.get_options().timeout_terminate_wait)
 
+  # The processes of the partitions run by `_run_partitions_concurrently`, while it runs.
+  _partition_processes = None
+
   @abstractmethod
   def _spawn(self, *args, **kwargs):
     """Spawn the actual test runner process.
@@ -358,6 +513,9 @@ class TestRunnerTaskMixin(object):
     """Returns the targets that are relevant test targets."""
 
     test_targets = list(filter(self._test_target_filter(), self._get_targets()))
+    if self._shard_by_durations:
+      in_shard = self._targets_in_duration_shard(tuple(test_targets))
+      test_targets = [target for target in test_targets if target.address.spec in in_shard]
     return test_targets
 
   @abstractmethod
@@ -414,6 +572,10 @@ class PartitionedTestRunnerTaskMixin(TestRunnerTaskMixin, Task):
              help='Run tests in a chroot. Any loose files tests depend on via `{}` dependencies '
                   'will be copied to the chroot.'
              .format(Files.alias()))
+    register('--partition-concurrency', advanced=True, type=int, default=1,
+             help='The maximum number of test partitions to run at once. With `--no-fast` each '
+                  'test target is its own partition. Partitions are only run concurrently if the '
+                  'test runner supports it with its other options.')
 
   @staticmethod
   def _vts_for_partition(invalidation_check):
@@ -436,6 +598,18 @@ class PartitionedTestRunnerTaskMixin(TestRunnerTaskMixin, Task):
     """
     return self.get_options().chroot
 
+  @property
+  def supports_concurrent_partitions(self):
+    """Return `True` if partitions may be run concurrently given this task's current options.
+
+    Partitions run concurrently each run in their own thread, and so must not share mutable state
+    (e.g. output files) or mutate process-wide state (e.g. the working directory or environment),
+    including in `_spawn`.
+
+    :rtype: bool
+    """
+    return False
+
   def _execute(self, all_targets):
     test_targets = self._get_test_targets()
     if not test_targets:
@@ -445,21 +619,14 @@ class PartitionedTestRunnerTaskMixin(TestRunnerTaskMixin, Task):
 
     per_target = not self.get_options().fast
     fail_fast = self.get_options().fail_fast
+    concurrency = self.get_options().partition_concurrency
 
-    results = {}
-    failure = False
     with self.partitions(per_target, all_targets, test_targets) as partitions:
-      for (partition, args) in partitions():
-        try:
-          rv = self._run_partition(fail_fast, partition, *args)
-        except ErrorWhileTesting as e:
-          rv = self.result_class.from_error(e)
-
-        results[partition] = rv
-        if not rv.success:
-          failure = True
-          if fail_fast:
-            break
+      if concurrency > 1 and self.supports_concurrent_partitions:
+        results = self._run_partitions_concurrently(fail_fast, partitions(), concurrency)
+      else:
+        results = self._run_partitions(fail_fast, partitions())
+      failure = any(not rv.success for rv in results.values())
 
       for partition in sorted(results):
         rv = results[partition]
@@ -483,6 +650,86 @@ class PartitionedTestRunnerTaskMixin(TestRunnerTaskMixin, Task):
         # A low-level test execution failure occurred before tests were run.
         raise TaskError()
 
+  def _run_partition_for_result(self, fail_fast, partition, args):
+    try:
+      return self._run_partition(fail_fast, partition, *args)
+    except ErrorWhileTesting as e:
+      return self.result_class.from_error(e)
+
+  def _run_partitions(self, fail_fast, partitions):
+    """Runs the given partitions one at a time.
+
+    :returns: A dict from each partition that was run to its result.
+    """
+    results = {}
+    for partition, args in partitions:
+      rv = self._run_partition_for_result(fail_fast, partition, args)
+      results[partition] = rv
+      if not rv.success and fail_fast:
+        break
+    return results
+
+  def _run_partitions_concurrently(self, fail_fast, partitions, concurrency):
+    """Runs the given partitions on up to `concurrency` threads.
+
+    Partitions are started in order. Once a partition fails under `fail_fast`, or raises an
+    unexpected error, no further partitions are started and the test processes of those already
+    running are terminated. Partitions whose test processes were terminated are not run to a
+    result, just like those that were never started.
+
+    :returns: A dict from each partition that was run to its result.
+    """
+    results = {}
+    errors = []
+    completed = queue.Queue()
+    partition_processes = _PartitionProcesses(self.get_options().timeout_terminate_wait)
+
+    def run_partition(partition, args):
+      try:
+        rv, exc_info = self._run_partition_for_result(fail_fast, partition, args), None
+      except Exception:
+        rv, exc_info = None, sys.exc_info()
+      if partition_processes.take_terminated():
+        rv, exc_info = None, None
+      completed.put((partition, rv, exc_info))
+
+    def await_one():
+      # NB: An explicit timeout keeps the wait interruptible.
+      partition, rv, exc_info = completed.get(timeout=1000000000)
+      if exc_info:
+        errors.append(exc_info)
+      elif rv:
+        results[partition] = rv
+
+    def should_stop():
+      return errors or (fail_fast and any(not rv.success for rv in results.values()))
+
+    with self.context.new_workunit(name='partitions') as workunit:
+      pool = WorkerPool(workunit, self.context.run_tracker, concurrency)
+      running = 0
+      self._partition_processes = partition_processes
+      try:
+        for partition, args in partitions:
+          while running >= concurrency and not should_stop():
+            await_one()
+            running -= 1
+          if should_stop():
+            break
+          pool.submit_async_work(Work(run_partition, [(partition, args)]))
+          running += 1
+        while running > 0:
+          if should_stop():
+            partition_processes.cancel()
+          await_one()
+          running -= 1
+      finally:
+        self._partition_processes = None
+        pool.shutdown()
+
+    if errors:
+      six.reraise(*errors[0])
+    return results
+
   # Some notes on invalidation vs caching as used in `run_partition` below. Here invalidation
   # refers to executing task work in `Task.invalidated` blocks against invalid targets. Caching
   # refers to storing the results of that work in the artifact cache using
@@ -294,8 +294,9 @@ def safe_rm_oldest_items_in_dir(root_dir, num_of_items_to_keep, excludes=frozens
   :param root_dir: the folder to examine
   :param num_of_items_to_keep: number of files/folders/symlinks to keep after the cleanup
   :param excludes: absolute paths excluded from removal (must be prefixed with `root_dir`)
-  :return: none
+  :return: the removed paths
   """
+  removed = []
   if os.path.isdir(root_dir):
     found_files = []
     for old_file in os.listdir(root_dir):
@@ -305,6 +306,8 @@ def safe_rm_oldest_items_in_dir(root_dir, num_of_items_to_keep, excludes=frozens
     found_files = sorted(found_files, key=lambda x: x[1], reverse=True)
     for cur_file, _ in found_files[num_of_items_to_keep:]:
       rm_rf(cur_file)
+      removed.append(cur_file)
+  return removed
 
 
 @contextmanager
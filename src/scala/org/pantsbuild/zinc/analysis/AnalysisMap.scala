@@ -61,32 +61,36 @@ class AnalysisMap private[AnalysisMap] (
      * An implementation of definesClass that will use analysis for an input directory to determine
      * whether it defines a particular class.
      *
+     * The result is cached across compiles for as long as the analysis (or, for a jar without
+     * analysis, the jar itself) is unchanged, so that each upstream entry is only indexed once per
+     * server rather than once per compile.
+     *
      * TODO: This optimization is unnecessary for jars on the classpath, which are already indexed.
      * Can remove after the sbt jar output patch lands.
      */
-    def definesClass(classpathEntry: File): DefinesClass = {
-      getAnalysis(classpathEntry).map { analysis =>
-        // strongly hold the classNames, and transform them to ensure that they are unlinked from
-        // the remainder of the analysis
-        val classNames = analysis.asInstanceOf[Analysis].relations.srcProd.reverseMap.keys.toList.toSet.map(
-          (f: File) => filePathToClassName(f))
-        new ClassNamesDefinesClass(classNames)
-      }.getOrElse {
-        // no analysis: return a function that will scan instead
-        Locate.definesClass(classpathEntry)
+    def definesClass(classpathEntry: File): DefinesClass =
+      analysisLocations.get(classpathEntry) match {
+        case Some(cacheFPrint) =>
+          cacheLookup(cacheFPrint).map { analysis =>
+            AnalysisMap.definesClassCache.getOrElseUpdate(cacheFPrint) {
+              AnalysisMap.analysisDefinesClass(analysis)
+            }
+          }.getOrElse {
+            // no analysis: return a function that will scan instead
+            Locate.definesClass(classpathEntry)
+          }
+        case None if classpathEntry.isFile =>
+          // A jar, which is scanned once for as long as it is unmodified.
+          FileFPrint.fprint(classpathEntry).map { jarFPrint =>
+            AnalysisMap.definesClassCache.getOrElseUpdate(jarFPrint) {
+              Locate.definesClass(classpathEntry)
+            }
+          }.getOrElse {
+            Locate.definesClass(classpathEntry)
+          }
+        case None =>
+          Locate.definesClass(classpathEntry)
       }
-    }
-
-    private class ClassNamesDefinesClass(classes: Set[String]) extends DefinesClass {
-      override def apply(className: String): Boolean = classes(className)
-    }
-
-    private def filePathToClassName(file: File): String = {
-      // Extract className from path, for example:
-      //   .../.pants.d/compile/zinc/.../current/classes/org/pantsbuild/example/hello/exe/Exe.class
-      //   => org.pantsbuild.example.hello.exe.Exe
-      file.getAbsolutePath.split("current/classes")(1).drop(1).replace(".class", "").replaceAll("/", ".")
-    }
 
     /**
      * Gets analysis for a classpath entry (if it exists) by translating its path to a potential
@@ -149,6 +153,42 @@ object AnalysisMap {
   private val analysisCache =
     Cache[FileFPrint, Option[AnalysisContents]](analysisCacheLimit)
 
+  private val definesClassCacheLimit =
+    Util.intProperty(
+      "zinc.classpath.cache.limit",
+      Int.MaxValue
+    )
+
+  /**
+   * Static cache of the classes defined by upstream classpath entries, keyed by the fingerprint
+   * of their analysis, or for jars without analysis, of the jar.
+   */
+  private val definesClassCache =
+    Cache[FileFPrint, DefinesClass](definesClassCacheLimit)
+
+  /**
+   * A DefinesClass for the classes produced by the given analysis. It holds no reference to the
+   * analysis, or to the AnalysisMap that created it, so that it can be cached independently.
+   */
+  private def analysisDefinesClass(analysis: CompileAnalysis): DefinesClass = {
+    // strongly hold the classNames, and transform them to ensure that they are unlinked from
+    // the remainder of the analysis
+    val classNames = analysis.asInstanceOf[Analysis].relations.srcProd.reverseMap.keys.toList.toSet.map(
+      (f: File) => filePathToClassName(f))
+    new ClassNamesDefinesClass(classNames)
+  }
+
+  private class ClassNamesDefinesClass(classes: Set[String]) extends DefinesClass {
+    override def apply(className: String): Boolean = classes(className)
+  }
+
+  private def filePathToClassName(file: File): String = {
+    // Extract className from path, for example:
+    //   .../.pants.d/compile/zinc/.../current/classes/org/pantsbuild/example/hello/exe/Exe.class
+    //   => org.pantsbuild.example.hello.exe.Exe
+    file.getAbsolutePath.split("current/classes")(1).drop(1).replace(".class", "").replaceAll("/", ".")
+  }
+
   def create(options: AnalysisOptions): AnalysisMap =
     new AnalysisMap(
       // create fingerprints for all inputs at startup
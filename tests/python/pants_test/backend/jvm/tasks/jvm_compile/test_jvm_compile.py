@@ -10,6 +10,7 @@ import os
 from pants.backend.jvm.targets.java_library import JavaLibrary
 from pants.backend.jvm.tasks.classpath_products import ClasspathProducts
 from pants.backend.jvm.tasks.jvm_compile.jvm_compile import JvmCompile
+from pants.base.exceptions import TaskError
 from pants_test.tasks.task_test_base import TaskTestBase
 
 
@@ -47,3 +48,15 @@ class JvmCompileTest(TaskTestBase):
     resulting_classpath = task.create_runtime_classpath()
     self.assertEqual([('default', pre_init_runtime_entry), ('default', compile_entry)],
       resulting_classpath.get_for_target(target))
+
+  def _compile_job_memory_mb(self, **options):
+    self.set_options(worker_memory_budget_mb=4096, jvm_options=['-Xmx512m', '-Xmx1g'], **options)
+    return self.create_task(self.context())._compile_job_memory_mb()
+
+  def test_compile_job_memory_subprocess(self):
+    self.assertEqual(1024, self._compile_job_memory_mb(use_nailgun=False))
+
+  def test_compile_job_memory_nailgun_pool(self):
+    self.assertEqual(0, self._compile_job_memory_mb(use_nailgun=True, nailgun_pool_size=4))
+    with self.assertRaises(TaskError):
+      self._compile_job_memory_mb(use_nailgun=True, nailgun_pool_size=5)
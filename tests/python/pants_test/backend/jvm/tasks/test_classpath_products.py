@@ -369,6 +369,48 @@ class ClasspathProductsTest(BaseTest):
                                             resolved_jar.cache_path)
     self.assertEqual([('fred-conf', expected_entry)], classpath_target_tuples)
 
+  def test_get_classpath_entries_for_targets_shares_entries(self):
+    b = self.make_target('b', JvmTarget)
+    a = self.make_target('a', JvmTarget, dependencies=[b])
+    classpath_product = ClasspathProducts(self.pants_workdir)
+    example_jar_path = self._example_jar_path()
+    self.add_jar_classpath_element_for_path(classpath_product, a, example_jar_path)
+    self.add_jar_classpath_element_for_path(classpath_product, b, example_jar_path)
+
+    (a_entry,) = classpath_product.get_classpath_entries_for_targets([a])
+    (b_entry,) = classpath_product.get_classpath_entries_for_targets([b])
+    self.assertIs(a_entry, b_entry)
+
+    copied = classpath_product.copy()
+    copied.add_for_target(b, [('default', self.path('b/path'))])
+    self.assertIs(a_entry, copied.get_classpath_entries_for_targets([a])[0])
+
+  def test_get_classpath_entries_for_targets_after_edits(self):
+    b = self.make_target('b', JvmTarget, excludes=[Exclude('com.example', 'lib')])
+    a = self.make_target('a', JvmTarget, dependencies=[b])
+    classpath_product = ClasspathProducts(self.pants_workdir)
+    resolved_jar = self.add_jar_classpath_element_for_path(classpath_product, a,
+                                                           self._example_jar_path())
+    a_closure = a.closure(bfs=True)
+
+    self.assertEqual([('default', resolved_jar.pants_path)],
+                     classpath_product.get_for_targets(a_closure))
+
+    classpath_product.add_for_target(b, [('default', self.path('b/path'))])
+    self.assertEqual([('default', resolved_jar.pants_path), ('default', self.path('b/path'))],
+                     classpath_product.get_for_targets(a_closure))
+
+    self.add_excludes_for_targets(classpath_product, b)
+    self.assertEqual([('default', self.path('b/path'))],
+                     classpath_product.get_for_targets(a_closure))
+    self.assertEqual([('default', resolved_jar.pants_path), ('default', self.path('b/path'))],
+                     [(conf, entry.path) for conf, entry in
+                      classpath_product.get_classpath_entries_for_targets(a_closure,
+                                                                          respect_excludes=False)])
+
+    classpath_product.remove_for_target(b, [('default', self.path('b/path'))])
+    self.assertEqual([], classpath_product.get_for_targets(a_closure))
+
   def test_get_artifact_classpath_entries_for_targets(self):
     b = self.make_target('b', JvmTarget, excludes=[Exclude('com.example', 'lib')])
     a = self.make_target('a', JvmTarget, dependencies=[b])
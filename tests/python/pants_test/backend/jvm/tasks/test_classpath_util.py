@@ -6,6 +6,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+import time
 from collections import OrderedDict
 
 from pants.backend.jvm.targets.jvm_target import JvmTarget
@@ -14,6 +15,7 @@ from pants.backend.jvm.tasks.classpath_util import ClasspathUtil
 from pants.goal.products import UnionProducts
 from pants.java.jar.exclude import Exclude
 from pants.java.jar.jar_dependency_utils import M2Coordinate, ResolvedJar
+from pants.util.contextutil import open_zip
 from pants_test.base_test import BaseTest
 
 
@@ -105,5 +107,31 @@ class ClasspathUtilTest(BaseTest):
                       ClasspathUtil.classpath_by_targets(a.closure(bfs=True),
                                                          classpath_products))
 
+  def _write_jar(self, path, names, mtime):
+    with open_zip(path, 'w') as jar:
+      for name in names:
+        jar.writestr(name, b'')
+    os.utime(path, (mtime, mtime))
+
+  def test_jar_contents_cached_until_modified(self):
+    jar = self._path('jar/contents.jar')
+    an_hour_ago = time.time() - 3600
+    self._write_jar(jar, ['a/A.class', 'a/B.class'], an_hour_ago)
+
+    contents = ClasspathUtil._jar_contents(jar)
+    self.assertEqual(('a/A.class', 'a/B.class'), contents)
+    self.assertIs(contents, ClasspathUtil._jar_contents(jar))
+
+    self._write_jar(jar, ['b/C.class'], an_hour_ago + 1)
+    self.assertEqual(['b/C.class'], list(ClasspathUtil.classpath_entries_contents([jar])))
+
+  def test_recently_modified_jar_contents_not_cached(self):
+    jar = self._path('jar/recent.jar')
+    self._write_jar(jar, ['a/A.class'], time.time())
+
+    contents = ClasspathUtil._jar_contents(jar)
+    self.assertEqual(('a/A.class',), contents)
+    self.assertIsNot(contents, ClasspathUtil._jar_contents(jar))
+
   def _path(self, p):
     return self.create_workdir_file(p)
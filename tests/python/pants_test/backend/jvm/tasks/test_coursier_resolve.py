@@ -25,6 +25,7 @@ from pants.java.jar.exclude import Exclude
 from pants.java.jar.jar_dependency import JarDependency
 from pants.task.task import Task
 from pants.util.contextutil import temporary_dir, temporary_file_path
+from pants.util.dirutil import touch
 from pants_test.jvm.jvm_tool_task_test_base import JvmToolTaskTestBase
 from pants_test.subsystem.subsystem_util import init_subsystem
 from pants_test.tasks.task_test_base import TaskTestBase
@@ -276,6 +277,84 @@ class CoursierResolveTest(JvmToolTaskTestBase):
 
       task.runjava.assert_called()
 
+  def test_resolution_cache(self):
+    jar = JarDependency('junit', 'junit', rev='4.12')
+    other_jar = JarDependency('org.hamcrest', 'hamcrest-core', rev='1.3')
+    with self._temp_workdir() as workdir:
+      jar_path = os.path.join(workdir, 'junit.jar')
+      touch(jar_path)
+      result = {'conflict_resolution': {},
+                'dependencies': [{'coord': 'junit:junit:4.12', 'dependencies': [],
+                                  'file': jar_path}]}
+
+      task = self.create_task(self.context())
+      task._call_coursier = MagicMock(return_value=result)
+
+      def resolve_conf(jars, special_args=()):
+        return task._resolve_conf('default', jars, ['fetch'], [], set(), workdir, 'coursier.jar',
+                                  special_args)
+
+      self.assertEqual(result, resolve_conf([jar, other_jar]))
+      self.assertEqual(1, task._call_coursier.call_count)
+
+      # The same inputs in another order hit the cache.
+      self.assertEqual(result, resolve_conf([other_jar, jar]))
+      self.assertEqual(1, task._call_coursier.call_count)
+
+      # Different inputs miss it.
+      resolve_conf([jar])
+      resolve_conf([jar, other_jar], special_args=['--sources'])
+      self.assertEqual(3, task._call_coursier.call_count)
+
+      # A cached result is stale once a file it resolved is gone.
+      os.unlink(jar_path)
+      resolve_conf([jar, other_jar])
+      self.assertEqual(4, task._call_coursier.call_count)
+
+      self.set_options(resolution_cache=False)
+      task = self.create_task(self.context())
+      task._call_coursier = MagicMock(return_value=result)
+      resolve_conf([jar])
+      self.assertEqual(1, task._call_coursier.call_count)
+
+  def test_resolution_cache_skips_changing_revs(self):
+    jar = JarDependency('junit', 'junit', rev='4.12')
+    snapshot_jar = JarDependency('org.hamcrest', 'hamcrest-core', rev='1.3-SNAPSHOT')
+    range_jar = JarDependency('org.hamcrest', 'hamcrest-core', rev='[1.3,)')
+    with self._temp_workdir() as workdir:
+      def result_for(*revs):
+        return {'conflict_resolution': {},
+                'dependencies': [{'coord': 'junit:junit:{}'.format(rev), 'dependencies': []}
+                                 for rev in revs]}
+
+      task = self.create_task(self.context())
+      task._call_coursier = MagicMock(return_value=result_for('4.12'))
+
+      def resolve_conf(jars):
+        return task._resolve_conf('default', jars, ['fetch'], [], set(), workdir, 'coursier.jar')
+
+      for jars in ([jar, snapshot_jar], [jar, range_jar]):
+        resolve_conf(jars)
+        resolve_conf(jars)
+      self.assertEqual(4, task._call_coursier.call_count)
+
+      # Results that resolved to a snapshot transitively aren't cached either.
+      task._call_coursier = MagicMock(return_value=result_for('4.12', '5.0-SNAPSHOT'))
+      resolve_conf([jar])
+      resolve_conf([jar])
+      self.assertEqual(2, task._call_coursier.call_count)
+
+  def test_resolution_cache_is_bounded(self):
+    with self._temp_workdir() as workdir:
+      task = self.create_task(self.context())
+      task.MAX_CACHED_RESOLUTIONS = 2
+      task._call_coursier = MagicMock(return_value={'conflict_resolution': {}, 'dependencies': []})
+      for i in range(4):
+        task._resolve_conf('default', [JarDependency('junit', 'junit', rev='4.{}'.format(i))],
+                           ['fetch'], [], set(), workdir, 'coursier.jar')
+      resolutions_dir = os.path.join(workdir, 'coursier', 'resolutions')
+      self.assertEqual(2, len(os.listdir(resolutions_dir)))
+
   def test_resolve_jarless_pom(self):
     jar = JarDependency('org.apache.commons', 'commons-weaver-privilizer-parent', '1.3')
     lib = self.make_target('//:b', JarLibrary, jars=[jar])
@@ -7,6 +7,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import json
 import os
+import sys
 import xml.etree.ElementTree as ET
 from collections import namedtuple
 from textwrap import dedent
@@ -491,6 +492,55 @@ class IvyUtilsGenerateIvyTest(IvyUtilsTestBase):
     assert_order([module4, module2, module1, module3, module6, module5])
     assert_order([module4, module2, module5, module6, module1, module3])
 
+  def test_traverse_deep_dep_graph(self):
+    # A chain of modules deeper than the recursion limit.
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(200)
+    try:
+      refs = [IvyModuleRef(org='foo', name='{}'.format(i), rev='1.0') for i in range(300)]
+      info = IvyInfo('default')
+      info.add_module(IvyModule(refs[0], '/foo/0.jar', []))
+      for i, ref in enumerate(refs[1:], start=1):
+        info.add_module(IvyModule(ref, '/foo/{}.jar'.format(i), [refs[i - 1]]))
+
+      result = info.traverse_dependency_graph(refs[0], lambda dep: OrderedSet([dep]))
+      self.assertEqual(refs, list(result))
+
+      resolved_jars = info.get_resolved_jars_for_coordinates([coord(org='foo', name='0',
+                                                                    rev='1.0')])
+      self.assertEqual(len(refs), len(resolved_jars))
+    finally:
+      sys.setrecursionlimit(recursion_limit)
+
+  def test_cycle_memo_across_calls(self):
+    # Refs on a cycle each depend on the whole cycle, whichever is traversed first.
+    ref1 = IvyModuleRef(org='foo', name='1', rev='1.0')
+    ref2 = IvyModuleRef(org='foo', name='2', rev='1.0')
+    ref3 = IvyModuleRef(org='foo', name='3', rev='1.0')
+    info = IvyInfo('default')
+    info.add_module(IvyModule(ref1, '/foo/1.jar', [ref3]))
+    info.add_module(IvyModule(ref2, '/foo/2.jar', [ref1]))
+    info.add_module(IvyModule(ref3, '/foo/3.jar', [ref2]))
+
+    def collector(dep):
+      return OrderedSet([dep])
+
+    memo = {}
+    self.assertEqual([ref1, ref2, ref3], list(info.traverse_dependency_graph(ref1, collector, memo)))
+    self.assertEqual([ref2, ref3, ref1], list(info.traverse_dependency_graph(ref2, collector, memo)))
+    self.assertEqual([ref3, ref1, ref2], list(info.traverse_dependency_graph(ref3, collector, memo)))
+
+  def test_resolved_jars_shared_between_coordinates(self):
+    ivy_info = self.parse_ivy_report('ivy_utils_resources/report_with_diamond.xml')
+    coordinates = [JarDependency(org='org1', name='name1', rev='0.0.1', classifier='tests')]
+
+    memo = {}
+    resolved_jars1 = ivy_info.get_resolved_jars_for_coordinates(coordinates, memo=memo)
+    resolved_jars2 = ivy_info.get_resolved_jars_for_coordinates(coordinates, memo=memo)
+    self.assertEqual(list(resolved_jars1), list(resolved_jars2))
+    for jar1, jar2 in zip(resolved_jars1, resolved_jars2):
+      self.assertIs(jar1, jar2)
+
   def test_collects_classifiers(self):
     ivy_info = self.parse_ivy_report('ivy_utils_resources/report_with_multiple_classifiers.xml')
 
@@ -159,6 +159,30 @@ class TestJvmDependencyUsage(TaskTestBase):
     self.assertEqual(set(), graph._nodes[t4].dep_edges[t3].products_used)
     self.assertTrue(graph._nodes[t4].dep_edges[t3].is_declared)
 
+  def test_targets_for_class(self):
+    t1 = self.make_java_target(spec=':t1', sources=['a.java'])
+    t2 = self.make_java_target(spec=':t2', sources=['b.java'], dependencies=[t1])
+    t3 = self.make_java_target(spec=':t3', sources=['c.java'], dependencies=[t2])
+    t4 = self.make_java_target(spec=':t4', sources=['d.java'])
+    dep_usage, product_deps_by_src = self._setup({
+        t1: ['org/pantsbuild/Foo.class', 'org/pantsbuild/Foo$Inner.class'],
+        t2: ['org/pantsbuild/FooBar.class'],
+        t3: ['org/pantsbuild/Baz.class'],
+        t4: ['org/pantsbuild/Foo.class'],
+    })
+    runtime_classpath = dep_usage.context.products.get_data('runtime_classpath')
+    analyzer = JvmDependencyAnalyzer('', runtime_classpath, product_deps_by_src)
+
+    # Class names match by substring, and only within the closure of the given target.
+    self.assertEqual({t1, t2}, analyzer.targets_for_class(t3, 'pantsbuild.Foo'))
+    self.assertEqual({t1}, analyzer.targets_for_class(t3, 'Foo$Inner'))
+    self.assertEqual({t3}, analyzer.targets_for_class(t3, 'Baz'))
+    self.assertEqual(set(), analyzer.targets_for_class(t3, 'Qux'))
+    self.assertEqual(set(), analyzer.targets_for_class(t3, 'Foo.Bar'))
+    self.assertEqual({t4}, analyzer.targets_for_class(t4, 'Foo'))
+    # Names shorter than an indexed ngram are searched for in the whole closure.
+    self.assertEqual({t1, t2}, analyzer.targets_for_class(t2, 'o'))
+
   def create_graph(self, task, targets):
     classes_by_source = task.context.products.get_data('classes_by_source')
     runtime_classpath = task.context.products.get_data('runtime_classpath')
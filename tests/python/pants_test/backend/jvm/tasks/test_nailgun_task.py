@@ -0,0 +1,42 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+from pants.backend.jvm.tasks.nailgun_task import NailgunTask
+from pants_test.tasks.task_test_base import TaskTestBase
+
+
+class DummyNailgunTask(NailgunTask):
+  def execute(self):
+    pass
+
+
+class NailgunTaskTest(TaskTestBase):
+
+  @classmethod
+  def task_type(cls):
+    return DummyNailgunTask
+
+  def _identities_and_workdirs(self, pool_keys, **options):
+    self.set_options(**options)
+    task = self.create_task(self.context())
+    return task, [task._pooled_identity_and_workdir(pool_key) for pool_key in pool_keys]
+
+  def test_single_server(self):
+    task, pooled = self._identities_and_workdirs(['a', 'b', None], nailgun_pool_size=1)
+    self.assertEqual({(task._identity, task._executor_workdir)}, set(pooled))
+
+  def test_pool_servers_are_selected_by_key(self):
+    keys = ['key{}'.format(i) for i in range(20)]
+    task, pooled = self._identities_and_workdirs(keys + keys, nailgun_pool_size=3)
+
+    # A key always selects the same server.
+    self.assertEqual(pooled[:len(keys)], pooled[len(keys):])
+    # Servers have their own identities and workdirs, and keys are spread between them.
+    identities = {identity for identity, _ in pooled}
+    workdirs = {workdir for _, workdir in pooled}
+    self.assertEqual({'{}_{}'.format(task._identity, i) for i in range(3)}, identities)
+    self.assertEqual(3, len(workdirs))
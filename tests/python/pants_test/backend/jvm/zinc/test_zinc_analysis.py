@@ -6,13 +6,16 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+import shutil
 import StringIO
 import unittest
 
+import mock
+
 from pants.backend.jvm.tasks.jvm_compile.analysis_tools import AnalysisTools
 from pants.backend.jvm.zinc.zinc_analysis_element import ZincAnalysisElement
 from pants.backend.jvm.zinc.zinc_analysis_parser import ZincAnalysisParser
-from pants.util.contextutil import environment_as
+from pants.util.contextutil import environment_as, temporary_dir
 
 
 class ZincAnalysisTestSimple(unittest.TestCase):
@@ -54,6 +57,77 @@ class ZincAnalysisTestSimple(unittest.TestCase):
         ])
 
 
+class ZincAnalysisTestRebasing(unittest.TestCase):
+  _JAVA_HOME = b'/Library/Java/JavaVirtualMachines/jdk1.8.0_40.jdk'
+
+  def _analysis_path(self, name):
+    return os.path.join(os.path.dirname(__file__), 'testdata', 'simple', name)
+
+  def _analysis_text(self, name):
+    with open(self._analysis_path(name), 'rb') as fp:
+      return fp.read()
+
+  def _analysis_tools(self, workers):
+    return AnalysisTools(self._JAVA_HOME, ZincAnalysisParser(), None, '/src/pants',
+                         '/src/pants/.pants.d', workers=workers)
+
+  def _rebase(self, text, java_home=None):
+    buf = StringIO.StringIO()
+    ZincAnalysisParser().rebase(iter(text.splitlines(True)), buf,
+                                {b'/src/pants': AnalysisTools._PANTS_BUILDROOT_PLACEHOLDER,
+                                 b'/src/pants/.pants.d': AnalysisTools._PANTS_WORKDIR_PLACEHOLDER},
+                                java_home)
+    return buf.getvalue()
+
+  def test_rebase_in_small_chunks(self):
+    # Sections are streamed in chunks, and spooled to disk when they are large.
+    with environment_as(ZINCUTILS_SORTED_ANALYSIS='1'):
+      with mock.patch.object(ZincAnalysisParser, '_REBASE_CHUNK_LINES', 3):
+        with mock.patch.object(ZincAnalysisParser, '_REBASE_SPOOL_BYTES', 16):
+          text = self._analysis_text('simple.analysis')
+          self.assertMultiLineEqual(self._analysis_text('simple.rebased.analysis'),
+                                    self._rebase(text))
+          self.assertMultiLineEqual(self._analysis_text('simple.rebased.filtered.analysis'),
+                                    self._rebase(text, self._JAVA_HOME))
+
+  def test_rebase_truncated(self):
+    lines = self._analysis_text('simple.analysis').splitlines(True)
+    with self.assertRaises((ZincAnalysisParser.ParseError, StopIteration)):
+      self._rebase(b''.join(lines[:len(lines) // 2]))
+
+  def _test_localize_all(self, workers):
+    analysis_tools = self._analysis_tools(workers)
+    with temporary_dir() as tmpdir:
+      num_analyses = AnalysisTools.MIN_ANALYSES_FOR_POOL
+      analyses = [os.path.join(tmpdir, 'target{}.analysis'.format(i)) for i in range(num_analyses)]
+      portable = [os.path.join(tmpdir, 'target{}.portable'.format(i)) for i in range(num_analyses)]
+      localized = [os.path.join(tmpdir, 'target{}.localized'.format(i)) for i in range(num_analyses)]
+      for analysis in analyses:
+        shutil.copy(self._analysis_path('simple.analysis'), analysis)
+
+      for analysis, path in zip(analyses, portable):
+        analysis_tools.relativize(analysis, path)
+        with open(path, 'rb') as fp:
+          self.assertMultiLineEqual(self._analysis_text('simple.rebased.filtered.analysis'),
+                                    fp.read())
+
+      analysis_tools.localize_all(zip(portable, localized))
+      for path in localized:
+        with open(path, 'rb') as fp:
+          localized_text = fp.read()
+        self.assertNotIn(AnalysisTools._PANTS_BUILDROOT_PLACEHOLDER, localized_text)
+        self.assertEqual(self._analysis_text('simple.rebased.filtered.analysis'),
+                         self._rebase(localized_text))
+      self.assertEqual(sorted(analyses + portable + localized),
+                       sorted(os.path.join(tmpdir, name) for name in os.listdir(tmpdir)))
+
+  def test_localize_all_serially(self):
+    self._test_localize_all(workers=1)
+
+  def test_localize_all_in_parallel(self):
+    self._test_localize_all(workers=2)
+
+
 class ZincAnalysisTestSorting(unittest.TestCase):
   class FakeElement(ZincAnalysisElement):
     headers = ('foo', )
@@ -0,0 +1,69 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from pants.backend.python.tasks.coverage_selection import CoverageSelectionIndex
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_delete, safe_file_dump
+
+
+class CoverageSelectionIndexTest(unittest.TestCase):
+
+  def _index(self, root):
+    return CoverageSelectionIndex(os.path.join(root, '.index.json'), root)
+
+  def test_unaffected_tests(self):
+    with temporary_dir() as root:
+      safe_file_dump(os.path.join(root, 'lib/a.py'), 'a = 1')
+      safe_file_dump(os.path.join(root, 'lib/b.py'), 'b = 1')
+      safe_file_dump(os.path.join(root, 'tests/test_lib.py'), 'def test_a(): pass')
+
+      index = self._index(root)
+      index.record('tests/test_lib.py::test_a', ['tests/test_lib.py', 'lib/a.py'], 'ctx')
+      index.record('tests/test_lib.py::test_b', ['tests/test_lib.py', 'lib/b.py'], 'ctx')
+      index.record('tests/test_other.py::test_a', ['lib/a.py'], 'ctx')
+      index.save()
+
+      self.assertEqual({'tests/test_lib.py::test_a', 'tests/test_lib.py::test_b'},
+                       self._index(root).unaffected_tests(['tests/test_lib.py'], 'ctx'))
+
+      safe_file_dump(os.path.join(root, 'lib/b.py'), 'b = 2')
+      self.assertEqual({'tests/test_lib.py::test_a'},
+                       self._index(root).unaffected_tests(['tests/test_lib.py'], 'ctx'))
+
+      safe_delete(os.path.join(root, 'lib/a.py'))
+      self.assertEqual(set(), self._index(root).unaffected_tests(['tests/test_lib.py'], 'ctx'))
+
+  def test_changed_context(self):
+    with temporary_dir() as root:
+      safe_file_dump(os.path.join(root, 'tests/test_lib.py'), 'def test_a(): pass')
+      index = self._index(root)
+      index.record('tests/test_lib.py::test_a', ['tests/test_lib.py'], 'ctx')
+      index.save()
+
+      self.assertEqual({'tests/test_lib.py::test_a'},
+                       self._index(root).unaffected_tests(['tests/test_lib.py'], 'ctx'))
+      self.assertEqual(set(), self._index(root).unaffected_tests(['tests/test_lib.py'], 'other'))
+
+  def test_forget(self):
+    with temporary_dir() as root:
+      safe_file_dump(os.path.join(root, 'tests/test_lib.py'), 'def test_a(): pass')
+      index = self._index(root)
+      index.record('tests/test_lib.py::test_a', ['tests/test_lib.py'], 'ctx')
+      index.save()
+
+      index = self._index(root)
+      index.forget('tests/test_lib.py::test_a')
+      index.save()
+      self.assertEqual(set(), self._index(root).unaffected_tests(['tests/test_lib.py'], 'ctx'))
+
+  def test_unreadable_index_is_ignored(self):
+    with temporary_dir() as root:
+      safe_file_dump(os.path.join(root, '.index.json'), '{')
+      self.assertEqual(set(), self._index(root).unaffected_tests(['tests/test_lib.py'], 'ctx'))
@@ -22,6 +22,7 @@ from pants.backend.python.tasks.resolve_requirements import ResolveRequirements
 from pants.backend.python.tasks.select_interpreter import SelectInterpreter
 from pants.base.exceptions import ErrorWhileTesting, TaskError
 from pants.build_graph.target import Target
+from pants.python.forked_worker_pool import ForkedWorkerPool
 from pants.source.source_root import SourceRootConfig
 from pants.util.contextutil import pushd, temporary_dir, temporary_file
 from pants.util.dirutil import safe_mkdtemp, safe_rmtree
@@ -703,6 +704,82 @@ class PytestTest(PytestTestBase):
     with self.assertRaises(PytestRun.InvalidShardSpecification):
       self.run_tests(targets=[self.green], test_shard='1/a')
 
+  def test_select_by_coverage(self):
+    with temporary_dir() as marker_dir:
+      mark = dedent("""
+        import os
+        import unittest
+
+
+        def mark(name):
+          with open(os.path.join({marker_dir!r}, name), 'w'):
+            pass
+      """.format(marker_dir=marker_dir))
+      self.create_file(
+        'tests/test_selection_core.py',
+        mark + dedent("""
+          import core
+
+
+          class CoreSelectionTest(unittest.TestCase):
+            def test_core(self):
+              mark('test_core')
+              self.assertEqual(1, core.one())
+        """))
+      self.create_file(
+        'tests/test_selection_app.py',
+        mark + dedent("""
+          import app
+
+
+          class AppSelectionTest(unittest.TestCase):
+            def test_app(self):
+              mark('test_app')
+              self.assertEqual(2, app.use_two())
+
+            def test_skipped(self):
+              mark('test_skipped')
+              self.skipTest('Skipped tests are always selected.')
+        """))
+      target = self.make_target(spec='tests:selection',
+                                target_type=PythonTests,
+                                sources=['test_selection_core.py', 'test_selection_app.py'],
+                                dependencies=[self.target('app')])
+
+      def run_tests():
+        for name in os.listdir(marker_dir):
+          os.unlink(os.path.join(marker_dir, name))
+        self.run_tests(targets=[target], select_by_coverage=True)
+        return sorted(os.listdir(marker_dir))
+
+      def change(path):
+        with open(os.path.join(self.build_root, path), 'r') as fp:
+          content = fp.read()
+        self.create_file(path, content + '\n# A change.\n')
+
+      self.assertEqual(['test_app', 'test_core', 'test_skipped'], run_tests())
+
+      # Only the tests that depend on the changed file are re-run, along with the skipped test.
+      change('app/app.py')
+      self.assertEqual(['test_app', 'test_skipped'], run_tests())
+
+      # The app test module imports core, so its tests depend on core's import-time code even
+      # though the core test module imported core first.
+      change('lib/core.py')
+      self.assertEqual(['test_app', 'test_core', 'test_skipped'], run_tests())
+
+  def test_warm_workers(self):
+    pool = ForkedWorkerPool(ForkedWorkerPool.location(self.pants_workdir))
+    self.addCleanup(pool.retire_all)
+
+    self.run_tests(targets=[self.green], warm_workers=True)
+    self.assertEqual(1, len(pool.zygotes()))
+
+    # Further runs with the same requirements fork from the same zygote.
+    self.run_failing_tests(targets=[self.red], failed_targets=[self.red], warm_workers=True)
+    self.assertEqual(1, len(pool.zygotes()))
+    self.assertTrue(all(pool.is_alive(key) for key in pool.zygotes()))
+
   @contextmanager
   def marking_tests(self):
     init_subsystem(Target.Arguments)
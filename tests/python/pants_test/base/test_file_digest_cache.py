@@ -0,0 +1,77 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+import unittest
+
+import mock
+
+from pants.base import file_digest_cache
+from pants.base.file_digest_cache import FileDigestCache
+from pants.base.hash_utils import hash_file
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump
+
+
+class FileDigestCacheTest(unittest.TestCase):
+
+  def _old_file(self, path, content):
+    safe_file_dump(path, content)
+    old = time.time() - 60
+    os.utime(path, (old, old))
+    return path
+
+  def test_digest(self):
+    with temporary_dir() as tmpdir:
+      path = self._old_file(os.path.join(tmpdir, 'a.txt'), 'muppet')
+      cache = FileDigestCache(os.path.join(tmpdir, 'digests.db'))
+      self.assertEqual(hash_file(path), cache.digest(path))
+
+  def test_unchanged_files_are_not_reread(self):
+    with temporary_dir() as tmpdir:
+      path = self._old_file(os.path.join(tmpdir, 'a.txt'), 'muppet')
+      db = os.path.join(tmpdir, 'digests.db')
+      cache = FileDigestCache(db)
+      digest = cache.digest(path)
+      cache.flush()
+
+      with mock.patch.object(file_digest_cache, 'hash_file') as mock_hash_file:
+        self.assertEqual(digest, cache.digest(path))
+        # Digests are persisted for later runs.
+        self.assertEqual(digest, FileDigestCache(db).digest(path))
+        self.assertFalse(mock_hash_file.called)
+
+  def test_changed_files_are_rehashed(self):
+    with temporary_dir() as tmpdir:
+      path = self._old_file(os.path.join(tmpdir, 'a.txt'), 'muppet')
+      cache = FileDigestCache(os.path.join(tmpdir, 'digests.db'))
+      cache.digest(path)
+
+      self._old_file(path, 'kermit the frog')
+      self.assertEqual(hash_file(path), cache.digest(path))
+
+  def test_recently_modified_files_are_not_cached(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'a.txt')
+      safe_file_dump(path, 'muppet')
+      cache = FileDigestCache(os.path.join(tmpdir, 'digests.db'))
+      cache.digest(path)
+
+      with mock.patch.object(file_digest_cache, 'hash_file', return_value='x') as mock_hash_file:
+        cache.digest(path)
+        self.assertTrue(mock_hash_file.called)
+
+  def test_corrupt_cache_is_discarded(self):
+    with temporary_dir() as tmpdir:
+      path = self._old_file(os.path.join(tmpdir, 'a.txt'), 'muppet')
+      db = os.path.join(tmpdir, 'digests.db')
+      safe_file_dump(db, 'not a database' * 100)
+      cache = FileDigestCache(db)
+      self.assertEqual(hash_file(path), cache.digest(path))
+      cache.flush()
+      self.assertEqual(hash_file(path), FileDigestCache(db).digest(path))
@@ -0,0 +1,53 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from pants.build_graph.build_file_compiler import BuildFileCompiler
+from pants.util.contextutil import temporary_dir
+
+
+class BuildFileCompilerTest(unittest.TestCase):
+
+  def _cached_files(self, cache_dir):
+    return [os.path.join(root, f) for root, _, files in os.walk(cache_dir) for f in files]
+
+  def test_compile_and_cache(self):
+    with temporary_dir() as cache_dir:
+      compiler = BuildFileCompiler(cache_dir=cache_dir)
+      code = compiler.compile_source('a/BUILD', b'target(name="a")\n')
+      self.assertEqual('a/BUILD', code.co_filename)
+      self.assertEqual(1, len(self._cached_files(cache_dir)))
+
+      # Unchanged source is served from the cache.
+      self.assertIn('a', compiler.compile_source('a/BUILD', b'target(name="a")\n').co_consts)
+      self.assertEqual(1, len(self._cached_files(cache_dir)))
+
+      # A changed BUILD file is compiled and cached anew.
+      code = compiler.compile_source('a/BUILD', b'target(name="b")\n')
+      self.assertIn('b', code.co_consts)
+      self.assertEqual(2, len(self._cached_files(cache_dir)))
+
+  def test_compile_error(self):
+    with temporary_dir() as cache_dir:
+      compiler = BuildFileCompiler(cache_dir=cache_dir)
+      with self.assertRaises(SyntaxError):
+        compiler.compile_source('b/BUILD', b'target(name=\n')
+      self.assertEqual([], self._cached_files(cache_dir))
+
+  def test_cache_is_bounded(self):
+    with temporary_dir() as cache_dir:
+      compiler = BuildFileCompiler(cache_dir=cache_dir)
+      compiler.MAX_CACHED_PER_SHARD = 1
+      for i in range(300):
+        code = compiler.compile_source('a/BUILD', 'target(name="t{}")\n'.format(i).encode('utf-8'))
+        self.assertIn('t{}'.format(i), code.co_consts)
+      shards = os.listdir(cache_dir)
+      self.assertTrue(shards)
+      for shard in shards:
+        self.assertEqual(1, len(os.listdir(os.path.join(cache_dir, shard))))
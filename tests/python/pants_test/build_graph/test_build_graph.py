@@ -12,7 +12,7 @@ import six
 from pants.backend.jvm.targets.jar_library import JarLibrary
 from pants.build_graph.address import Address, parse_spec
 from pants.build_graph.address_lookup_error import AddressLookupError
-from pants.build_graph.build_graph import BuildGraph
+from pants.build_graph.build_graph import BuildGraph, _ClosureMemo
 from pants.build_graph.target import Target
 from pants.java.jar.jar_dependency import JarDependency
 from pants_test.base_test import BaseTest
@@ -176,6 +176,70 @@ class BuildGraphTest(BaseTest):
       yield
     self.assertEquals([], BuildGraph.closure(empty_gen()))
 
+  def test_memoized_closures_match_walks(self):
+    c = self.make_target('c1')
+    d = self.make_target('d1', dependencies=[c])
+    b = self.make_target('b1', dependencies=[c, d])
+    e = self.make_target('e1', dependencies=[b])
+    a = self.make_target('a1', dependencies=[b, e])
+    f = self.make_target('f1', dependencies=[d])
+
+    def walked(walk, targets, postorder):
+      result = []
+      walk([t.address for t in targets], result.append, postorder=postorder)
+      return result
+
+    roots_lists = [[a], [f, a], [b, f], [c, e, f], [e, b, a]]
+    for postorder in (False, True):
+      for roots in roots_lists:
+        addresses = [t.address for t in roots]
+        # Query twice, so that the second result comes from the memoized closures.
+        for _ in range(2):
+          self.assertEquals(
+            walked(self.build_graph.walk_transitive_dependency_graph, roots, postorder),
+            list(self.build_graph.transitive_subgraph_of_addresses(addresses,
+                                                                    postorder=postorder)))
+          self.assertEquals(
+            walked(self.build_graph.walk_transitive_dependee_graph, roots, postorder),
+            list(self.build_graph.transitive_dependees_of_addresses(addresses,
+                                                                     postorder=postorder)))
+
+  def test_memoized_closures_are_invalidated(self):
+    a = self.make_target('a')
+    b = self.make_target('b', dependencies=[a])
+    c = self.make_target('c', dependencies=[b])
+    d = self.make_target('d')
+    self.assertEquals([c, b, a], list(self.build_graph.transitive_subgraph_of_addresses([c.address])))
+    self.assertEquals([a, b, c], list(self.build_graph.transitive_dependees_of_addresses([a.address])))
+    self.assertEquals([d], list(self.build_graph.transitive_dependees_of_addresses([d.address])))
+
+    self.build_graph.inject_dependency(b.address, d.address)
+    self.assertEquals([c, b, a, d],
+                      list(self.build_graph.transitive_subgraph_of_addresses([c.address])))
+    self.assertEquals([a, b, c], list(self.build_graph.transitive_dependees_of_addresses([a.address])))
+    self.assertEquals([d, b, c], list(self.build_graph.transitive_dependees_of_addresses([d.address])))
+
+    e = self.make_target('e', dependencies=[c])
+    self.assertEquals([a, b, c, e],
+                      list(self.build_graph.transitive_dependees_of_addresses([a.address])))
+    self.assertEquals([e, c, b, a, d], e.closure())
+
+  def test_memoized_closures_are_bounded(self):
+    memo = _ClosureMemo(max_size=4)
+    memo.put('a', (1, 2))
+    memo.put('b', (3,))
+    self.assertEquals((1, 2), memo.get('a'))
+    memo.put('c', (4, 5))
+    # The least recently used closure is dropped to stay within the bound.
+    self.assertEquals([None, (1, 2), (4, 5)], [memo.get(key) for key in 'bac'])
+    # Closures larger than the bound are not memoized at all.
+    memo.put('d', (1, 2, 3, 4, 5))
+    self.assertIsNone(memo.get('d'))
+    self.assertEquals(2, len(memo))
+    memo.pop('a')
+    memo.put('e', (6, 7))
+    self.assertEquals([(4, 5), (6, 7)], [memo.get(key) for key in 'ce'])
+
   def test_closure_bfs(self):
     root = self.inject_graph('a', {
       'a': ['b', 'c'],
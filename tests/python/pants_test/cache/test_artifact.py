@@ -8,9 +8,10 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import os
 import unittest
 
-from pants.cache.artifact import DirectoryArtifact, TarballArtifact
+from pants.cache.artifact import (ArtifactError, ContentAddressedArtifact, DirectoryArtifact,
+                                  TarballArtifact)
 from pants.util.contextutil import temporary_dir
-from pants.util.dirutil import safe_mkdir, safe_open
+from pants.util.dirutil import safe_mkdir, safe_open, safe_rmtree
 
 
 class TarballArtifactTest(unittest.TestCase):
@@ -49,6 +50,39 @@ class TarballArtifactTest(unittest.TestCase):
 
       self.assertTrue(artifact.exists())
 
+  def test_extract_multithreaded_round_trip(self):
+    with temporary_dir() as tmpdir:
+      artifact_root = os.path.join(tmpdir, 'artifacts')
+      cache_root = os.path.join(tmpdir, 'cache')
+      safe_mkdir(cache_root)
+
+      contents = {}
+      for i in range(20):
+        relpath = os.path.join('out', 'dir{}'.format(i % 3), 'file{}'.format(i))
+        contents[relpath] = os.urandom(1024) * (i + 1)
+        with safe_open(os.path.join(artifact_root, relpath), 'wb') as f:
+          f.write(contents[relpath])
+
+      tarball = os.path.join(cache_root, 'some.tar')
+      TarballArtifact(artifact_root, tarball, compression_threads=4).collect(
+        [os.path.join(artifact_root, 'out')])
+      safe_rmtree(os.path.join(artifact_root, 'out'))
+
+      artifact = TarballArtifact(artifact_root, tarball)
+      artifact.extract()
+      for relpath, content in contents.items():
+        with open(os.path.join(artifact_root, relpath), 'rb') as f:
+          self.assertEquals(content, f.read())
+      self.assertIn(os.path.join(artifact_root, 'out', 'dir0', 'file0'), set(artifact.get_paths()))
+
+  def test_extract_corrupt_tarball(self):
+    with temporary_dir() as tmpdir:
+      tarball = os.path.join(tmpdir, 'some.tar')
+      with open(tarball, 'wb') as f:
+        f.write(b'not a tarball')
+      with self.assertRaises(ArtifactError):
+        TarballArtifact(os.path.join(tmpdir, 'artifacts'), tarball).extract()
+
   def touch_file_in(self, artifact_root):
     path = os.path.join(artifact_root, 'some.file')
     with safe_open(path, 'w') as f:
@@ -75,3 +109,46 @@ class DirectoryArtifactTest(unittest.TestCase):
 
       artifact = DirectoryArtifact(artifact_root, artifact_dir)
       self.assertFalse(artifact.exists())
+
+
+class ContentAddressedArtifactTest(unittest.TestCase):
+  def test_collect_and_extract_tree(self):
+    with temporary_dir() as tmpdir:
+      artifact_root = os.path.join(tmpdir, 'artifacts')
+      blob_root = os.path.join(tmpdir, 'blobs')
+      manifest = os.path.join(tmpdir, 'cache', 'some.manifest')
+
+      for relpath in ('out/a.class', 'out/sub/b.class'):
+        with safe_open(os.path.join(artifact_root, relpath), 'w') as f:
+          f.write('same content')
+      safe_mkdir(os.path.join(artifact_root, 'out', 'empty'))
+
+      artifact = ContentAddressedArtifact(artifact_root, manifest, blob_root)
+      self.assertFalse(artifact.exists())
+      artifact.collect([os.path.join(artifact_root, 'out')])
+      self.assertTrue(artifact.exists())
+      self.assertEquals([os.path.join(artifact_root, 'out')], list(artifact.get_paths()))
+
+      # Identical contents share a single blob.
+      self.assertEquals(1, sum(len(files) for _, _, files in os.walk(blob_root)))
+
+      safe_rmtree(os.path.join(artifact_root, 'out'))
+      ContentAddressedArtifact(artifact_root, manifest, blob_root).extract()
+      with open(os.path.join(artifact_root, 'out', 'sub', 'b.class')) as f:
+        self.assertEquals('same content', f.read())
+      self.assertTrue(os.path.isdir(os.path.join(artifact_root, 'out', 'empty')))
+
+  def test_extract_missing_blob(self):
+    with temporary_dir() as tmpdir:
+      artifact_root = os.path.join(tmpdir, 'artifacts')
+      blob_root = os.path.join(tmpdir, 'blobs')
+      manifest = os.path.join(tmpdir, 'cache', 'some.manifest')
+      with safe_open(os.path.join(artifact_root, 'some.file'), 'w') as f:
+        f.write('content')
+
+      ContentAddressedArtifact(artifact_root, manifest, blob_root).collect(
+        [os.path.join(artifact_root, 'some.file')])
+      safe_rmtree(blob_root)
+
+      with self.assertRaises(ArtifactError):
+        ContentAddressedArtifact(artifact_root, manifest, blob_root).extract()
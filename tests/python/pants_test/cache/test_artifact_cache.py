@@ -11,12 +11,13 @@ from contextlib import contextmanager
 
 from pants.cache.artifact_cache import (NonfatalArtifactCacheError, call_insert,
                                         call_use_cached_files)
-from pants.cache.local_artifact_cache import LocalArtifactCache, TempLocalArtifactCache
+from pants.cache.local_artifact_cache import (ContentAddressedLocalArtifactCache,
+                                              LocalArtifactCache, TempLocalArtifactCache)
 from pants.cache.pinger import BestUrlSelector, InvalidRESTfulCacheProtoError
 from pants.cache.restful_artifact_cache import RESTfulArtifactCache
 from pants.invalidation.build_invalidator import CacheKey
 from pants.util.contextutil import temporary_dir, temporary_file, temporary_file_path
-from pants.util.dirutil import safe_mkdir
+from pants.util.dirutil import safe_mkdir, safe_rmtree
 from pants_test.cache.cache_server import cache_server
 
 
@@ -31,6 +32,12 @@ class TestArtifactCache(unittest.TestCase):
       with temporary_dir() as cache_root:
         yield LocalArtifactCache(artifact_root, cache_root, compression=1)
 
+  @contextmanager
+  def setup_content_addressed_cache(self):
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as cache_root:
+        yield ContentAddressedLocalArtifactCache(artifact_root, cache_root, compression=1)
+
   @contextmanager
   def setup_server(self, return_failed=False, cache_root=None):
     with cache_server(return_failed=return_failed, cache_root=cache_root) as server:
@@ -56,6 +63,68 @@ class TestArtifactCache(unittest.TestCase):
     with self.setup_local_cache() as artifact_cache:
       self.do_test_artifact_cache(artifact_cache)
 
+  def test_content_addressed_local_cache(self):
+    with self.setup_content_addressed_cache() as artifact_cache:
+      self.do_test_artifact_cache(artifact_cache)
+
+  def test_content_addressed_local_cache_dedups_and_copies(self):
+    with self.setup_content_addressed_cache() as artifact_cache:
+      key1 = CacheKey('muppet_key', 'fake_hash')
+      key2 = CacheKey('other_key', 'fake_hash')
+      with self.setup_test_file(artifact_cache.artifact_root) as path1:
+        with self.setup_test_file(artifact_cache.artifact_root) as path2:
+          artifact_cache.insert(key1, [path1])
+          artifact_cache.insert(key2, [path2])
+
+          blob_root = os.path.join(artifact_cache._cache_root, '.blobs')
+          blobs = [os.path.join(dir_name, f)
+                   for dir_name, _, files in os.walk(blob_root) for f in files]
+          self.assertEquals(1, len(blobs))
+
+          os.unlink(path1)
+          self.assertTrue(artifact_cache.use_cached_files(key1))
+          with open(path1, 'rb') as infile:
+            self.assertEquals(TEST_CONTENT1, infile.read())
+
+          # Used files are private copies: rewriting one in place leaves the blob intact.
+          self.assertNotEqual(os.stat(blobs[0]).st_ino, os.stat(path1).st_ino)
+          with open(path1, 'wb') as outfile:
+            outfile.write(TEST_CONTENT2)
+          with open(blobs[0], 'rb') as infile:
+            self.assertEquals(TEST_CONTENT1, infile.read())
+
+  def test_content_addressed_local_cache_missing_blob(self):
+    with self.setup_content_addressed_cache() as artifact_cache:
+      key = CacheKey('muppet_key', 'fake_hash')
+      with self.setup_test_file(artifact_cache.artifact_root) as path:
+        artifact_cache.insert(key, [path])
+        safe_rmtree(os.path.join(artifact_cache._cache_root, '.blobs'))
+
+        self.assertFalse(artifact_cache.use_cached_files(key))
+        self.assertFalse(artifact_cache.has(key))
+
+  def test_content_addressed_local_backed_remote_cache(self):
+    with self.setup_server() as server:
+      with self.setup_content_addressed_cache() as local:
+        tmp = TempLocalArtifactCache(local.artifact_root, 0)
+        remote = RESTfulArtifactCache(local.artifact_root, BestUrlSelector([server.url]), tmp)
+        combined = RESTfulArtifactCache(local.artifact_root, BestUrlSelector([server.url]), local)
+
+        key = CacheKey('muppet_key', 'fake_hash')
+        with self.setup_test_file(local.artifact_root) as path:
+          # Tarballs written through the content-addressed cache are readable remotely.
+          combined.insert(key, [path])
+          self.assertTrue(remote.has(key))
+          local.delete(key)
+          self.assertFalse(local.has(key))
+
+          # And reading a tarball from the remote backfills the content-addressed cache.
+          os.unlink(path)
+          self.assertTrue(bool(combined.use_cached_files(key)))
+          self.assertTrue(local.has(key))
+          with open(path, 'rb') as infile:
+            self.assertEquals(TEST_CONTENT1, infile.read())
+
   def test_restful_cache(self):
     with self.assertRaises(InvalidRESTfulCacheProtoError):
       RESTfulArtifactCache('foo', BestUrlSelector(['ftp://localhost/bar']), 'foo')
@@ -63,6 +132,28 @@ class TestArtifactCache(unittest.TestCase):
     with self.setup_rest_cache() as artifact_cache:
       self.do_test_artifact_cache(artifact_cache)
 
+  def test_has_many(self):
+    with self.setup_local_cache() as artifact_cache:
+      self.do_test_has_many(artifact_cache)
+
+    with self.setup_rest_cache() as artifact_cache:
+      self.do_test_has_many(artifact_cache)
+
+  def do_test_has_many(self, artifact_cache):
+    keys = [CacheKey('muppet_key{}'.format(i), 'fake_hash') for i in range(5)]
+    self.assertEquals([False] * 5, artifact_cache.has_many(keys))
+    with self.setup_test_file(artifact_cache.artifact_root) as path:
+      artifact_cache.insert(keys[1], [path])
+      artifact_cache.insert(keys[3], [path])
+    self.assertEquals([False, True, False, True, False], artifact_cache.has_many(keys))
+
+  def test_restful_cache_has_many_errors_are_present(self):
+    # Errors are reported as present, so that they are surfaced by the subsequent read.
+    with self.setup_rest_cache(return_failed=True) as artifact_cache:
+      keys = [CacheKey('muppet_key{}'.format(i), 'fake_hash') for i in range(3)]
+      self.assertEquals([True] * 3, artifact_cache.has_many(keys))
+      self.assertFalse(artifact_cache.use_cached_files(keys[0]))
+
   def test_restful_cache_failover(self):
     bad_url = 'http://badhost:123'
 
@@ -13,7 +13,8 @@ from pants.cache.cache_setup import (CacheFactory, CacheSetup, CacheSpec, CacheS
                                      EmptyCacheSpecError, InvalidCacheSpecError,
                                      LocalCacheSpecRequiredError, RemoteCacheSpecRequiredError,
                                      TooManyCacheSpecsError)
-from pants.cache.local_artifact_cache import LocalArtifactCache
+from pants.cache.local_artifact_cache import (ContentAddressedLocalArtifactCache,
+                                              LocalArtifactCache)
 from pants.cache.resolver import Resolver
 from pants.cache.restful_artifact_cache import RESTfulArtifactCache
 from pants.subsystem.subsystem import Subsystem
@@ -84,6 +85,15 @@ class TestCacheSetup(BaseTest):
       'write': False,
       'compression_level': 1,
       'max_entries_per_target': 1,
+      'local_layout': 'tarball',
+      'local_max_bytes': None,
+      'local_max_age_secs': None,
+      'compression_threads': 1,
+      'remote_read_concurrency': 16,
+      'spool_remote_writes': False,
+      'spool_max_attempts': 5,
+      'spool_upload_timeout': 60.0,
+      'spool_bandwidth_limit': 0,
       'write_permissions': None,
       'dereference_symlinks': True,
       # Usually read from global scope.
@@ -201,6 +211,24 @@ class TestCacheSetup(BaseTest):
       with self.assertRaises(TooManyCacheSpecsError):
         mk_cache([tmpdir, self.REMOTE_URI_1, self.REMOTE_URI_2])
 
+  def test_content_addressed_local_layout(self):
+    with temporary_dir() as tmpdir:
+      cachedir = os.path.join(tmpdir, 'cachedir')
+      self.set_options_for_scope(CacheSetup.subscope(DummyTask.options_scope),
+                                 read_from=[cachedir], local_layout='content-addressed',
+                                 local_max_bytes=1024 * 1024)
+      self.context(for_task_types=[DummyTask])  # Force option initialization.
+      cache_factory = CacheSetup.create_cache_factory_for_task(self.create_task(),
+                                                               pinger=self.pinger)
+      self.assertIsInstance(cache_factory.get_read_cache(), ContentAddressedLocalArtifactCache)
+
+  def test_content_addressed_local_layout_requires_budget(self):
+    with temporary_dir() as tmpdir:
+      cachedir = os.path.join(tmpdir, 'cachedir')
+      with self.assertRaises(ValueError):
+        self.cache_factory(read=True, read_from=[cachedir],
+                           local_layout='content-addressed').get_read_cache()
+
   def test_read_cache_available(self):
     self.assertFalse(self.cache_factory(ignore=True, read=True, read_from=[self.EMPTY_URI])
                      .read_cache_available())
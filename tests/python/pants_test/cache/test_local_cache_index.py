@@ -0,0 +1,192 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+import unittest
+
+import mock
+
+from pants.cache.local_artifact_cache import (ContentAddressedLocalArtifactCache,
+                                              LocalArtifactCache)
+from pants.cache.local_cache_index import LocalCacheIndex
+from pants.invalidation.build_invalidator import CacheKey
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump
+
+
+class LocalCacheIndexTest(unittest.TestCase):
+
+  def _dump(self, root, relpath, size):
+    path = os.path.join(root, relpath)
+    safe_file_dump(path, b'x' * size)
+    return path
+
+  def test_total_size(self):
+    with temporary_dir() as root:
+      index = LocalCacheIndex(root)
+      a = self._dump(root, 'a/1', 10)
+      b = self._dump(root, 'b/1', 20)
+      index.record([a, b])
+      self.assertEquals(30, index.total_size())
+
+      # Re-recording a replaced file updates its size.
+      self._dump(root, 'a/1', 5)
+      index.record([a])
+      self.assertEquals(25, index.total_size())
+
+      index.forget([b])
+      self.assertEquals(5, index.total_size())
+
+  def test_unbounded_index_never_evicts(self):
+    with temporary_dir() as root:
+      index = LocalCacheIndex(root)
+      a = self._dump(root, 'a/1', 10)
+      index.record([a])
+      self.assertEquals([], index.evict())
+      self.assertTrue(os.path.exists(a))
+
+  def test_evict_least_recently_used_by_size(self):
+    with temporary_dir() as root:
+      index = LocalCacheIndex(root, max_bytes=25)
+      a = self._dump(root, 'a/1', 10)
+      b = self._dump(root, 'b/1', 10)
+      c = self._dump(root, 'c/1', 10)
+      index.record([a])
+      time.sleep(0.01)
+      index.record([b])
+      time.sleep(0.01)
+      index.record([c])
+      time.sleep(0.01)
+      index.touch([a])
+
+      self.assertEquals([b], index.evict())
+      self.assertFalse(os.path.exists(b))
+      self.assertTrue(os.path.exists(a))
+      self.assertTrue(os.path.exists(c))
+      self.assertEquals(20, index.total_size())
+
+  def test_evict_by_age(self):
+    with temporary_dir() as root:
+      index = LocalCacheIndex(root, max_age_secs=60)
+      a = self._dump(root, 'a/1', 10)
+      b = self._dump(root, 'b/1', 10)
+      index.record([a, b])
+      self.assertEquals([], index.evict())
+
+  def test_evict_imported_files_by_age(self):
+    with temporary_dir() as root:
+      # Pre-existing files are considered to have been last used when they were last modified.
+      a = self._dump(root, 'a/1', 10)
+      old = time.time() - 120
+      os.utime(a, (old, old))
+      b = self._dump(root, 'b/1', 10)
+      index = LocalCacheIndex(root, max_age_secs=60)
+      self.assertEquals([a], index.evict())
+      self.assertTrue(os.path.exists(b))
+
+  def test_existing_files_are_imported(self):
+    with temporary_dir() as root:
+      a = self._dump(root, 'a/1', 10)
+      b = self._dump(root, 'b/1', 10)
+      index = LocalCacheIndex(root, max_bytes=10)
+      self.assertEquals(20, index.total_size())
+      self.assertEquals(1, len(index.evict()))
+      self.assertEquals(1, len([p for p in (a, b) if os.path.exists(p)]))
+
+  def test_record_reports_exceeded_bounds(self):
+    with temporary_dir() as root:
+      index = LocalCacheIndex(root, max_bytes=25)
+      self.assertFalse(index.record([self._dump(root, 'a/1', 20)]))
+      self.assertTrue(index.record([self._dump(root, 'a/2', 10)]))
+
+      index = LocalCacheIndex(root, max_age_secs=60)
+      old = self._dump(root, 'b/1', 10)
+      self.assertFalse(index.record([old]))
+      index._max_age_secs = -1
+      self.assertTrue(index.record([self._dump(root, 'b/2', 10)]))
+
+  def test_evict_in_background_until_within_bounds(self):
+    with temporary_dir() as root:
+      paths = [self._dump(root, 'a/{}'.format(i), 10) for i in range(5)]
+      index = LocalCacheIndex(root, max_bytes=15, max_evictions=2)
+      index.evict_in_background()
+      index.wait_for_eviction()
+      self.assertEquals(10, index.total_size())
+      self.assertEquals(1, len([p for p in paths if os.path.exists(p)]))
+
+  def test_interrupted_eviction_keeps_files_indexed(self):
+    with temporary_dir() as root:
+      paths = [self._dump(root, 'a/{}'.format(i), 10) for i in range(2)]
+      index = LocalCacheIndex(root, max_bytes=0)
+
+      # An eviction that is cut short after deleting some of its files...
+      deleted = []
+      def delete_one(path):
+        if deleted:
+          raise KeyboardInterrupt()
+        os.unlink(path)
+        deleted.append(path)
+      with mock.patch('pants.cache.local_cache_index.safe_delete', side_effect=delete_one):
+        with self.assertRaises(KeyboardInterrupt):
+          index.evict()
+      self.assertEquals(1, len([p for p in paths if os.path.exists(p)]))
+
+      # ...leaves the remaining files indexed, so that they are evicted later.
+      self.assertEquals(20, index.total_size())
+      self.assertEquals(sorted(paths), sorted(index.evict()))
+      self.assertEquals(0, index.total_size())
+      self.assertFalse(any(os.path.exists(p) for p in paths))
+
+  def test_max_evictions(self):
+    with temporary_dir() as root:
+      paths = [self._dump(root, 'a/{}'.format(i), 10) for i in range(5)]
+      index = LocalCacheIndex(root, max_bytes=0, max_evictions=2)
+      self.assertEquals(2, len(index.evict()))
+      self.assertEquals(2, len(index.evict()))
+      self.assertEquals(1, len(index.evict()))
+      self.assertFalse(any(os.path.exists(p) for p in paths))
+
+  def _insert(self, cache, name, content):
+    path = os.path.join(cache.artifact_root, name)
+    safe_file_dump(path, content)
+    key = CacheKey(name, 'fake_hash')
+    cache.insert(key, [path])
+    return key
+
+  def test_local_cache_evicts_least_recently_used(self):
+    with temporary_dir() as artifact_root, temporary_dir() as cache_root:
+      # Tarballs of these contents are well under 1000 bytes each.
+      index = LocalCacheIndex(cache_root, max_bytes=1000)
+      cache = LocalArtifactCache(artifact_root, cache_root, compression=1, index=index)
+      first = self._insert(cache, 'first', 'muppet')
+      self.assertTrue(cache.has(first))
+
+      # Inserting a new artifact that pushes the cache over its budget evicts the oldest.
+      index._max_bytes = index.total_size() + 100
+      second = self._insert(cache, 'second', 'kermit')
+      index.wait_for_eviction()
+      self.assertFalse(cache.has(first))
+      self.assertTrue(cache.has(second))
+
+  def test_content_addressed_cache_evicted_blob_is_a_miss(self):
+    with temporary_dir() as artifact_root, temporary_dir() as cache_root:
+      index = LocalCacheIndex(cache_root, max_bytes=1000)
+      cache = ContentAddressedLocalArtifactCache(artifact_root, cache_root, compression=1,
+                                                 index=index)
+      first = self._insert(cache, 'first', 'muppet')
+      time.sleep(0.01)
+      second = self._insert(cache, 'second', 'kermit')
+      self.assertTrue(cache.use_cached_files(first))
+
+      # Evict the least recently used files: the second manifest and its blob.
+      index._max_bytes = 0
+      index._max_evictions = 2
+      index.evict()
+
+      self.assertTrue(cache.use_cached_files(first))
+      self.assertFalse(cache.use_cached_files(second))
@@ -0,0 +1,69 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import gzip
+import io
+import os
+import unittest
+
+from pants.cache.parallel_gzip import ParallelGzipWriter, ReadAheadGzipReader
+
+
+class ParallelGzipTest(unittest.TestCase):
+
+  def _data(self, size):
+    return os.urandom(size // 2) + b'pants' * (size // 10)
+
+  def _compress(self, data, **kwargs):
+    out = io.BytesIO()
+    writer = ParallelGzipWriter(out, **kwargs)
+    for i in range(0, len(data), 1000):
+      writer.write(data[i:i + 1000])
+    writer.close()
+    return out.getvalue()
+
+  def test_writer_output_is_standard_gzip(self):
+    data = self._data(100000)
+    compressed = self._compress(data, compresslevel=6, threads=4, block_size=4096)
+    self.assertEquals(data, gzip.GzipFile(fileobj=io.BytesIO(compressed)).read())
+
+  def test_writer_empty(self):
+    self.assertEquals(b'', gzip.GzipFile(fileobj=io.BytesIO(self._compress(b''))).read())
+
+  def test_reader_multi_member(self):
+    data = self._data(100000)
+    compressed = self._compress(data, threads=3, block_size=3000)
+    reader = ReadAheadGzipReader(io.BytesIO(compressed), block_size=1024, max_blocks_ahead=2)
+    chunks = []
+    chunk = reader.read(777)
+    while chunk:
+      chunks.append(chunk)
+      chunk = reader.read(777)
+    reader.close()
+    self.assertEquals(data, b''.join(chunks))
+
+  def test_reader_read_all(self):
+    data = self._data(10000)
+    out = io.BytesIO()
+    with gzip.GzipFile(fileobj=out, mode='wb') as gz:
+      gz.write(data)
+    reader = ReadAheadGzipReader(io.BytesIO(out.getvalue()), block_size=100)
+    self.assertEquals(data, reader.read())
+    self.assertEquals(b'', reader.read())
+    reader.close()
+
+  def test_reader_close_before_end(self):
+    compressed = self._compress(self._data(100000), block_size=1000)
+    reader = ReadAheadGzipReader(io.BytesIO(compressed), block_size=100, max_blocks_ahead=1)
+    self.assertEquals(10, len(reader.read(10)))
+    reader.close()
+
+  def test_reader_corrupt(self):
+    reader = ReadAheadGzipReader(io.BytesIO(b'not a gzip file'))
+    with self.assertRaises(IOError):
+      reader.read()
+    reader.close()
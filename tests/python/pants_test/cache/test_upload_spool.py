@@ -0,0 +1,67 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from pants.cache.local_artifact_cache import TempLocalArtifactCache
+from pants.cache.pinger import BestUrlSelector
+from pants.cache.restful_artifact_cache import RESTfulArtifactCache
+from pants.cache.upload_spool import UploadSpool
+from pants.invalidation.build_invalidator import CacheKey
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump
+from pants_test.cache.cache_server import cache_server
+
+
+class UploadSpoolTest(unittest.TestCase):
+
+  def test_spooled_insert_is_uploaded_on_drain(self):
+    with temporary_dir() as artifact_root, temporary_dir() as spool_dir:
+      with cache_server() as server:
+        spool = UploadSpool(spool_dir)
+        local = TempLocalArtifactCache(artifact_root, compression=1)
+        cache = RESTfulArtifactCache(artifact_root, BestUrlSelector([server.url]), local,
+                                     spool=spool)
+        key = CacheKey('muppet_key', 'fake_hash')
+        path = os.path.join(artifact_root, 'some.file')
+        safe_file_dump(path, 'muppet')
+
+        self.assertTrue(cache.insert(key, [path]))
+        # Nothing is uploaded until the spool is drained.
+        self.assertEquals(1, spool.pending())
+        self.assertFalse(cache.has(key))
+
+        self.assertIsNone(spool.drain())
+        self.assertEquals(0, spool.pending())
+        self.assertTrue(cache.has(key))
+
+        os.unlink(path)
+        self.assertTrue(cache.use_cached_files(key))
+        with open(path) as fp:
+          self.assertEquals('muppet', fp.read())
+
+  def test_failed_uploads_are_retried_then_dropped(self):
+    with temporary_dir() as tmpdir, temporary_dir() as spool_dir:
+      with cache_server(return_failed=True) as server:
+        tarball = os.path.join(tmpdir, 'some.tgz')
+        safe_file_dump(tarball, 'not really a tarball')
+        spool = UploadSpool(spool_dir, max_attempts=2)
+        spool.MAX_BACKOFF_SECONDS = 0
+        spool.enqueue('{}/muppet_key/fake_hash.tgz'.format(server.url), tarball, overwrite=True)
+
+        # The first failure is retried.
+        self.assertIsNotNone(spool.drain())
+        self.assertEquals(1, spool.pending())
+
+        # The second exhausts the attempts, and the entry is dropped.
+        self.assertIsNone(spool.drain())
+        self.assertEquals(0, spool.pending())
+
+  def test_drain_empty(self):
+    with temporary_dir() as spool_dir:
+      self.assertIsNone(UploadSpool(os.path.join(spool_dir, 'spool')).drain())
@@ -5,11 +5,14 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import os
 import unittest
 
 from pants.build_graph.build_file_aliases import BuildFileAliases
+from pants.build_graph.build_file_compiler import BuildFileCompiler
 from pants.engine.legacy.parser import LegacyPythonCallbacksParser
 from pants.engine.parser import EmptyTable
+from pants.util.contextutil import temporary_dir
 
 
 class LegacyPythonCallbacksParserTest(unittest.TestCase):
@@ -22,3 +25,20 @@ class LegacyPythonCallbacksParserTest(unittest.TestCase):
     # But the imported module should not be visible as a symbol in further parses.
     with self.assertRaises(NameError):
       parser.parse('/dev/null', '''os.path.join('x', 'y')''')
+
+  def test_compiled_code_is_cached(self):
+    with temporary_dir() as cache_dir:
+      parser = LegacyPythonCallbacksParser(EmptyTable(), BuildFileAliases(),
+                                           build_file_imports_behavior='allow',
+                                           build_file_compiler=BuildFileCompiler(cache_dir))
+
+      def cached_files():
+        return [f for _, _, files in os.walk(cache_dir) for f in files]
+
+      parser.parse('a/BUILD', b'x = 1')
+      self.assertEqual(1, len(cached_files()))
+      parser.parse('a/BUILD', b'x = 1')
+      self.assertEqual(1, len(cached_files()))
+
+      with self.assertRaises(SyntaxError):
+        parser.parse('b/BUILD', b'x = (')
@@ -0,0 +1,87 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+import mock
+
+from pants.base.specs import AscendantAddresses
+from pants.build_graph.address import Address
+from pants.engine.legacy.graph import HydratedTarget, HydratedTargets
+from pants.engine.legacy.source_mapper import EngineSourceMapper
+from pants.engine.legacy.structs import TargetAdaptor
+
+
+class EngineSourceMapperTest(unittest.TestCase):
+
+  SOURCES = sorted(['a.py',
+                    'src/a.py',
+                    'src/foo/a.py',
+                    'src/foo/bar/b.py',
+                    'src/foo-bar/c.py',
+                    'src/foo.py',
+                    'src/foobar/d.py'])
+
+  def test_sources_under(self):
+    self.assertEqual(['src/foo/a.py', 'src/foo/bar/b.py'],
+                     EngineSourceMapper._sources_under(self.SOURCES, 'src/foo'))
+    self.assertEqual(['src/foo/bar/b.py'],
+                     EngineSourceMapper._sources_under(self.SOURCES, 'src/foo/bar'))
+    self.assertEqual([], EngineSourceMapper._sources_under(self.SOURCES, 'src/fo'))
+    self.assertEqual([], EngineSourceMapper._sources_under(self.SOURCES, 'tests'))
+
+  def test_sources_under_buildroot(self):
+    self.assertEqual(self.SOURCES, EngineSourceMapper._sources_under(self.SOURCES, ''))
+
+  def _hydrated_target(self, spec, **kwargs):
+    address = Address.parse(spec)
+    return HydratedTarget(address, TargetAdaptor(address=address, **kwargs), ())
+
+  def _mapper(self, hydrated_targets):
+    scheduler = mock.Mock()
+
+    def product_request(product, subjects):
+      # Emulate `AscendantAddresses` by returning the targets declared in or above each directory.
+      dirs = set(spec.directory for specs in subjects for spec in specs.dependencies)
+      return [HydratedTargets(tuple(t for t in hydrated_targets
+                                    if any(d == t.address.spec_path or
+                                           d.startswith(t.address.spec_path + os.sep) or
+                                           not t.address.spec_path
+                                           for d in dirs)))]
+    scheduler.product_request.side_effect = product_request
+    return EngineSourceMapper(scheduler), scheduler
+
+  def test_owners_are_indexed(self):
+    root = self._hydrated_target('//:root', source='a.py')
+    foo = self._hydrated_target('src/foo:foo', source='a.py')
+    bar = self._hydrated_target('src/foo/bar:bar', source='b.py')
+    mapper, scheduler = self._mapper([root, foo, bar])
+
+    self.assertEqual([foo.address], mapper.target_addresses_for_source('src/foo/a.py'))
+    self.assertEqual(1, scheduler.product_request.call_count)
+
+    # Directories indexed by the first lookup are not hydrated again.
+    self.assertEqual([root.address], mapper.target_addresses_for_source('a.py'))
+    self.assertEqual(1, scheduler.product_request.call_count)
+
+    # Only the unindexed directory is requested.
+    self.assertEqual([bar.address], mapper.target_addresses_for_source('src/foo/bar/b.py'))
+    self.assertEqual(2, scheduler.product_request.call_count)
+    (_, subjects), _ = scheduler.product_request.call_args
+    self.assertEqual([AscendantAddresses('src/foo/bar')], list(subjects[0].dependencies))
+
+  def test_invalidated_owners_are_rehydrated(self):
+    foo = self._hydrated_target('src/foo:foo', source='a.py')
+    mapper, scheduler = self._mapper([foo])
+    self.assertEqual([foo.address], mapper.target_addresses_for_source('src/foo/a.py'))
+
+    mapper.invalidate_files(['src/foo/BUILD'])
+    self.assertEqual([foo.address], mapper.target_addresses_for_source('src/foo/a.py'))
+    self.assertEqual(2, scheduler.product_request.call_count)
+    (_, subjects), _ = scheduler.product_request.call_args
+    self.assertEqual([AscendantAddresses('src/foo')], list(subjects[0].dependencies))
@@ -0,0 +1,53 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from pants.goal.aggregated_timings import AggregatedTimings
+from pants.util.contextutil import temporary_dir
+
+
+class AggregatedTimingsTest(unittest.TestCase):
+
+  def _read(self, path):
+    with open(path, 'r') as f:
+      return f.read()
+
+  def test_get_all(self):
+    timings = AggregatedTimings()
+    timings.add_timing('main:compile', 1.0)
+    timings.add_timing('main:compile:zinc', 2.5, is_tool=True)
+    timings.add_timing('main:compile', 2.0)
+    self.assertEqual([{'label': 'main:compile', 'timing': 3.0, 'is_tool': False},
+                      {'label': 'main:compile:zinc', 'timing': 2.5, 'is_tool': True}],
+                     timings.get_all())
+
+  def test_writes_are_throttled_until_flushed(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'timings')
+      timings = AggregatedTimings(path, write_interval=3600)
+      timings.add_timing('a', 1.0)
+      self.assertEqual('a: 1.0\n', self._read(path))
+
+      timings.add_timing('b', 2.0)
+      self.assertEqual('a: 1.0\n', self._read(path))
+
+      timings.flush()
+      self.assertEqual('b: 2.0\na: 1.0\n', self._read(path))
+
+  def test_flush_after_clean_all(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'timings', 'timings')
+      timings = AggregatedTimings(path, write_interval=3600)
+      timings.add_timing('a', 1.0)
+      os.unlink(path)
+      os.rmdir(os.path.dirname(path))
+
+      timings.add_timing('a', 1.0)
+      timings.flush()
+      self.assertFalse(os.path.exists(os.path.dirname(path)))
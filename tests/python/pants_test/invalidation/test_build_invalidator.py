@@ -5,13 +5,16 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import os
 import tempfile
 import unittest
 from contextlib import contextmanager
 
-from pants.invalidation.build_invalidator import BuildInvalidator, CacheKey
+from pants.fs.fs import safe_filename
+from pants.invalidation.build_invalidator import (GLOBAL_CACHE_KEY_GEN_VERSION, BuildInvalidator,
+                                                 CacheKey)
 from pants.util.contextutil import temporary_dir
-from pants.util.dirutil import safe_rmtree
+from pants.util.dirutil import safe_file_dump, safe_rmtree
 from pants_test.subsystem.subsystem_util import init_subsystem
 
 
@@ -135,6 +138,26 @@ class BuildInvalidatorTest(BaseBuildInvalidatorTest):
       self.assertTrue(invalidator.needs_update(key1))
       self.assertTrue(invalidator.needs_update(key2))
 
+  def test_previous_keys(self):
+    with self.invalidator() as invalidator:
+      keys = [self.cache_key(key_id=str(i), key_hash=str(i)) for i in range(1200)]
+      invalidator.update_all(keys[::2])
+      uncacheable = self.uncacheable_cache_key(key_id='0')
+      previous = invalidator.previous_keys(keys + [uncacheable])
+      self.assertEqual([key if i % 2 == 0 else None for i, key in enumerate(keys)] + [None],
+                       previous)
+
+  def test_migrates_hash_files(self):
+    with temporary_dir() as root:
+      key = self.cache_key(key_id='src.java.a.b', key_hash='42')
+      hash_file = os.path.join(root, GLOBAL_CACHE_KEY_GEN_VERSION,
+                               safe_filename(key.id, extension='.hash'))
+      safe_file_dump(hash_file, key.hash)
+
+      invalidator = BuildInvalidator(root)
+      self.assertEqual(key, invalidator.previous_key(key))
+      self.assertFalse(os.path.exists(hash_file))
+
 
 class BuildInvalidatorFactoryTest(BaseBuildInvalidatorTest):
   def setUp(self):
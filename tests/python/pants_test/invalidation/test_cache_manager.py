@@ -200,3 +200,42 @@ class InvalidationCacheManagerTest(BaseTest):
     vts = VersionedTargetSet.from_versioned_targets([vt])
     with self.assertRaises(VersionedTargetSet.IllegalResultsDir):
       vts.update()
+
+  def _make_chain(self, length):
+    targets = []
+    for i in range(length):
+      targets.append(self.make_target(':t{}'.format(i), dependencies=targets[-1:]))
+    return targets
+
+  def _cache_manager(self, workers):
+    return InvalidationCacheManager(
+      results_dir_root=os.path.join(self._dir, 'results'),
+      cache_key_generator=CacheKeyGenerator(),
+      build_invalidator=BuildInvalidator(os.path.join(self._dir, 'build_invalidator')),
+      invalidate_dependents=True,
+      workers=workers,
+    )
+
+  def test_concurrent_check_matches_serial_check(self):
+    targets = self._make_chain(40)
+    serial_vts = self._cache_manager(workers=1).check(targets, topological_order=True).all_vts
+    for target in targets:
+      target.mark_invalidation_hash_dirty()
+    concurrent_manager = self._cache_manager(workers=4)
+    concurrent_vts = concurrent_manager.check(targets, topological_order=True).all_vts
+
+    self.assertEquals([(vt.target, vt.cache_key) for vt in serial_vts],
+                      [(vt.target, vt.cache_key) for vt in concurrent_vts])
+
+    concurrent_manager.create_results_dirs(concurrent_vts)
+    self.assertTrue(all(self.has_symlinked_result_dir(vt) for vt in concurrent_vts))
+
+  def test_check_in_batches(self):
+    targets = self._make_chain(5)
+    self.cache_manager.check(targets[:1]).all_vts[0].update()
+
+    self.cache_manager._CHECK_BATCH_SIZE = 2
+    ic = self.cache_manager.check(targets, topological_order=True)
+
+    self.assertEquals(targets, [vt.target for vt in ic.all_vts])
+    self.assertEquals(targets[1:], [vt.target for vt in ic.invalid_vts])
@@ -57,6 +57,28 @@ class SubprocessExecutorTest(unittest.TestCase):
   def test_scrubbed_java_tool_options(self):
     self.do_test_jre_env_var('JAVA_TOOL_OPTIONS', '-Xmx1g')
 
+  def test_runner_env(self):
+    with self.jre(env_var='FRED') as jre:
+      executor = SubprocessExecutor(Distribution(bin_path=jre))
+      with environment_as(FRED='toad'):
+        runner = executor.runner(classpath=['dummy/classpath'], main='dummy.main',
+                                 env={'FRED': 'frog'})
+        process = runner.spawn(stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        _, stderr = process.communicate()
+        self.assertEqual(0, process.returncode)
+        self.assertEqual('frog', stderr.strip())
+        self.assertEqual('toad', os.getenv('FRED'))
+
+  def test_runner_env_scrubbed(self):
+    with self.jre(env_var='CLASSPATH') as jre:
+      executor = SubprocessExecutor(Distribution(bin_path=jre))
+      runner = executor.runner(classpath=['dummy/classpath'], main='dummy.main',
+                               env={'CLASSPATH': 'dummy/other'})
+      process = runner.spawn(stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+      _, stderr = process.communicate()
+      self.assertEqual(0, process.returncode)
+      self.assertEqual('', stderr.strip())
+
   def do_test_executor_classpath_relativize(self, executor):
     """Test that 'executor' relativizes the classpath."""
     here = os.path.abspath(".")
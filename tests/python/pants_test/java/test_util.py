@@ -49,11 +49,13 @@ class ExecuteJavaTest(unittest.TestCase):
     self.runner.run.assert_called_once_with(stdin=None)
     if create_synthetic_jar:
       self.executor.runner.assert_called_once_with(self.SAFE_CLASSPATH, self.TEST_MAIN,
-                                                    args=None, jvm_options=None, cwd=None)
+                                                    args=None, jvm_options=None, cwd=None,
+                                                    env=None)
       mock_safe_classpath.assert_called_once_with(self.TEST_CLASSPATH, self.SYNTHETIC_JAR_DIR)
     else:
       self.executor.runner.assert_called_once_with(self.TEST_CLASSPATH, self.TEST_MAIN,
-                                                    args=None, jvm_options=None, cwd=None)
+                                                    args=None, jvm_options=None, cwd=None,
+                                                    env=None)
       mock_safe_classpath.assert_not_called()
 
   def test_execute_java_no_error(self):
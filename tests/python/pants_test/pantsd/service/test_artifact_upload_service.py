@@ -0,0 +1,43 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import threading
+import time
+
+import requests
+
+from pants.cache.upload_spool import UploadSpool
+from pants.pantsd.service.artifact_upload_service import ArtifactUploadService
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump
+from pants_test.base_test import BaseTest
+from pants_test.cache.cache_server import cache_server
+
+
+class TestArtifactUploadService(BaseTest):
+  def test_drains_spool(self):
+    with temporary_dir() as tmpdir, cache_server() as server:
+      spool_dir = os.path.join(tmpdir, 'spool')
+      tarball = os.path.join(tmpdir, 'some.tgz')
+      safe_file_dump(tarball, 'artifact')
+      url = '{}/muppet_key/fake_hash.tgz'.format(server.url)
+      UploadSpool(spool_dir).enqueue(url, tarball)
+
+      service = ArtifactUploadService(spool_dir)
+      thread = threading.Thread(target=service.run)
+      thread.start()
+      try:
+        deadline = time.time() + 30
+        while UploadSpool(spool_dir).pending() and time.time() < deadline:
+          time.sleep(0.1)
+      finally:
+        service.terminate()
+        thread.join()
+
+      self.assertEquals(0, UploadSpool(spool_dir).pending())
+      self.assertEquals('artifact', requests.get(url).content)
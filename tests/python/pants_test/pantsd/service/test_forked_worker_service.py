@@ -0,0 +1,46 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import socket
+import threading
+import time
+
+from pants.pantsd.service.forked_worker_service import ForkedWorkerService
+from pants.python.forked_worker_pool import ForkedWorkerPool
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_mkdir
+from pants_test.base_test import BaseTest
+
+
+class TestForkedWorkerService(BaseTest):
+  def test_purges_exited_and_retires_live_zygotes(self):
+    with temporary_dir() as pool_dir:
+      pool = ForkedWorkerPool(pool_dir)
+      # A zygote that has exited leaves only its metadata dir behind.
+      safe_mkdir(os.path.join(pool_dir, 'exited'))
+      # Stand in for a live zygote with a listening socket.
+      safe_mkdir(os.path.join(pool_dir, 'live'))
+      server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+      server.bind(pool._socket_path('live'))
+      server.listen(1)
+
+      service = ForkedWorkerService(pool_dir)
+      thread = threading.Thread(target=service.run)
+      thread.start()
+      try:
+        deadline = time.time() + 30
+        while 'exited' in pool.zygotes() and time.time() < deadline:
+          time.sleep(0.1)
+        self.assertEquals(['live'], pool.zygotes())
+      finally:
+        service.terminate()
+        thread.join()
+        server.close()
+
+      self.assertEquals([], pool.zygotes())
+      self.assertFalse(pool.is_alive('live'))
@@ -0,0 +1,150 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import signal
+import sys
+import unittest
+from contextlib import contextmanager
+from textwrap import dedent
+
+from pants.python.forked_worker_pool import ForkedWorkerPool
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump
+from pants.util.process_handler import subprocess
+
+
+class ForkedWorkerPoolTest(unittest.TestCase):
+
+  @contextmanager
+  def _pool(self):
+    with temporary_dir() as root:
+      entry_dir = os.path.join(root, 'entry')
+      safe_file_dump(os.path.join(entry_dir, 'entry.py'), dedent("""
+        import os
+        import sys
+        import time
+
+
+        def main(args):
+          if args[0] == 'sleep':
+            time.sleep(60)
+          import code_module
+          print('{} {}'.format(code_module.VALUE, os.environ['WORKER_VAR']))
+          sys.stderr.write('in {}'.format(os.getcwd()))
+          return int(args[0])
+        """))
+      for name in ('old', 'new'):
+        safe_file_dump(os.path.join(root, name, 'code_module.py'), 'VALUE = "{}"'.format(name))
+      safe_file_dump(os.path.join(root, 'zygote.py'), ForkedWorkerPool.zygote_source())
+
+      self.launches = 0
+
+      def launch(config, log):
+        self.launches += 1
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([entry_dir, os.path.join(root, 'old')]))
+        return subprocess.Popen([sys.executable, os.path.join(root, 'zygote.py'), config],
+                                env=env, stdout=log, stderr=log)
+
+      pool = ForkedWorkerPool(os.path.join(root, 'pool'), idle_timeout=30)
+
+      def spawn(code_dir, args, key='key'):
+        stdout = os.path.join(root, 'stdout')
+        stderr = os.path.join(root, 'stderr')
+        for path in (stdout, stderr):
+          safe_file_dump(path, '')
+        handler = pool.spawn(key, launch,
+                             entry_point='entry:main',
+                             code_paths=[os.path.join(root, code_dir)],
+                             args=args,
+                             cwd=root,
+                             env={'WORKER_VAR': 'muppet'},
+                             stdout=stdout,
+                             stderr=stderr)
+        return handler, stdout, stderr
+
+      try:
+        yield pool, spawn, root
+      finally:
+        pool.retire_all()
+
+  def _read(self, path):
+    with open(path, 'r') as fp:
+      return fp.read()
+
+  def test_workers_run_with_their_own_code_paths_and_environment(self):
+    with self._pool() as (pool, spawn, root):
+      handler, stdout, stderr = spawn('old', ['0'])
+      self.assertEqual(0, handler.wait(timeout=30))
+      self.assertEqual('old muppet\n', self._read(stdout))
+      cwd = self._read(stderr)[len('in '):]
+      self.assertEqual(os.path.realpath(root), os.path.realpath(cwd))
+
+      # The zygote is reused, and a module the zygote never imported is found on the request's
+      # code path.
+      handler, stdout, _ = spawn('new', ['3'])
+      self.assertEqual(3, handler.wait(timeout=30))
+      self.assertEqual('new muppet\n', self._read(stdout))
+      self.assertEqual(1, self.launches)
+      self.assertEqual(['key'], pool.zygotes())
+
+  def test_terminate_and_timeout(self):
+    with self._pool() as (pool, spawn, _):
+      handler, _, _ = spawn('old', ['sleep'])
+      self.assertIsNone(handler.poll())
+      with self.assertRaises(subprocess.TimeoutExpired):
+        handler.wait(timeout=0.1)
+      handler.terminate()
+      self.assertEqual(-signal.SIGTERM, handler.wait(timeout=30))
+      self.assertEqual(-signal.SIGTERM, handler.poll())
+
+  def test_retire(self):
+    with self._pool() as (pool, spawn, _):
+      handler, _, _ = spawn('old', ['0'])
+      handler.wait(timeout=30)
+      self.assertTrue(pool.is_alive('key'))
+
+      pool.retire('key')
+      self.assertFalse(pool.is_alive('key'))
+      self.assertEqual([], pool.zygotes())
+
+      # A retired zygote is relaunched on demand.
+      handler, _, _ = spawn('old', ['0'])
+      self.assertEqual(0, handler.wait(timeout=30))
+      self.assertEqual(2, self.launches)
+
+  def test_deep_zygote_dir_uses_private_socket_dir(self):
+    with self._pool() as (pool, spawn, _):
+      pool._MAX_SOCKET_PATH_LENGTH = 0
+      handler, _, _ = spawn('old', ['0'])
+      self.assertEqual(0, handler.wait(timeout=30))
+      socket_dir = os.path.dirname(pool._socket_path('key'))
+      self.assertEqual(0o700, os.stat(socket_dir).st_mode & 0o777)
+      self.assertTrue(pool.is_alive('key'))
+
+      pool.retire('key')
+      self.assertFalse(pool.is_alive('key'))
+      self.assertFalse(os.path.exists(socket_dir))
+
+  def test_failed_launch(self):
+    with self._pool() as (pool, spawn, root):
+      # The zygote fails to import its entry point without the entry dir on its path.
+      os.unlink(os.path.join(root, 'entry', 'entry.py'))
+      with self.assertRaises(ForkedWorkerPool.LaunchError):
+        spawn('old', ['0'])
+
+  def test_purge_dead(self):
+    with self._pool() as (pool, spawn, _):
+      handler, _, _ = spawn('old', ['0'], key='a')
+      handler.wait(timeout=30)
+      pool.purge_dead()
+      self.assertEqual(['a'], pool.zygotes())
+
+      # Simulate the zygote exiting.
+      os.unlink(pool._socket_path('a'))
+      pool.purge_dead()
+      self.assertEqual([], pool.zygotes())
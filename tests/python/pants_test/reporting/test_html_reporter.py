@@ -0,0 +1,39 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+import mock
+
+from pants.reporting.html_reporter import HtmlReporter
+from pants.util.contextutil import temporary_dir
+
+
+class HtmlReporterTest(unittest.TestCase):
+
+  def _read(self, path):
+    with open(path, 'rb') as fp:
+      return fp.read()
+
+  def test_throttled_output_is_flushed_periodically(self):
+    with temporary_dir() as html_dir:
+      settings = HtmlReporter.Settings(log_level=None, html_dir=html_dir, template_dir=None)
+      reporter = HtmlReporter(mock.Mock(), settings)
+      workunit = mock.Mock(id='tool')
+      path = os.path.join(html_dir, 'tool.stdout')
+
+      reporter.handle_output(workunit, 'stdout', b'first')
+      reporter.handle_output(workunit, 'stdout', b'second')
+      self.assertEqual(b'first', self._read(path))
+
+      # The second write is flushed by a periodic flush, even with no further output.
+      reporter.flush()
+      self.assertEqual(b'first', self._read(path))
+      reporter._last_output_flush_time[path] -= 1
+      reporter.flush()
+      self.assertEqual(b'firstsecond', self._read(path))
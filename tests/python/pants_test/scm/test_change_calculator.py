@@ -0,0 +1,51 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import unittest
+from collections import namedtuple
+
+from pants.build_graph.address import Address
+from pants.build_graph.target import Target
+from pants.scm.change_calculator import _DependentGraph
+
+
+class FakeTargetAdaptor(namedtuple('FakeTargetAdaptor', ['address', 'dependencies'])):
+  type_alias = 'target'
+
+  def kwargs(self):
+    return {}
+
+
+class DependentGraphTest(unittest.TestCase):
+
+  def setUp(self):
+    def adaptor(spec, *dependency_specs):
+      return FakeTargetAdaptor(Address.parse(spec), [Address.parse(s) for s in dependency_specs])
+
+    # d depends on b and c, which both depend on a.
+    self.graph = _DependentGraph.from_iterable({'target': Target}, [
+      adaptor('//:a'),
+      adaptor('//:b', '//:a'),
+      adaptor('//:c', '//:a'),
+      adaptor('//:d', '//:b', '//:c'),
+      adaptor('//:e'),
+    ])
+
+  def addresses(self, *specs):
+    return [Address.parse(spec) for spec in specs]
+
+  def test_dependents_of_addresses(self):
+    self.assertEqual(set(self.addresses('//:b', '//:c')),
+                     set(self.graph.dependents_of_addresses(self.addresses('//:a'))))
+    self.assertEqual([], list(self.graph.dependents_of_addresses(self.addresses('//:e'))))
+
+  def test_transitive_dependents_of_addresses(self):
+    dependents = list(self.graph.transitive_dependents_of_addresses(self.addresses('//:a')))
+    self.assertEqual(3, len(dependents))
+    self.assertEqual(set(self.addresses('//:b', '//:c', '//:d')), set(dependents))
+    self.assertEqual([], list(self.graph.transitive_dependents_of_addresses(
+      self.addresses('//:d', '//:e'))))
@@ -8,11 +8,13 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import os
 from textwrap import dedent
 
+from pants.base.file_digest_cache import FileDigestCache
 from pants.base.payload import Payload
 from pants.build_graph.address_lookup_error import AddressLookupError
 from pants.build_graph.build_file_aliases import BuildFileAliases
 from pants.build_graph.target import Target
 from pants.source.wrapped_globs import EagerFilesetWithSpec, Globs, LazyFilesetWithSpec, RGlobs
+from pants.util.contextutil import temporary_dir
 from pants_test.base_test import BaseTest
 
 
@@ -251,3 +253,20 @@ class FilesetWithSpecTest(BaseTest):
     efws = EagerFilesetWithSpec('test_root', {'globs': []}, files=['a', 'b', 'c'], files_hash='deadbeef')
     result = list(efws.paths_from_buildroot_iter())
     self.assertEquals(result, ['test_root/a', 'test_root/b', 'test_root/c'])
+
+  def test_lazy_fileset_files_hash_is_independent_of_digest_cache(self):
+    self.create_file('foo/a.txt', 'a_contents')
+    self.create_file('foo/b.txt', 'b_contents')
+    fileset = LazyFilesetWithSpec('foo', {'globs': ['foo/*.txt']}, lambda: ['a.txt', 'b.txt'])
+    uncached_hash = fileset.files_hash
+
+    with temporary_dir() as tmpdir:
+      FileDigestCache.set_global_instance(FileDigestCache(os.path.join(tmpdir, 'digests.db')))
+      try:
+        self.assertEqual(uncached_hash, fileset.files_hash)
+        self.assertEqual(uncached_hash, fileset.files_hash)
+      finally:
+        FileDigestCache.set_global_instance(None)
+
+    self.create_file('foo/b.txt', 'changed_contents')
+    self.assertNotEqual(uncached_hash, fileset.files_hash)
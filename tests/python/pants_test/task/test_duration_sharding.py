@@ -0,0 +1,79 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from pants.task.duration_sharding import RecordedDurations, bin_pack
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump
+
+
+class BinPackTest(unittest.TestCase):
+
+  def test_balances_durations(self):
+    durations = {'a': 10, 'b': 6, 'c': 5, 'd': 4, 'e': 1}
+    bins = bin_pack(durations.keys(), durations.get, 2)
+    self.assertEqual([['a', 'd'], ['b', 'c', 'e']], bins)
+    self.assertEqual([14, 12], [sum(durations[i] for i in b) for b in bins])
+
+  def test_unknown_durations_are_divided_by_count(self):
+    bins = bin_pack(['a', 'b', 'c', 'd', 'e'], lambda item: None, 3)
+    self.assertEqual([2, 2, 1], [len(b) for b in bins])
+    self.assertEqual(['a', 'b', 'c', 'd', 'e'], sorted(i for b in bins for i in b))
+
+  def test_unknown_durations_default_to_mean(self):
+    durations = {'a': 9, 'b': 1, 'c': None, 'd': None}
+    bins = bin_pack(durations.keys(), durations.get, 2)
+    # `c` and `d` are expected to take 5 each.
+    self.assertEqual([['a', 'b'], ['d', 'c']], bins)
+
+  def test_more_bins_than_items(self):
+    self.assertEqual([['a'], [], []], bin_pack(['a'], lambda item: 1.0, 3))
+
+
+class RecordedDurationsTest(unittest.TestCase):
+
+  def test_record_and_save(self):
+    with temporary_dir() as workdir:
+      path = os.path.join(workdir, 'durations.json')
+      durations = RecordedDurations(path)
+      self.assertIsNone(durations.target_duration('a:a'))
+      durations.record('a:a', 'a.ATest', 1.5)
+      durations.record('a:a', 'a.ATest', 0.5)
+      durations.record('a:a', 'a.OtherTest', 1.0)
+      durations.record(None, 'b.BTest', 2.0)
+      durations.save()
+
+      durations = RecordedDurations(path)
+      self.assertEqual(3.0, durations.target_duration('a:a'))
+      self.assertEqual(2.0, durations.class_duration('a.ATest'))
+      self.assertEqual(2.0, durations.class_duration('b.BTest'))
+
+      # Only the durations of tests that ran again are replaced.
+      durations.record('a:a', 'a.OtherTest', 4.0)
+      durations.save()
+      durations = RecordedDurations(path)
+      self.assertEqual(4.0, durations.target_duration('a:a'))
+      self.assertEqual(2.0, durations.class_duration('a.ATest'))
+      self.assertEqual(4.0, durations.class_duration('a.OtherTest'))
+
+  def test_save_without_durations_writes_nothing(self):
+    with temporary_dir() as workdir:
+      path = os.path.join(workdir, 'durations.json')
+      RecordedDurations(path).save()
+      self.assertFalse(os.path.exists(path))
+
+  def test_unreadable_file_is_ignored(self):
+    with temporary_dir() as workdir:
+      path = os.path.join(workdir, 'durations.json')
+      safe_file_dump(path, 'not json')
+      durations = RecordedDurations(path)
+      self.assertIsNone(durations.target_duration('a:a'))
+      durations.record('a:a', None, 1.0)
+      durations.save()
+      self.assertEqual(1.0, RecordedDurations(path).target_duration('a:a'))
@@ -61,6 +61,8 @@ class DummyGen(SimpleCodegenTask):
   by SimpleCodegenTask.
   """
 
+  supports_concurrent_codegen = True
+
   def __init__(self, *args, **kwargs):
     super(DummyGen, self).__init__(*args, **kwargs)
     self._test_case = None
@@ -249,6 +251,54 @@ class SimpleCodegenTaskTest(TaskTestBase):
     self._do_test_duplication(targets, allow_dups=False, should_fail=False)
     self._do_test_duplication(targets, allow_dups=True, should_fail=False)
 
+  def test_concurrent_codegen(self):
+    parent, good, _ = self._get_duplication_test_targets()
+    self.add_to_build_file('gen-other', dedent("""
+      dummy_library(name='other',
+        sources=['org/pantsbuild/example/other.dummy'],
+      )
+    """))
+    self.create_file('gen-other/org/pantsbuild/example/other.dummy',
+                     'org.pantsbuild.example OtherClass')
+    other = self.target('gen-other:other')
+
+    task = self._create_dummy_task(target_roots=[good, other], worker_count=4)
+    task.execute()
+
+    self.assertEqual(3, task.execution_counts)
+    synthetic_targets = [self.build_graph.get_target(address)
+                         for address in self.build_graph.synthetic_addresses]
+    self.assertEqual({parent, good, other}, {t.derived_from for t in synthetic_targets})
+
+  def test_concurrent_codegen_failure_keeps_earlier_waves(self):
+    parent, good, _ = self._get_duplication_test_targets()
+    task = self._create_dummy_task(target_roots=[good], worker_count=4)
+    execute_codegen = task.execute_codegen
+
+    def fail_for_good(target, target_workdir):
+      if target == good:
+        raise Exception('Failed to generate {}.'.format(target.address.spec))
+      execute_codegen(target, target_workdir)
+    task.execute_codegen = fail_for_good
+
+    with self.assertRaises(Exception):
+      task.execute()
+    self.assertEqual(1, task.execution_counts)
+
+    # The parent was generated in an earlier wave than the failure, and so is still valid.
+    task = self._create_dummy_task(target_roots=[good], worker_count=4)
+    with task.invalidated(task.codegen_targets(),
+                          invalidate_dependents=True,
+                          topological_order=True) as invalidation_check:
+      self.assertEqual([parent, good], [vt.target for vt in invalidation_check.all_vts])
+      self.assertEqual([good], [vt.target for vt in invalidation_check.invalid_vts])
+
+  def test_concurrent_codegen_duplicated_fail(self):
+    parent, _, bad = self._get_duplication_test_targets()
+    task = self._create_dummy_task(target_roots=[bad], worker_count=4, allow_dups=False)
+    with self.assertRaises(SimpleCodegenTask.DuplicateSourceError):
+      task.execute()
+
   def test_copy_target_attributes(self):
     self.create_file('fleem/org/pantsbuild/example/fleem.dummy',
                      'org.pantsbuild.example Fleem')
@@ -7,9 +7,12 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import os
 
+import mock
+
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
 from pants.build_graph.files import Files
+from pants.cache.artifact_cache import ArtifactCache
 from pants.cache.cache_setup import CacheSetup
 from pants.option.arg_splitter import GLOBAL_SCOPE
 from pants.subsystem.subsystem import Subsystem
@@ -382,6 +385,31 @@ class TaskTest(TaskTestBase):
     # previous_results.
     self.assertContent(vtC, first_contents + second_contents)
 
+  def _new_task(self, task):
+    new_task = self.create_task(task.context)
+    new_task._incremental = task.incremental
+    return new_task
+
+  def test_existence_check_skipped_after_high_hit_rate(self):
+    # The first run misses, so the next run checks for the existence of artifacts.
+    task, vtA, was_valid = self._run_fixture(artifact_cache=True)
+    self.assertFalse(was_valid)
+    task = self._new_task(task)
+    self.assertFalse(task._skip_artifact_existence_check)
+
+    # After a run with half of its keys hit, the next run fetches artifacts without checking.
+    vtA.force_invalidate()
+    _, was_valid = task.execute()
+    self.assertTrue(was_valid)
+    task = self._new_task(task)
+    self.assertTrue(task._skip_artifact_existence_check)
+
+    vtA.force_invalidate()
+    with mock.patch.object(ArtifactCache, 'has_many') as has_many:
+      _, was_valid = task.execute()
+    self.assertTrue(was_valid)
+    self.assertFalse(has_many.called)
+
   # live_dirs() is in cache_manager, but like all of these tests, only makes sense to test as a
   # sequence of task runs.
   def test_live_dirs(self):
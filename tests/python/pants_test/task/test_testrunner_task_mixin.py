@@ -7,15 +7,17 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import collections
 import os
+import threading
 from contextlib import contextmanager
 from unittest import TestCase
 from xml.etree.ElementTree import ParseError
 
 from mock import Mock, patch
 
-from pants.base.exceptions import ErrorWhileTesting
+from pants.base.exceptions import ErrorWhileTesting, TaskError
+from pants.build_graph.target import Target
 from pants.task.task import TaskBase
-from pants.task.testrunner_task_mixin import TestRunnerTaskMixin
+from pants.task.testrunner_task_mixin import PartitionedTestRunnerTaskMixin, TestRunnerTaskMixin
 from pants.util.contextutil import temporary_dir
 from pants.util.dirutil import safe_open
 from pants.util.process_handler import ProcessHandler, subprocess
@@ -378,6 +380,247 @@ class TestRunnerTaskMixinMultipleTargets(TaskTestBase):
     self.assertEqual([targetB, targetC], cm.exception.failed_targets)
 
 
+class PartitionedTestRunnerTaskMixinConcurrencyTest(TaskTestBase):
+  @classmethod
+  def task_type(cls):
+    class BlockingProcessHandler(ProcessHandler):
+      """A process that runs until it is terminated."""
+
+      def __init__(self):
+        self.terminated = threading.Event()
+
+      def wait(self, timeout=None):
+        # NB: Don't hang the test if the process is never terminated.
+        self.terminated.wait(10)
+        return -15 if self.terminated.is_set() else 0
+
+      def kill(self):
+        pass
+
+      def terminate(self):
+        self.terminated.set()
+
+      def poll(self):
+        return 0
+
+    class PartitionedTestRunnerTask(PartitionedTestRunnerTaskMixin):
+      failing = set()
+      blocking = set()
+
+      def __init__(self, *args, **kwargs):
+        super(PartitionedTestRunnerTask, self).__init__(*args, **kwargs)
+        self.run = []
+        self.max_running = 0
+        self.process_handlers = []
+        self._running = 0
+        self._condition = threading.Condition()
+
+      @property
+      def supports_concurrent_partitions(self):
+        return True
+
+      def _spawn(self, *args, **kwargs):
+        process_handler = BlockingProcessHandler()
+        self.process_handlers.append(process_handler)
+        return process_handler
+
+      def _test_target_filter(self):
+        return lambda target: True
+
+      def _validate_target(self, target):
+        pass
+
+      @contextmanager
+      def partitions(self, per_target, all_targets, test_targets):
+        def iter_partitions():
+          for target in test_targets:
+            yield (target,), ()
+        yield iter_partitions
+
+      def run_tests(self, fail_fast, test_targets, *args):
+        with self._condition:
+          self.run.extend(test_targets)
+          self._running += 1
+          self.max_running = max(self.max_running, self._running)
+          self._condition.notify_all()
+          # Hold each partition open until another is running alongside it, if one will be.
+          if self._running < 2 and self.get_options().partition_concurrency > 1:
+            self._condition.wait(1)
+          self._running -= 1
+        if any(t.address.target_name in self.blocking for t in test_targets):
+          return self.result_class.rc(self._spawn_and_wait()).with_failed_targets(test_targets)
+        failed = [t for t in test_targets if t.address.target_name in self.failing]
+        if failed:
+          return self.result_class.rc(1).with_failed_targets(failed)
+        return self.result_class.successful()
+
+      def collect_files(self, *args):
+        return []
+
+    return PartitionedTestRunnerTask
+
+  def setUp(self):
+    super(PartitionedTestRunnerTaskMixinConcurrencyTest, self).setUp()
+    self.targets = [self.make_target('src:{}'.format(name), Target) for name in 'abcdef']
+
+  def _execute(self, failing=(), blocking=(), **options):
+    self.set_options(fast=False, **options)
+    task = self.create_task(self.context(target_roots=self.targets))
+    task.failing = set(failing)
+    task.blocking = set(blocking)
+    return task, task.execute
+
+  def test_serial_by_default(self):
+    task, execute = self._execute()
+    execute()
+    self.assertEqual(self.targets, task.run)
+    self.assertEqual(1, task.max_running)
+
+  def test_concurrent(self):
+    task, execute = self._execute(partition_concurrency=2)
+    execute()
+    self.assertEqual(set(self.targets), set(task.run))
+    self.assertEqual(6, len(task.run))
+    self.assertEqual(2, task.max_running)
+
+  def test_concurrent_failures(self):
+    task, execute = self._execute(failing=['b', 'e'], partition_concurrency=3, fail_fast=False)
+    with self.assertRaises(ErrorWhileTesting) as cm:
+      execute()
+    self.assertEqual(6, len(task.run))
+    self.assertEqual({self.targets[1], self.targets[4]}, set(cm.exception.failed_targets))
+
+  def test_concurrent_fail_fast(self):
+    task, execute = self._execute(failing=['a'], partition_concurrency=2, fail_fast=True)
+    with self.assertRaises(ErrorWhileTesting) as cm:
+      execute()
+    # No partitions are started once `a` fails.
+    self.assertLess(len(task.run), 6)
+    self.assertEqual([self.targets[0]], cm.exception.failed_targets)
+
+  def test_concurrent_fail_fast_terminates_running_partitions(self):
+    task, execute = self._execute(failing=['a'], blocking=['b'], partition_concurrency=2,
+                                  fail_fast=True)
+    with self.assertRaises(ErrorWhileTesting) as cm:
+      execute()
+    self.assertEqual(self.targets[:2], sorted(task.run))
+    self.assertEqual(1, len(task.process_handlers))
+    self.assertTrue(task.process_handlers[0].terminated.is_set())
+    # The terminated partition is not reported as failed.
+    self.assertEqual([self.targets[0]], cm.exception.failed_targets)
+
+
+class TestRunnerTaskMixinDurationShardingTest(TaskTestBase):
+  @classmethod
+  def task_type(cls):
+    class ShardedTestRunnerTask(PartitionedTestRunnerTaskMixin):
+      durations = {}
+
+      @classmethod
+      def register_options(cls, register):
+        super(ShardedTestRunnerTask, cls).register_options(register)
+        register('--test-shard', fingerprint=True)
+
+      def __init__(self, *args, **kwargs):
+        super(ShardedTestRunnerTask, self).__init__(*args, **kwargs)
+        self.run = []
+
+      def _spawn(self, *args, **kwargs):
+        raise NotImplementedError()
+
+      def _test_target_filter(self):
+        return lambda target: True
+
+      def _validate_target(self, target):
+        pass
+
+      @contextmanager
+      def partitions(self, per_target, all_targets, test_targets):
+        def iter_partitions():
+          for target in test_targets:
+            yield (target,), ()
+        yield iter_partitions
+
+      def run_tests(self, fail_fast, test_targets, *args):
+        for target in test_targets:
+          self.run.append(target.address.target_name)
+          self.report_all_info_for_single_test(self.options_scope, target, 'test', {
+            'time': self.durations[target.address.target_name],
+            'classname': 'Test{}'.format(target.address.target_name),
+            'result_code': 'success',
+          })
+        return self.result_class.successful()
+
+      def collect_files(self, *args):
+        return []
+
+    return ShardedTestRunnerTask
+
+  def setUp(self):
+    super(TestRunnerTaskMixinDurationShardingTest, self).setUp()
+    self.targets = [self.make_target('src:{}'.format(name), Target) for name in 'abcd']
+    self.durations_file = os.path.join(self.build_root, 'durations.json')
+
+  def _create_task(self, durations=None, **options):
+    self.set_options(fast=False, **options)
+    task = self.create_task(self.context(target_roots=self.targets))
+    task.durations = durations or {'a': 1.0, 'b': 4.0, 'c': 2.0, 'd': 1.5}
+    return task
+
+  def _shard(self, **options):
+    return sorted(t.address.target_name for t in self._create_task(**options)._get_test_targets())
+
+  def _read(self, path):
+    with open(path, 'r') as fp:
+      return fp.read()
+
+  def test_shard_by_durations(self):
+    options = dict(shard_by_durations=True, durations_file=self.durations_file)
+    # Without recorded durations, targets are divided between shards by count.
+    self.assertEqual(['b', 'd'], self._shard(test_shard='0/2', **options))
+    self.assertEqual(['a', 'c'], self._shard(test_shard='1/2', **options))
+
+    # A run records the durations of the targets that ran.
+    task = self._create_task(test_shard=None, shard_by_durations=False,
+                             durations_file=self.durations_file)
+    task.execute()
+    self.assertEqual(['a', 'b', 'c', 'd'], sorted(task.run))
+
+    self.assertEqual(['b'], self._shard(test_shard='0/2', **options))
+    self.assertEqual(['a', 'c', 'd'], self._shard(test_shard='1/2', **options))
+
+  def test_shard_by_durations_requires_shard(self):
+    self.assertEqual(['a', 'b', 'c', 'd'], self._shard(shard_by_durations=True))
+
+  def test_shard_by_durations_requires_durations_file(self):
+    with self.assertRaises(TaskError):
+      self._shard(test_shard='0/2', shard_by_durations=True)
+
+  def test_shards_with_different_durations_cover_all_targets(self):
+    self._create_task(durations_file=self.durations_file).execute()
+    snapshot = self._read(self.durations_file)
+
+    # Each shard measures different durations for its targets, as if run on different machines.
+    shard_durations = [{'a': 9.0, 'b': 0.5, 'c': 0.1, 'd': 7.0},
+                       {'a': 0.2, 'b': 8.0, 'c': 6.0, 'd': 0.3}]
+    outputs = [os.path.join(self.build_root, 'durations-{}.json'.format(i)) for i in range(2)]
+    run = []
+    for index, durations in enumerate(shard_durations):
+      task = self._create_task(durations=durations,
+                               test_shard='{}/2'.format(index),
+                               shard_by_durations=True,
+                               durations_file=self.durations_file,
+                               durations_output_file=outputs[index])
+      task.execute()
+      run.extend(task.run)
+    # Every target ran in exactly one shard.
+    self.assertEqual(['a', 'b', 'c', 'd'], sorted(run))
+
+    # The shards recorded their own durations, and left the shared snapshot untouched.
+    self.assertEqual(snapshot, self._read(self.durations_file))
+    self.assertNotEqual(self._read(outputs[0]), self._read(outputs[1]))
+
+
 class TestRunnerTaskMixinXmlParsing(TestRunnerTaskMixin, TestCase):
   @staticmethod
   def _raise_handler(e):
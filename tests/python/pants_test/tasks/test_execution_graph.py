@@ -5,11 +5,17 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import os
+import threading
+import time
 import unittest
+from multiprocessing.pool import ThreadPool
 
 from pants.backend.jvm.tasks.jvm_compile.execution_graph import (ExecutionFailure, ExecutionGraph,
-                                                                 Job, JobExistsError,
-                                                                 NoRootJobError, UnknownJobError)
+                                                                 Job, JobDurationHistory,
+                                                                 JobExistsError, NoRootJobError,
+                                                                 UnknownJobError)
+from pants.util.contextutil import temporary_dir
 
 
 class ImmediatelyExecutingPool(object):
@@ -19,6 +25,20 @@ class ImmediatelyExecutingPool(object):
     work.func(*work.args_tuples[0])
 
 
+class ThreadedPool(object):
+
+  def __init__(self, num_workers):
+    self.num_workers = num_workers
+    self._pool = ThreadPool(processes=num_workers)
+
+  def submit_async_work(self, work):
+    self._pool.apply_async(work.func, work.args_tuples[0])
+
+  def close(self):
+    self._pool.close()
+    self._pool.join()
+
+
 class PrintLogger(object):
 
   def error(self, msg):
@@ -272,3 +292,81 @@ class ExecutionGraphTest(unittest.TestCase):
 
     self.assertEqual(self.jobs_run, ['A'])
     self.assertEqual(failures, ['A', 'B1', 'B2', 'C1', 'C2', 'E'])
+
+  def test_memory_budget_limits_concurrent_jobs(self):
+    lock = threading.Lock()
+    in_flight = [0]
+    max_in_flight = [0]
+
+    def tracking_fn():
+      with lock:
+        in_flight[0] += 1
+        max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+      time.sleep(0.05)
+      with lock:
+        in_flight[0] -= 1
+
+    def memory_job(name):
+      return Job(name, tracking_fn, [], 1, memory=2)
+
+    exec_graph = ExecutionGraph([memory_job(name) for name in 'ABCDEF'], memory_budget=4)
+    pool = ThreadedPool(4)
+    try:
+      exec_graph.execute(pool, PrintLogger())
+    finally:
+      pool.close()
+    self.assertEqual(2, max_in_flight[0])
+
+  def test_job_exceeding_memory_budget_runs_alone(self):
+    exec_graph = ExecutionGraph([Job("A", passing_fn, [], 1, memory=8),
+                                 Job("B", passing_fn, [], 1, memory=8)],
+                                memory_budget=4)
+    pool = ThreadedPool(2)
+    try:
+      exec_graph.execute(pool, PrintLogger())
+    finally:
+      pool.close()
+
+
+class JobDurationHistoryTest(unittest.TestCase):
+
+  def test_estimate_without_history_is_size(self):
+    with temporary_dir() as tmpdir:
+      history = JobDurationHistory(os.path.join(tmpdir, 'durations.json'))
+      self.assertEqual(10, history.estimate('A', 10))
+
+  def test_estimate_scales_sizes_by_known_durations(self):
+    with temporary_dir() as tmpdir:
+      history = JobDurationHistory(os.path.join(tmpdir, 'durations.json'))
+      history.record('A', 100, 5.0)
+      self.assertEqual(5.0, history.estimate('A', 1000))
+      self.assertEqual(1.0, history.estimate('B', 20))
+
+  def test_durations_are_averaged_and_persisted(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'subdir', 'durations.json')
+      history = JobDurationHistory(path)
+      history.record('A', 100, 4.0)
+      history.record('A', 100, 8.0)
+      history.save()
+
+      self.assertEqual(6.0, JobDurationHistory(path).estimate('A', 100))
+
+  def test_estimate_ratio_tracks_recorded_and_loaded_durations(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'durations.json')
+      history = JobDurationHistory(path)
+      history.record('A', 100, 4.0)
+      history.record('B', 100, 2.0)
+      history.record('A', 200, 10.0)
+      self.assertEqual(3.0, history.estimate('C', 100))
+      history.save()
+
+      self.assertEqual(3.0, JobDurationHistory(path).estimate('C', 100))
+
+  def test_corrupt_history_is_ignored(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'durations.json')
+      with open(path, 'w') as fp:
+        fp.write('not json')
+      self.assertEqual(10, JobDurationHistory(path).estimate('A', 10))
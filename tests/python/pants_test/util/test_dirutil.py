@@ -443,8 +443,9 @@ class DirutilTest(unittest.TestCase):
       touch(os.path.join(td, 'file4'))
       safe_mkdir(os.path.join(td, 'file5'))
 
-      safe_rm_oldest_items_in_dir(td, 3)
+      removed = safe_rm_oldest_items_in_dir(td, 3)
 
+      self.assertEqual({os.path.join(td, 'file1'), os.path.join(td, 'file2')}, set(removed))
       self.assertFalse(os.path.exists(os.path.join(td, 'file1')))
       self.assertFalse(os.path.exists(os.path.join(td, 'file2')))
 